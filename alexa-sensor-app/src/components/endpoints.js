@@ -5,6 +5,8 @@ import axios from 'axios';
 const AXIOS_CONFIG = {
     baseURL: '/api', 
   }
+
+  const PAGE_SIZE = 50
   
   const loadEndpoint = (data) => {
     return {
@@ -233,6 +235,7 @@ const AXIOS_CONFIG = {
           {friendlyName: 'xxxxxx', description: 'xxxxxxxxxxxxxxxxxxxxxxxxxxxxx'},
         ],
         isLoading: true,
+        cursor: null,
       };
     }
   
@@ -242,9 +245,20 @@ const AXIOS_CONFIG = {
   
     updateData = () => {
       this.setState({isLoading: true})
-      axios.get('/endpoints', AXIOS_CONFIG).then(res => {
+      this.loadPage(null, [])
+    }
+
+    loadMore = () => {
+      this.loadPage(this.state.cursor, this.state.endpoints)
+    }
+
+    loadPage = (cursor, endpoints) => {
+      const params = {limit: PAGE_SIZE}
+      if (cursor) {params['cursor'] = cursor}
+      axios.get('/endpoints', {...AXIOS_CONFIG, params: params}).then(res => {
         this.setState({
-          endpoints: res.data.map(loadEndpoint),
+          endpoints: endpoints.concat(res.data.endpoints.map(loadEndpoint)),
+          cursor: res.data.cursor || null,
           isLoading: false,
         })
       })
@@ -297,6 +311,7 @@ const AXIOS_CONFIG = {
             </tbody>
           </HTMLTable>
           <Button onClick={this.handleAdd} intent='primary' icon='add'>Add</Button>
+          {this.state.cursor && <Button onClick={this.loadMore} icon='more'>Load more</Button>}
         </Card>
       );
     }
@@ -42,6 +42,19 @@ class SkillClient():
         }
         return self.session.post(url, data=json.dumps(body))
 
+    def create_endpoints(self, endpoints):
+        url = self.base_url + '/endpoints'
+
+        body = {
+            'endpoints': []
+        }
+        for endpoint in endpoints:
+            endpoint = dict(endpoint)
+            endpoint.setdefault('userId', 'amzn1.account.AHGRSDVG3AWD5GUJYMQQWCLC3JJQ')
+            body['endpoints'].append(endpoint)
+
+        return self.session.post(url, data=json.dumps(body))
+
     def update_endpoint(self, endpoint_id, name=None, description=None):
         url = self.base_url + '/endpoints'
 
@@ -80,6 +93,28 @@ class SkillClient():
 
         return self.session.post(url, data=json.dumps(body))
 
+    def send_events(self, endpoint_ids, state='detectionState', value='DETECTED', namespace='Alexa.ContactSensor'):
+        url = self.base_url + '/events'
+
+        events = []
+        for endpoint_id in endpoint_ids:
+            events.append({
+                'type': 'ChangeReport',
+                'endpoint': {
+                    'userId': 'amzn1.account.AHGRSDVG3AWD5GUJYMQQWCLC3JJQ',
+                    'id': endpoint_id,
+                    'state': state,
+                    'value': value,
+                    'namespace': namespace
+                }
+            })
+
+        body = {
+            'events': events
+        }
+
+        return self.session.post(url, data=json.dumps(body))
+
     def delete_endpoint(self, endpoint_id):
         url = self.base_url + '/endpoints'
 
@@ -96,7 +131,33 @@ class SkillClient():
 
         return self.session.delete(url, data=json.dumps(body))
 
-    def get_endpoints(self):
+    def get_endpoints(self, limit=None, cursor=None, user_id=None, display_category=None, attributes=None):
         url = self.base_url + '/endpoints'
-        return self.session.get(url)
+
+        params = {}
+        if limit is not None:
+            params['limit'] = limit
+        if cursor is not None:
+            params['cursor'] = cursor
+        if user_id is not None:
+            params['userId'] = user_id
+        if display_category is not None:
+            params['displayCategory'] = display_category
+        if attributes is not None:
+            params['attributes'] = ','.join(attributes)
+
+        return self.session.get(url, params=params)
+
+    def iter_endpoints(self, page_size=100, **kwargs):
+        cursor = None
+        while True:
+            response = self.get_endpoints(limit=page_size, cursor=cursor, **kwargs)
+            response.raise_for_status()
+            page = response.json()
+            for endpoint in page['endpoints']:
+                yield endpoint
+
+            cursor = page.get('cursor')
+            if cursor is None:
+                break
 
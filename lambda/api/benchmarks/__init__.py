@@ -0,0 +1,3 @@
+"""
+Benchmarks for the endpoint cloud, run from lambda/api with python -m benchmarks.<name>
+"""
@@ -0,0 +1,150 @@
+"""
+TLS handshakes and events per second when sending ChangeReports to a local stand-in of the Alexa Event Gateway.
+
+Compares a new HTTPSConnection for every event, as send_event used to, with the keep-alive ApiConnectionPool. The
+stand-in serves HTTPS on localhost with a self-signed certificate made by the openssl command line tool, or with
+the given --certfile and --keyfile. Run from lambda/api:
+
+    python -m benchmarks.event_gateway [--events 200] [--threads 4]
+"""
+
+import argparse
+import http.client
+import http.server
+import json
+import os
+import ssl
+import subprocess
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from endpoint_cloud.api_connection_pool import ApiConnectionPool
+
+EVENT = json.dumps({
+    'event': {
+        'header': {'namespace': 'Alexa', 'name': 'ChangeReport', 'payloadVersion': '3', 'messageId': 'message'},
+        'endpoint': {'scope': {'type': 'BearerToken', 'token': 'token'}, 'endpointId': 'sensor-0'},
+        'payload': {'change': {'cause': {'type': 'PHYSICAL_INTERACTION'}, 'properties': []}}
+    }
+})
+
+HEADERS = {
+    'Authorization': "Bearer token",
+    'Content-Type': "application/json;charset=UTF-8",
+    'Cache-Control': "no-cache"
+}
+
+
+class EventGatewayHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.handshakes += 1
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers['Content-Length']))
+        with self.server.lock:
+            self.server.events += 1
+        self.send_response(202)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+class EventGateway(http.server.ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, context):
+        super().__init__(('127.0.0.1', 0), EventGatewayHandler)
+        self.context = context
+        self.lock = threading.Lock()
+        self.handshakes = 0
+        self.events = 0
+
+    def get_request(self):
+        sock, address = super().get_request()
+        return self.context.wrap_socket(sock, server_side=True), address
+
+    def reset(self):
+        with self.lock:
+            self.handshakes = 0
+            self.events = 0
+
+
+def make_certificate(directory):
+    certfile = os.path.join(directory, 'cert.pem')
+    keyfile = os.path.join(directory, 'key.pem')
+    subprocess.run(
+        ['openssl', 'req', '-x509', '-newkey', 'rsa:2048', '-nodes', '-days', '1', '-subj', '/CN=localhost',
+         '-keyout', keyfile, '-out', certfile],
+        check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    return certfile, keyfile
+
+
+def send_new_connection(host, context):
+    connection = http.client.HTTPSConnection(host, context=context)
+    connection.request('POST', '/v3/events', EVENT, HEADERS)
+    response = connection.getresponse()
+    response.read()
+    connection.close()
+    return response.status
+
+
+def send_pooled(pool):
+    return pool.request('POST', '/v3/events', EVENT, HEADERS).getcode()
+
+
+def run(server, send, events, threads):
+    server.reset()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        for _ in executor.map(lambda _: send(), range(events)):
+            pass
+    elapsed = time.perf_counter() - start
+    return server.handshakes, server.events, events / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--events', type=int, default=200, help='events sent per measurement')
+    parser.add_argument('--threads', type=int, default=4, help='events sent at the same time')
+    parser.add_argument('--certfile', help='certificate of the stand-in, made with openssl if not given')
+    parser.add_argument('--keyfile', help='private key of the stand-in')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        certfile, keyfile = args.certfile, args.keyfile
+        if certfile is None:
+            certfile, keyfile = make_certificate(directory)
+        server_context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        server_context.load_cert_chain(certfile, keyfile)
+        client_context = ssl.create_default_context(cafile=certfile)
+        client_context.check_hostname = False
+
+    server = EventGateway(server_context)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host = '127.0.0.1:{0}'.format(server.server_address[1])
+    pool = ApiConnectionPool(host, size=args.threads, context=client_context)
+
+    measurements = (
+        ('new connection', lambda: send_new_connection(host, client_context)),
+        ('pooled', lambda: send_pooled(pool))
+    )
+    for label, send in measurements:
+        handshakes, events, rate = run(server, send, args.events, args.threads)
+        print('{0:<15} {1:>5} handshakes for {2} events ({3:.2f} per event), {4:>8.1f} events/s'.format(
+            label, handshakes, events, handshakes / events, rate))
+
+    pool.close()
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""
+Requests per second of an access token lookup in APISensorUsers, building the DynamoDB resource per request or not.
+
+Compares boto3.resource('dynamodb').Table(...) on every request, as the handlers used to, with the table handle kept
+by ApiResources across warm invocations. DynamoDB is stubbed out, so only the client side is measured:
+
+    python -m benchmarks.resources [--seconds 2]
+"""
+
+import argparse
+import json
+import os
+import time
+
+import boto3
+from botocore.awsrequest import AWSResponse
+
+from endpoint_cloud.api_resources import ApiResources, USERS_TABLE
+
+GET_ITEM_RESPONSE = json.dumps({
+    'Item': {
+        'UserId': {'S': 'user-0'},
+        'AccessToken': {'S': 'access-token'},
+        'ExpirationUTC': {'S': '2099-01-01T00:00:00.000000'}
+    }
+}).encode('utf-8')
+
+
+class StubBody:
+
+    def __init__(self, body):
+        self.body = body
+
+    def stream(self, **kwargs):
+        yield self.body
+
+
+def stub_dynamodb(request, **kwargs):
+    """
+    Answer every DynamoDB request with a canned GetItem response instead of sending it
+    """
+    return AWSResponse(request.url, 200, {'x-amzn-requestid': 'stub'}, StubBody(GET_ITEM_RESPONSE))
+
+
+def per_request():
+    table = boto3.resource('dynamodb').Table(USERS_TABLE)
+    return table.get_item(Key={'UserId': 'user-0'})
+
+
+def reused():
+    table = ApiResources.get_users_table()
+    return table.get_item(Key={'UserId': 'user-0'})
+
+
+def run(function, seconds):
+    count = 0
+    start = time.perf_counter()
+    deadline = start + seconds
+    while time.perf_counter() < deadline:
+        function()
+        count += 1
+    return count / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--seconds', type=float, default=2.0, help='duration of each measurement')
+    args = parser.parse_args()
+
+    # Clients need a region and credentials even though no request leaves the process
+    os.environ.setdefault('AWS_DEFAULT_REGION', 'eu-west-1')
+    os.environ.setdefault('AWS_ACCESS_KEY_ID', 'stub')
+    os.environ.setdefault('AWS_SECRET_ACCESS_KEY', 'stub')
+    boto3.setup_default_session()
+    ApiResources.reset()
+    for session in (boto3.DEFAULT_SESSION, ApiResources.get_session()):
+        session.events.register('before-send.dynamodb', stub_dynamodb)
+
+    for label, function in (('per request', per_request), ('reused', reused)):
+        start = time.perf_counter()
+        function()
+        first = (time.perf_counter() - start) * 1000
+        print('{0:<12} first {1:>7.1f} ms, then {2:>9.1f} requests/s'.format(label, first, run(function, args.seconds)))
+
+
+if __name__ == '__main__':
+    main()
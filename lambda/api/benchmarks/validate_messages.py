@@ -0,0 +1,118 @@
+"""
+Validations per second of Alexa smart home messages against alexa_smart_home_message_schema.json.
+
+Compares loading the schema and building a validator for every message, as validate_response used to, with a
+cached interpreting validator and with the compiled validator ApiValidator uses. Run from lambda/api:
+
+    python -m benchmarks.validate_messages [--seconds 2] [--endpoints 20]
+"""
+
+import argparse
+import json
+import time
+
+from alexa.skills.smarthome import AlexaResponse
+from jsonschema import validate
+from endpoint_cloud.api_validator import ApiValidator, SCHEMA_PATH
+
+# The bundled schema predates Alexa.ContactSensor, so the samples use interfaces it knows
+CAPABILITIES = [
+    {
+        'type': 'AlexaInterface',
+        'interface': 'Alexa.PowerController',
+        'version': '3',
+        'properties': {
+            'supported': [{'name': 'powerState'}],
+            'proactivelyReported': True,
+            'retrievable': True
+        }
+    },
+    {
+        'type': 'AlexaInterface',
+        'interface': 'Alexa.EndpointHealth',
+        'version': '3',
+        'properties': {
+            'supported': [{'name': 'connectivity'}],
+            'proactivelyReported': True,
+            'retrievable': True
+        }
+    }
+]
+
+
+def discover_response(endpoints):
+    response = AlexaResponse(namespace='Alexa.Discovery', name='Discover.Response')
+    for index in range(endpoints):
+        response.add_payload_endpoint(
+            friendly_name='Sensor {0}'.format(index),
+            endpoint_id='sensor-{0}'.format(index),
+            capabilities=CAPABILITIES,
+            display_categories=['SWITCH'],
+            manufacturer_name='Lukas Patzke'
+        )
+    return response.get()
+
+
+def change_report():
+    response = AlexaResponse(namespace='Alexa', name='ChangeReport', endpoint_id='sensor-0', token='token')
+    response.set_payload({
+        'change': {
+            'cause': {'type': 'PHYSICAL_INTERACTION'},
+            'properties': [
+                AlexaResponse.create_context_property(
+                    namespace='Alexa.PowerController', name='powerState', value='ON')
+            ]
+        }
+    })
+    return response.get()
+
+
+def uncached(message):
+    with open(SCHEMA_PATH, 'r') as schema_file:
+        validate(message, json.load(schema_file))
+
+
+def cached(message):
+    ApiValidator.get_validator().is_valid(message)
+
+
+def compiled(message):
+    ApiValidator.validate(message)
+
+
+def run(function, message, seconds):
+    count = 0
+    start = time.perf_counter()
+    deadline = start + seconds
+    while time.perf_counter() < deadline:
+        try:
+            function(message)
+        except Exception:
+            pass
+        count += 1
+    return count / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--seconds', type=float, default=2.0, help='duration of each measurement')
+    parser.add_argument('--endpoints', type=int, default=20, help='endpoints in the Discover.Response')
+    args = parser.parse_args()
+
+    messages = [
+        ('Discover.Response', discover_response(args.endpoints)),
+        ('ChangeReport', change_report())
+    ]
+
+    start = time.perf_counter()
+    ApiValidator.get_validator()
+    print('first use (load, check and compile schema): {0:.1f} ms'.format((time.perf_counter() - start) * 1000))
+
+    for name, message in messages:
+        print('{0}: valid={1}'.format(name, ApiValidator.get_validator().is_valid(message)))
+        for label, function in (('uncached', uncached), ('cached', cached), ('compiled', compiled)):
+            print('  {0:<9} {1:>10.1f} validations/s'.format(label, run(function, message, args.seconds)))
+
+
+if __name__ == '__main__':
+    main()
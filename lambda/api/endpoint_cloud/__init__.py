@@ -1,5 +1,7 @@
 from .api_auth import ApiAuth
 from .api_handler import ApiHandler
+from .api_resources import ApiResources
 from .api_response import ApiResponse
 from .api_response_body import ApiResponseBody
+from .api_state_store import ApiStateStore
 from .api_utils import ApiUtils
\ No newline at end of file
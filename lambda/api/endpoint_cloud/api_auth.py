@@ -11,20 +11,38 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific
 # language governing permissions and limitations under the License.
 
-import http.client
+import json
+import os
 from urllib.parse import urlencode
 
+from .api_connection_pool import ApiConnectionPool
+from .api_profile_cache import ApiProfileCache
+
+LWA_URI = 'api.amazon.com'
+
+# Keep-alive connections to Login with Amazon, reused across warm invocations
+lwa_pool = ApiConnectionPool(
+    LWA_URI,
+    size=int(os.environ.get('lwa_pool_size', '2')),
+    timeout=int(os.environ.get('lwa_timeout', '10'))
+)
+
+# Profiles by access token hash, errors are remembered for profile_cache_negative_ttl seconds
+profile_cache = ApiProfileCache(
+    max_size=int(os.environ.get('profile_cache_size', '1024')),
+    ttl=int(os.environ.get('profile_cache_ttl', '3000')),
+    negative_ttl=int(os.environ.get('profile_cache_negative_ttl', '60'))
+)
+
 
 class ApiAuth:
 
     def post_to_api(self, payload):
-        connection = http.client.HTTPSConnection("api.amazon.com")
         headers = {
             'content-type': "application/x-www-form-urlencoded",
             'cache-control': "no-cache"
         }
-        connection.request('POST', '/auth/o2/token', urlencode(payload), headers)
-        return connection.getresponse()
+        return lwa_pool.request('POST', '/auth/o2/token', urlencode(payload), headers)
 
     def get_access_token(self, code, client_id, client_secret):
         payload = {
@@ -37,9 +55,24 @@ class ApiAuth:
 
     @staticmethod
     def get_user_id(access_token):
-        connection = http.client.HTTPSConnection('api.amazon.com')
-        connection.request('GET', '/user/profile?access_token=' + access_token)
-        return connection.getresponse()
+        return lwa_pool.request('GET', '/user/profile?access_token=' + access_token)
+
+    @staticmethod
+    def get_user_profile(access_token):
+        """
+        The Login with Amazon profile of an access token, cached per container
+        :param access_token: The access token as a string
+        :return: The profile as a dict with user_id, or with error and error_description
+        """
+        return profile_cache.get(access_token, ApiAuth.load_user_profile)
+
+    @staticmethod
+    def load_user_profile(access_token):
+        response = ApiAuth.get_user_id(access_token)
+        profile = json.loads(response.read().decode('utf-8'))
+        # A rejected token stays rejected, a server error may not
+        cacheable = response.getcode() < 500
+        return profile, cacheable
 
     def refresh_access_token(self, refresh_token, client_id, client_secret):
         payload = {
@@ -49,4 +82,3 @@ class ApiAuth:
             'client_secret': client_secret,
         }
         return self.post_to_api(payload)
-
@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2018 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Amazon Software License (the "License"). You may not use this file except in
+# compliance with the License. A copy of the License is located at
+#
+#    http://aws.amazon.com/asl/
+#
+# or in the "license" file accompanying this file. This file is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific
+# language governing permissions and limitations under the License.
+
+import http.client
+import select
+import threading
+import time
+
+from .api_log import ApiLog
+
+logger = ApiLog.get_logger('endpoint_cloud.api_connection_pool')
+
+# Errors raised when the server has closed a kept alive connection while it sat in the pool
+STALE_CONNECTION_ERRORS = (
+    ConnectionError,
+    http.client.BadStatusLine,
+    http.client.ImproperConnectionState
+)
+
+# Methods that may be sent again when the response was lost, repeating them has no further effect on the server
+IDEMPOTENT_METHODS = ('GET', 'HEAD', 'PUT', 'DELETE', 'OPTIONS', 'TRACE')
+
+
+class ApiPooledResponse:
+    """
+    A fully read HTTP response, the connection it came from is already back in the pool.
+
+    Offers the read() and getcode() methods of http.client.HTTPResponse that the handlers use.
+    """
+
+    def __init__(self, status, reason, headers, data):
+        self.status = status
+        self.reason = reason
+        self.headers = headers
+        self.data = data
+
+    def getcode(self):
+        return self.status
+
+    def read(self):
+        return self.data
+
+
+class ApiConnectionPool:
+    """
+    A thread safe pool of keep-alive HTTPS connections to a single host.
+
+    Kept at module level, the pool lives as long as the Lambda container so warm invocations skip the TCP and TLS
+    handshakes. A connection the server has closed while it was idle is replaced before it is used. If a reused
+    connection still fails, the request is only sent once more when the server cannot have received it, or when the
+    method is idempotent or the caller allows the retry.
+    """
+
+    def __init__(self, host, size=4, timeout=10, max_idle=50, connection_class=http.client.HTTPSConnection, **kwargs):
+        self.host = host
+        self.size = size
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self.connection_class = connection_class
+        self.connection_kwargs = kwargs
+
+        # Number of connections opened, each one is a full handshake
+        self.connections_created = 0
+
+        self._idle = []
+        self._lock = threading.Lock()
+
+    def _new_connection(self):
+        with self._lock:
+            self.connections_created += 1
+        return self.connection_class(self.host, timeout=self.timeout, **self.connection_kwargs)
+
+    @staticmethod
+    def _is_closed(connection):
+        # An idle keep-alive connection has nothing to read, unless the server has closed it
+        if connection.sock is None:
+            return False
+        readable, _, _ = select.select([connection.sock], [], [], 0)
+        return bool(readable)
+
+    def _get_connection(self):
+        now = time.monotonic()
+        with self._lock:
+            idle = None
+            while self._idle:
+                connection, last_used = self._idle.pop()
+                # Idle for longer than the server is likely to keep it open
+                if now - last_used < self.max_idle:
+                    idle = connection
+                    break
+                connection.close()
+        if idle is not None:
+            if not self._is_closed(idle):
+                return idle, True
+            idle.close()
+        return self._new_connection(), False
+
+    def _put_connection(self, connection):
+        with self._lock:
+            if len(self._idle) < self.size:
+                self._idle.append((connection, time.monotonic()))
+                return
+        connection.close()
+
+    def _reconnect(self, connection):
+        logger.debug('request: Reconnecting stale connection to %s', self.host)
+        connection.close()
+        return self._new_connection()
+
+    def request(self, method, url, body=None, headers=None, retry=None):
+        """
+        Send a request over a pooled connection
+        :param method: The HTTP method as a string
+        :param url: The path of the request as a string
+        :param body: The request body
+        :param headers: A dict of request headers
+        :param retry: Whether the request may be sent again when a reused connection broke before the response
+        arrived, by default only for idempotent methods
+        :return: ApiPooledResponse
+        """
+        headers = headers or {}
+        if retry is None:
+            retry = method in IDEMPOTENT_METHODS
+        connection, reused = self._get_connection()
+        try:
+            try:
+                connection.request(method, url, body, headers)
+            except STALE_CONNECTION_ERRORS:
+                # Writing failed, so the server has not seen a complete request
+                if not reused:
+                    raise
+                connection = self._reconnect(connection)
+                reused = False
+                connection.request(method, url, body, headers)
+
+            try:
+                response = connection.getresponse()
+            except STALE_CONNECTION_ERRORS:
+                # The server may have processed the request before the connection broke
+                if not (reused and retry):
+                    raise
+                connection = self._reconnect(connection)
+                connection.request(method, url, body, headers)
+                response = connection.getresponse()
+            data = response.read()
+        except Exception:
+            connection.close()
+            raise
+
+        if response.will_close:
+            connection.close()
+        else:
+            self._put_connection(connection)
+
+        return ApiPooledResponse(response.status, response.reason, response.getheaders(), data)
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for connection, _ in idle:
+            connection.close()
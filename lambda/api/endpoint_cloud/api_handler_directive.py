@@ -14,21 +14,24 @@
 import json
 from datetime import datetime, timedelta
 
-import boto3
 from botocore.exceptions import ClientError
 
 from alexa.skills.smarthome import AlexaResponse
-from jsonschema import validate, SchemaError, ValidationError
 from .api_auth import ApiAuth
 from .api_handler_endpoint import ApiHandlerEndpoint
+from .api_handler_event import state_store, token_cache
+from .api_log import ApiLog, LazyJson
+from .api_resources import ApiResources
+from .api_validator import ApiValidator
 
-dynamodb_aws = boto3.client('dynamodb')
-
+# Values reported for properties that never had a ChangeReport
 DEFAULT_VAL = {
     'Alexa.ContactSensor': 'NOT_DETECTED',
     'Alexa.EndpointHealth': 'OK'
 }
 
+logger = ApiLog.get_logger('endpoint_cloud.api_handler_directive')
+
 class ApiHandlerDirective:
 
     @staticmethod
@@ -37,16 +40,13 @@ class ApiHandlerDirective:
             value = value['S']
         return value
 
-    def process(self, request, client_id, client_secret):
-        print('LOG api_handler_directive.process -----')
-        # print(json.dumps(request))
+    def process(self, json_object, client_id, client_secret):
+        logger.debug('process -----')
 
         response = None
         # Process an Alexa directive and route to the right namespace
         # Only process if there is an actual body to process otherwise return an ErrorResponse
-        json_body = request['body']
-        if json_body:
-            json_object = json.loads(json_body)
+        if json_object:
             namespace = json_object['directive']['header']['namespace']
 
             if namespace == "Alexa":
@@ -56,32 +56,35 @@ class ApiHandlerDirective:
                 endpoint_id = json_object['directive']['endpoint']['endpointId']
 
                 if name == 'ReportState':
-                    # Get the User ID from the access_token
-                    response_user_id = json.loads(ApiAuth.get_user_id(token).read().decode('utf-8'))
-                    result = dynamodb_aws.get_item(TableName='APISensorEndpointDetails', Key={'EndpointId': {'S': endpoint_id}})
-                    capabilities_string = self.get_db_value(result['Item']['Capabilities'])
-                    capabilities = json.loads(capabilities_string)
-                    props=[]
-                    for c in capabilities:
-                        if not 'properties' in c:
-                            continue
-                        retrievable = c['properties'].get('retrievable', False)
-                        if retrievable:
-                            props.append(c)
-                        
-                    
-                    print('Sending StateReport for', response_user_id, 'on endpoint', endpoint_id)
+                    # Both lookups are served from the container cache when warm
+                    props = state_store.get_retrievable_properties(endpoint_id)
+                    if props is None:
+                        alexa_error_response = AlexaResponse(name='ErrorResponse', endpoint_id=endpoint_id, correlation_token=correlation_token, token=token)
+                        alexa_error_response.set_payload({'type': 'NO_SUCH_ENDPOINT', 'message': 'Unknown endpoint'})
+                        return alexa_error_response.get()
+                    state = state_store.get_state(endpoint_id)
+
+                    logger.info('Sending StateReport on endpoint %s', endpoint_id)
                     statereport_response = AlexaResponse(
-                        name='StateReport', 
-                        endpoint_id=endpoint_id, 
-                        correlation_token=correlation_token, 
+                        name='StateReport',
+                        endpoint_id=endpoint_id,
+                        correlation_token=correlation_token,
                         token=token)
-                    
+
                     for p in props:
-                        statereport_response.add_context_property(
-                            namespace=p['interface'],
-                            name=p['properties']['supported'][0]['name'], 
-                            value=DEFAULT_VAL[p['interface']])
+                        stored = state.get(state_store.get_property_key(p['namespace'], p['name'], p['instance']))
+                        if stored is None:
+                            if p['namespace'] not in DEFAULT_VAL:
+                                continue
+                            context_property = AlexaResponse.create_context_property(
+                                namespace=p['namespace'], name=p['name'], value=DEFAULT_VAL[p['namespace']])
+                        else:
+                            context_property = AlexaResponse.create_context_property(
+                                namespace=p['namespace'], name=p['name'], value=stored['value'])
+                            context_property['timeOfSample'] = stored['timeOfSample']
+                        if p['instance']:
+                            context_property['instance'] = p['instance']
+                        statereport_response.context_properties.append(context_property)
 
                     response = statereport_response.get()
 
@@ -100,21 +103,21 @@ class ApiHandlerDirective:
                     }
                 else:
                     # Get the User ID
-                    response_user_id = json.loads(ApiAuth.get_user_id(grantee_token).read().decode('utf-8'))
+                    response_user_id = ApiAuth.get_user_profile(grantee_token)
                     if 'error' in response_user_id:
-                        print('ERROR api_handler_directive.process.authorization.user_id:', response_user_id['error_description'])
+                        logger.error('process.authorization.user_id: %s', response_user_id['error_description'])
                         return AlexaResponse(name='ErrorResponse', payload={'type': 'INTERNAL_ERROR', 'message': response_user_id})
 
                     user_id = response_user_id['user_id']
-                    print('LOG api_handler_directive.process.authorization.user_id:', user_id)
+                    logger.info('process.authorization.user_id: %s', user_id)
 
                 # Get the Access and Refresh Tokens
                 api_auth = ApiAuth()
-                print('grant_code', grant_code, 'client_id', client_id, 'client_secret', client_secret)
+                logger.debug('process.authorization.client_id: %s', client_id)
                 response_token = api_auth.get_access_token(grant_code, client_id, client_secret)
                 response_token_string = response_token.read().decode('utf-8')
-                print('LOG api_handler_directive.process.authorization.response_token_string:', response_token_string)
                 response_object = json.loads(response_token_string)
+                logger.debug('process.authorization.response_object: %s', LazyJson(response_object))
 
                 if 'error' in response_object:
                     return AlexaResponse(name='ErrorResponse', payload={'type': 'INTERNAL_ERROR', 'response_object': response_object})
@@ -129,7 +132,7 @@ class ApiHandlerDirective:
                 expiration_utc = datetime.utcnow() + timedelta(seconds=(int(expires_in) - 5))
 
                 # Store the User Information - This is useful for inspection during development
-                table = boto3.resource('dynamodb').Table('APISensorUsers')
+                table = ApiResources.get_users_table()
                 result = table.put_item(
                     Item={
                         'UserId': user_id,
@@ -144,13 +147,16 @@ class ApiHandlerDirective:
                     }
                 )
 
+                # Forget a cached token from an earlier grant
+                token_cache.invalidate(user_id)
+
                 if result['ResponseMetadata']['HTTPStatusCode'] == 200:
-                    print('LOG api_handler_directive.process.authorization.SampleUsers.put_item:', result)
+                    logger.debug('process.authorization.APISensorUsers.put_item: %s', LazyJson(result))
                     alexa_accept_grant_response = AlexaResponse(namespace='Alexa.Authorization', name='AcceptGrant.Response')
                     response = alexa_accept_grant_response.get()
                 else:
                     error_message = 'Error creating User'
-                    print('ERR api_handler_directive.process.authorization', error_message)
+                    logger.error('process.authorization: %s', error_message)
                     alexa_error_response = AlexaResponse(name='ErrorResponse')
                     alexa_error_response.set_payload({'type': 'INTERNAL_ERROR', 'message': error_message})
                     response = alexa_error_response.get()
@@ -161,27 +167,22 @@ class ApiHandlerDirective:
 
                 # Spot the default from the Alexa.Discovery sample. Use as a default for development.
                 if access_token == 'access-token-from-skill':
-                    print('WARN api_handler_directive.process.discovery.user_id: Using development user_id of 0')
+                    logger.warning('process.discovery.user_id: Using development user_id of 0')
                     user_id = "0"  # <- Useful for development
                 else:
-                    response_user_id = json.loads(ApiAuth.get_user_id(access_token).read().decode('utf-8'))
+                    response_user_id = ApiAuth.get_user_profile(access_token)
                     if 'error' in response_user_id:
-                        print('ERROR api_handler_directive.process.discovery.user_id: ' + response_user_id['error_description'])
+                        logger.error('process.discovery.user_id: %s', response_user_id['error_description'])
                     user_id = response_user_id['user_id']
-                    print('LOG api_handler_directive.process.discovery.user_id:', user_id)
+                    logger.info('process.discovery.user_id: %s', user_id)
 
                 adr = AlexaResponse(namespace='Alexa.Discovery', name='Discover.Response')
 
-                # Get the list of endpoints associated with the user
-                table = boto3.resource('dynamodb').Table('APISensorEndpointDetails')
-                result = table.scan(
-                    FilterExpression=boto3.dynamodb.conditions.Attr('UserId').eq(user_id)
-                )
-
-                for endpoint_details in result['Items']:
+                # Get the list of endpoints associated with the user, page by page
+                for endpoint_details in ApiHandlerEndpoint.query_user_endpoints(user_id):
 
                     # We have an endpoint 
-                    print('LOG api_handler_directive.process.discovery: Found:', endpoint_details['EndpointId'], 'for user:', user_id)
+                    logger.debug('process.discovery: Found: %s for user: %s', endpoint_details['EndpointId'], user_id)
 
                     adr.add_payload_endpoint(
                         friendly_name=endpoint_details['FriendlyName'],
@@ -204,23 +205,7 @@ class ApiHandlerDirective:
             alexa_error_response.set_payload({'type': 'INTERNAL_ERROR', 'message': 'Empty Response: No response processed. Unhandled Directive.'})
             response = alexa_error_response.get()
 
-        print('LOG api_handler_directive.process.response -----')
-        print(json.dumps(response))
+        ApiValidator.check(response)
+        logger.debug('process.response: %s', LazyJson(response))
         return response
 
-
-def validate_response(response):
-    valid = False
-    try:
-        with open('alexa_smart_home_message_schema.json', 'r') as schema_file:
-            json_schema = json.load(schema_file)
-            validate(response, json_schema)
-        valid = True
-    except SchemaError as se:
-        print('LOG api_handler_directive.validate_response: Invalid Schema')
-        print(se.context)
-    except ValidationError as ve:
-        print('LOG api_handler_directive.validate_response: Invalid Content')
-        print(ve.context)
-
-    return valid
@@ -13,15 +13,16 @@
 
 import json
 import os
+from concurrent.futures import ThreadPoolExecutor
 
-import boto3
-from botocore.exceptions import ClientError
+from boto3.dynamodb.conditions import Attr, Key
+from botocore.exceptions import BotoCoreError, ClientError
 
-from endpoint_cloud.api_handler_event import ApiHandlerEvent
+from endpoint_cloud.api_handler_event import ApiHandlerEvent, EVENT_BATCH_CONCURRENCY, state_store
+from .api_log import ApiLog, LazyJson
+from .api_resources import ApiResources, ENDPOINT_DETAILS_TABLE, ENDPOINT_STATE_TABLE, USER_ID_INDEX
 from .api_utils import ApiUtils
 
-dynamodb_aws = boto3.client('dynamodb')
-
 DEFAULT_CAPABILITIES = [
     {
         "type": "AlexaInterface",
@@ -53,6 +54,11 @@ DEFAULT_CAPABILITIES = [
     }
 ]
 
+logger = ApiLog.get_logger('endpoint_cloud.api_handler_endpoint')
+
+# Largest page returned by GET /endpoints
+MAX_PAGE_SIZE = 500
+
 
 class ApiHandlerEndpoint:
     class EndpointDetails:
@@ -66,14 +72,15 @@ class ApiHandlerEndpoint:
             self.user_id = '0'
 
         def dump(self):
-            print('EndpointDetails -----')
-            print('capabilities:', self.capabilities)
-            print('description:', self.description)
-            print('display_categories:', self.display_categories)
-            print('friendly_name:', self.friendly_name)
-            print('id:', self.id)
-            print('manufacturer_name:', self.manufacturer_name)
-            print('user_id:', self.user_id)
+            return {
+                'capabilities': self.capabilities,
+                'description': self.description,
+                'display_categories': self.display_categories,
+                'friendly_name': self.friendly_name,
+                'id': self.id,
+                'manufacturer_name': self.manufacturer_name,
+                'user_id': self.user_id
+            }
 
     @staticmethod
     def get_db_value(value):
@@ -81,42 +88,18 @@ class ApiHandlerEndpoint:
             value = value['S']
         return value
 
-    def create(self, request):
-        try:
-            endpoint_details = self.EndpointDetails()
-
-            # Map our incoming API body to a thing that will virtually represent a discoverable device for Alexa
-            json_object = json.loads(request['body'])
-            endpoint = json_object['event']['endpoint']
-            if 'userId' in endpoint:
-                endpoint_details.user_id = endpoint['userId']
-            else:
-                endpoint_details.user_id = os.environ.get('user_id', None)
-
-            if 'capabilities' in endpoint:
-                endpoint_details.capabilities = endpoint['capabilities']
-            else:
-                endpoint_details.capabilities = DEFAULT_CAPABILITIES
-
-            if 'friendlyName' in endpoint:
-                endpoint_details.friendly_name = endpoint['friendlyName']
+    def create(self, json_object):
+        # Many endpoints are provisioned at once as {'endpoints': [endpoint, ...]}
+        if 'endpoints' in json_object:
+            return self.create_batch(json_object['endpoints'])
 
-            if 'manufacturerName' in endpoint:
-                endpoint_details.manufacturer_name = endpoint['manufacturerName']
-
-            if 'description' in endpoint:
-                endpoint_details.description = endpoint['description']
-
-            if 'displayCategories' in endpoint:
-                endpoint_details.display_categories = endpoint['displayCategories']
+        try:
+            endpoint_details = self.get_endpoint_details(json_object['event']['endpoint'])
 
-            if 'endpointId' in endpoint:
-                endpoint_details.id = endpoint['endpointId']
-                
             # Create the thing details in DynamoDb
             response = self.create_endpoint_details(endpoint_details)
             if not ApiUtils.check_response(response):
-                print('ERR api_handler_endpoint.create.create_endpoint_details.response', response)
+                logger.error('create.create_endpoint_details.response: %s', response)
 
             # Send an Event that updates Alexa
             return self.update_alexa(endpoint_details)
@@ -124,6 +107,141 @@ class ApiHandlerEndpoint:
         except KeyError as key_error:
             return "KeyError: " + str(key_error)
 
+    def create_batch(self, endpoints):
+        """
+        Create many endpoints with BatchWriteItem and one grouped AddOrUpdateReport per user
+        :param endpoints: A list of endpoints as in the body of a single create
+        :return: A list with one result per endpoint, in the order of the request
+        """
+        results = [None] * len(endpoints)
+        details = {}
+        for index, endpoint in enumerate(endpoints):
+            if not isinstance(endpoint, dict):
+                results[index] = {'result': 'ERR', 'message': 'Invalid endpoint: expected an object'}
+                continue
+            try:
+                details[index] = self.get_endpoint_details(endpoint)
+            except (KeyError, TypeError) as error:
+                results[index] = {'result': 'ERR', 'message': 'Invalid endpoint: ' + str(error)}
+
+        # A later endpoint with the same id wins, like it would with one create per endpoint
+        latest = {endpoint_details.id: index for index, endpoint_details in details.items()}
+        for index, endpoint_details in details.items():
+            if latest[endpoint_details.id] != index:
+                results[index] = {'endpointId': endpoint_details.id, 'result': 'ERR', 'message': 'Replaced by a later endpoint with the same endpointId'}
+        details = {index: details[index] for index in latest.values()}
+
+        requests = [
+            {'PutRequest': {'Item': self.get_endpoint_details_item(endpoint_details)}}
+            for endpoint_details in details.values()
+        ]
+        unprocessed = ApiResources.batch_write(ENDPOINT_DETAILS_TABLE, requests)
+        unprocessed_ids = set(request['PutRequest']['Item']['EndpointId'] for request in unprocessed)
+        for endpoint_details in details.values():
+            state_store.invalidate(endpoint_details.id)
+        logger.info('create_batch: Stored %d of %d endpoints', len(requests) - len(unprocessed), len(requests))
+
+        # Group the stored endpoints by user for the reports
+        user_endpoints = {}
+        for index, endpoint_details in details.items():
+            if endpoint_details.id in unprocessed_ids:
+                results[index] = {'endpointId': endpoint_details.id, 'result': 'ERR', 'message': 'Not stored, retry later'}
+            else:
+                user_endpoints.setdefault(endpoint_details.user_id, []).append(self.get_report_endpoint(endpoint_details))
+
+        api_handler_event = ApiHandlerEvent()
+        report_results = {}
+        with ThreadPoolExecutor(max_workers=EVENT_BATCH_CONCURRENCY) as executor:
+            futures = [
+                (user_id, report_endpoints, executor.submit(
+                    api_handler_event.send_discovery_reports, 'AddOrUpdateReport', user_id, report_endpoints))
+                for user_id, report_endpoints in user_endpoints.items()
+            ]
+            for user_id, report_endpoints, future in futures:
+                for report in self.get_report_results(user_id, report_endpoints, future):
+                    for endpoint_id in report['endpointIds']:
+                        report_results[endpoint_id] = report
+
+        for index, endpoint_details in details.items():
+            if results[index] is not None:
+                continue
+            report = report_results[endpoint_details.id]
+            result = {'endpointId': endpoint_details.id, 'result': report['result']}
+            for key in ('statusCode', 'response', 'message'):
+                if key in report:
+                    result[key] = report[key]
+            results[index] = result
+
+        return results
+
+    @staticmethod
+    def get_report_results(user_id, endpoints, future):
+        try:
+            return future.result()
+        except Exception as error:
+            endpoint_ids = [endpoint['endpointId'] for endpoint in endpoints]
+            message = '{0}: {1}'.format(type(error).__name__, error)
+            return [{'userId': user_id, 'endpointIds': endpoint_ids, 'result': 'ERR', 'message': message}]
+
+    def get_endpoint_details(self, endpoint):
+        """
+        Map our incoming API body to a thing that will virtually represent a discoverable device for Alexa
+        :param endpoint: The endpoint of the request as a dict
+        :return: EndpointDetails
+        """
+        endpoint_details = self.EndpointDetails()
+        if 'userId' in endpoint:
+            endpoint_details.user_id = endpoint['userId']
+        else:
+            endpoint_details.user_id = os.environ.get('user_id', None)
+
+        if 'capabilities' in endpoint:
+            endpoint_details.capabilities = endpoint['capabilities']
+        else:
+            endpoint_details.capabilities = DEFAULT_CAPABILITIES
+
+        if 'friendlyName' in endpoint:
+            endpoint_details.friendly_name = endpoint['friendlyName']
+
+        if 'manufacturerName' in endpoint:
+            endpoint_details.manufacturer_name = endpoint['manufacturerName']
+
+        if 'description' in endpoint:
+            endpoint_details.description = endpoint['description']
+
+        if 'displayCategories' in endpoint:
+            endpoint_details.display_categories = endpoint['displayCategories']
+
+        if 'endpointId' in endpoint:
+            endpoint_details.id = endpoint['endpointId']
+
+        return endpoint_details
+
+    @staticmethod
+    def get_endpoint_details_item(endpoint_details):
+        # The item as create_endpoint_details stores it
+        return {
+            'EndpointId': endpoint_details.id,
+            'Capabilities': str(json.dumps(endpoint_details.capabilities)),
+            'Description': str(endpoint_details.description),
+            'DisplayCategories': str(json.dumps(endpoint_details.display_categories)),
+            'FriendlyName': str(endpoint_details.friendly_name),
+            'ManufacturerName': str(endpoint_details.manufacturer_name),
+            'UserId': str(endpoint_details.user_id)
+        }
+
+    @staticmethod
+    def get_report_endpoint(endpoint_details):
+        # The endpoint as it appears in the payload of an AddOrUpdateReport
+        return {
+            'endpointId': endpoint_details.id,
+            'friendlyName': endpoint_details.friendly_name,
+            'description': endpoint_details.description,
+            'manufacturerName': endpoint_details.manufacturer_name,
+            'displayCategories': endpoint_details.display_categories,
+            'capabilities': endpoint_details.capabilities
+        }
+
     @staticmethod
     def update_alexa(endpoint_details):
         # Send an Event that updates Alexa
@@ -139,19 +257,15 @@ class ApiHandlerEndpoint:
 
         # Package into an Endpoint Cloud Event
         event_request = {'event': {'type': 'AddOrUpdateReport', 'endpoint': endpoint}}
-        event_body = {'body': json.dumps(event_request)}
-        event = ApiHandlerEvent().create(event_body)
-        print(json.dumps(event, indent=2))
+        event = ApiHandlerEvent().create(event_request)
+        logger.debug('update_alexa.event: %s', event)
         return event
 
             
     @staticmethod
     def create_endpoint_details(endpoint_details):
-        print('LOG api_handler_endpoint.create_endpoint_details -----')
-        print('LOG api_handler_endpoint.create_endpoint_details.endpoint_details', endpoint_details.dump())
-        dynamodb_aws_resource = boto3.resource('dynamodb')
-        table = dynamodb_aws_resource.Table('APISensorEndpointDetails')
-        print('LOG api_handler_endpoint.create_endpoint_details Updating Item in APISensorEndpointDetails')
+        logger.debug('create_endpoint_details.endpoint_details: %s', LazyJson(endpoint_details.dump()))
+        table = ApiResources.get_endpoint_details_table()
         try:
             response = table.update_item(
                 Key={
@@ -174,17 +288,17 @@ class ApiHandlerEndpoint:
 
                 }
             )
-            print(json.dumps(response))
+            logger.debug('create_endpoint_details.update_item: %s', LazyJson(response))
+            state_store.invalidate(endpoint_details.id)
             return response
         except Exception as e:
-            print(e)
+            logger.error('create_endpoint_details: %s', e)
             return None
 
-    def delete(self, request):
+    def delete(self, json_object):
         try:
             response = {}
-            print(request)
-            json_object = json.loads(request['body'])
+            logger.debug('delete: %s', LazyJson(json_object))
             endpoint_ids = []
             delete_all_endpoints = False
             for endpoint_id in json_object:
@@ -195,8 +309,7 @@ class ApiHandlerEndpoint:
                 endpoint_ids.append(endpoint_id)
 
             if delete_all_endpoints is True:
-                self.delete_all()
-                response = {'message': 'Deleted all endpoints'}
+                response = self.delete_all()
 
             for endpoint_id in endpoint_ids:
                 self.delete_endpoint(endpoint_id)
@@ -207,12 +320,60 @@ class ApiHandlerEndpoint:
             return "KeyError: " + str(key_error)
 
     def delete_all(self):
-        table = boto3.resource('dynamodb').Table('APISensorEndpointDetails')
-        result = table.scan()
-        items = result['Items']
-        for item in items:
-            endpoint_id = item['EndpointId']
-            self.delete_endpoint(endpoint_id)
+        """
+        Delete every endpoint with BatchWriteItem and send one grouped DeleteReport per user
+        :return: A summary of the deleted endpoints and the reports sent
+        """
+        table = ApiResources.get_endpoint_details_table()
+        scan = {'ProjectionExpression': 'EndpointId, UserId'}
+        user_endpoints = {}
+        while True:
+            result = table.scan(**scan)
+            for item in result['Items']:
+                user_endpoints.setdefault(item.get('UserId'), []).append(item['EndpointId'])
+            if 'LastEvaluatedKey' not in result:
+                break
+            scan['ExclusiveStartKey'] = result['LastEvaluatedKey']
+
+        requests = [
+            {'DeleteRequest': {'Key': {'EndpointId': endpoint_id}}}
+            for endpoint_ids in user_endpoints.values() for endpoint_id in endpoint_ids
+        ]
+        unprocessed = ApiResources.batch_write(ENDPOINT_DETAILS_TABLE, requests)
+        unprocessed_ids = set(request['DeleteRequest']['Key']['EndpointId'] for request in unprocessed)
+        logger.info('delete_all: Deleted %d of %d endpoints', len(requests) - len(unprocessed), len(requests))
+
+        # The reported states go with the endpoints, a failure leaves stale states but not the endpoints
+        try:
+            state_unprocessed = ApiResources.batch_write(ENDPOINT_STATE_TABLE, requests)
+            if state_unprocessed:
+                logger.warning('delete_all: %d endpoint states not deleted', len(state_unprocessed))
+        except (BotoCoreError, ClientError) as error:
+            logger.error('delete_all: Deleting the endpoint states failed: %s', error)
+        state_store.invalidate()
+
+        # Only report the endpoints that are gone from the table, one user at a time in parallel
+        api_handler_event = ApiHandlerEvent()
+        reports = []
+        with ThreadPoolExecutor(max_workers=EVENT_BATCH_CONCURRENCY) as executor:
+            futures = []
+            for user_id, endpoint_ids in user_endpoints.items():
+                endpoints = [{'endpointId': endpoint_id} for endpoint_id in endpoint_ids if endpoint_id not in unprocessed_ids]
+                if user_id is None or not endpoints:
+                    continue
+                futures.append((user_id, endpoints, executor.submit(
+                    api_handler_event.send_discovery_reports, 'DeleteReport', user_id, endpoints)))
+
+            for user_id, endpoints, future in futures:
+                reports.extend(self.get_report_results(user_id, endpoints, future))
+
+        return {
+            'message': 'Deleted all endpoints',
+            'deleted': len(requests) - len(unprocessed),
+            'unprocessed': sorted(unprocessed_ids),
+            'users': len(user_endpoints),
+            'reports': reports
+        }
 
     # TODO Improve response handling
     # TODO Check Response
@@ -222,32 +383,97 @@ class ApiHandlerEndpoint:
     def delete_endpoint(endpoint_id):
 
         # Delete from DynamoDB
-        response = dynamodb_aws.delete_item(
-            TableName='APISensorEndpointDetails',
+        response = ApiResources.get_dynamodb_client().delete_item(
+            TableName=ENDPOINT_DETAILS_TABLE,
             Key={'EndpointId': {'S': endpoint_id}}
         )
+        try:
+            state_store.delete(endpoint_id)
+        except (BotoCoreError, ClientError) as error:
+            logger.error('delete_endpoint: Deleting the state of %s failed: %s', endpoint_id, error)
+            state_store.invalidate(endpoint_id)
 
         # Package into an Endpoint Cloud Event
         event_request = {'event': {'type': 'DeleteReport', 'endpoint': {'id': endpoint_id}}}
-        event_body = {'body': json.dumps(event_request)}
-        event = ApiHandlerEvent().create(event_body)
-        print(json.dumps(event, indent=2))
-
-        print('LOG api_handler_endpoint.delete_endpoint.dynamodb_aws.delete_item.response -----')
-        print(response)
+        event = ApiHandlerEvent().create(event_request)
+        logger.debug('delete_endpoint.event: %s', event)
+        logger.debug('delete_endpoint.delete_item: %s', LazyJson(response))
 
         return response
 
-    def read(self):
+    @staticmethod
+    def query_user_endpoints(user_id):
+        """
+        The endpoints of a user from the UserId index, following LastEvaluatedKey across pages
+        :param user_id: The UserId as a string
+        :return: A generator of endpoint items
+        """
+        table = ApiResources.get_endpoint_details_table()
+        query = {
+            'IndexName': USER_ID_INDEX,
+            'KeyConditionExpression': Key('UserId').eq(user_id)
+        }
+        while True:
+            result = table.query(**query)
+            for item in result['Items']:
+                yield item
+            if 'LastEvaluatedKey' not in result:
+                return
+            query['ExclusiveStartKey'] = result['LastEvaluatedKey']
+
+    def read(self, params=None):
+        """
+        List endpoints, optionally filtered, projected and paginated
+        :param params: The query string parameters as a dict:
+            limit: The page size, when given a page {'endpoints': [...], 'cursor': ...} is returned
+            cursor: The cursor of the previous page
+            userId: Only endpoints of this user, read from the UserId index
+            displayCategory: Only endpoints with this display category
+            attributes: A comma separated list of the attributes to return
+        :return: The page, or the list of all endpoints when no limit is given
+        """
+        params = params or {}
         try:
-            response = {}
-
-            table = boto3.resource('dynamodb').Table('APISensorEndpointDetails')
-            result = table.scan()
-            response = result['Items']
-
-            print('LOG api_handler_endpoint.read -----')
-            print(json.dumps(response))
+            query = {}
+            if 'userId' in params:
+                query['IndexName'] = USER_ID_INDEX
+                query['KeyConditionExpression'] = Key('UserId').eq(params['userId'])
+
+            if 'displayCategory' in params:
+                # DisplayCategories is stored as a JSON string, match the quoted category within it
+                query['FilterExpression'] = Attr('DisplayCategories').contains(json.dumps(params['displayCategory']))
+
+            if 'attributes' in params:
+                names = [name.strip() for name in params['attributes'].split(',') if name.strip()]
+                query['ProjectionExpression'] = ', '.join('#a{0}'.format(i) for i in range(len(names)))
+                query['ExpressionAttributeNames'] = {'#a{0}'.format(i): name for i, name in enumerate(names)}
+
+            table = ApiResources.get_endpoint_details_table()
+            read_page = table.query if 'IndexName' in query else table.scan
+
+            if 'limit' not in params:
+                # Without a limit walk all pages
+                response = []
+                while True:
+                    result = read_page(**query)
+                    response.extend(result['Items'])
+                    if 'LastEvaluatedKey' not in result:
+                        break
+                    query['ExclusiveStartKey'] = result['LastEvaluatedKey']
+
+                logger.debug('read: %d endpoints', len(response))
+                return response
+
+            query['Limit'] = max(1, min(int(params['limit']), MAX_PAGE_SIZE))
+            if params.get('cursor'):
+                query['ExclusiveStartKey'] = ApiUtils.decode_cursor(params['cursor'])
+
+            result = read_page(**query)
+            response = {'endpoints': result['Items']}
+            if 'LastEvaluatedKey' in result:
+                response['cursor'] = ApiUtils.encode_cursor(result['LastEvaluatedKey'])
+
+            logger.debug('read: %d endpoints', len(response['endpoints']))
             return response
 
         except KeyError as key_error:
@@ -255,16 +481,15 @@ class ApiHandlerEndpoint:
 
 
     # TODO Work in Progress: Update the Endpoint Details
-    def update(self, request):
+    def update(self, json_object):
         try:
             # Get the endpoint ID
-            json_object = json.loads(request['body'])
             new_endpoint = json_object['event']['endpoint']
             endpoint_id = new_endpoint['endpointId']
-            print('api_handler_endpoint.update.new_endpoint', json.dumps(new_endpoint))
+            logger.debug('update.new_endpoint: %s', LazyJson(new_endpoint))
             # Get the endpoint from DDB
-            result = dynamodb_aws.get_item(TableName='APISensorEndpointDetails', Key={'EndpointId': {'S': endpoint_id}})
-            print('api_handler_endpoint.update.result', json.dumps(result))
+            result = ApiResources.get_dynamodb_client().get_item(TableName=ENDPOINT_DETAILS_TABLE, Key={'EndpointId': {'S': endpoint_id}})
+            logger.debug('update.result: %s', LazyJson(result))
 
             endpoint_details = self.EndpointDetails()
 
@@ -284,7 +509,7 @@ class ApiHandlerEndpoint:
             # Update the endpoint details in DynamoDb
             response = self.create_endpoint_details(endpoint_details)
             if not ApiUtils.check_response(response):
-                print('ERR api_handler_endpoint.update.create_endpoint_details.response', response)
+                logger.error('update.create_endpoint_details.response: %s', response)
             
             # Send AddOrUpdateReport to Alexa Event Gateway
             return self.update_alexa(endpoint_details)
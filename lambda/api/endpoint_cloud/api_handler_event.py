@@ -11,127 +11,298 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific
 # language governing permissions and limitations under the License.
 
-import http.client
 import json
 import os
-from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
 
-import boto3
-from botocore.exceptions import ClientError
+from botocore.exceptions import BotoCoreError, ClientError
 
 from alexa.skills.smarthome import AlexaResponse
 from .api_auth import ApiAuth
+from .api_connection_pool import ApiConnectionPool
+from .api_log import ApiLog, LazyJson
+from .api_resources import ApiResources
+from .api_state_store import ApiStateStore
+from .api_token_cache import ApiTokenCache
+from .api_validator import ApiValidator
 
-dynamodb_aws = boto3.client('dynamodb')
+logger = ApiLog.get_logger('endpoint_cloud.api_handler_event')
+
+# TODO Map to correct endpoint for Europe: https://api.eu.amazonalexa.com/v3/events
+# TODO Map to correct endpoint for Far East: https://api.fe.amazonalexa.com/v3/events
+ALEXA_EVENT_GATEWAY_URI = 'api.eu.amazonalexa.com'
+
+# Keep-alive connections to the Alexa Event Gateway, reused across warm invocations
+event_gateway_pool = ApiConnectionPool(
+    ALEXA_EVENT_GATEWAY_URI,
+    size=int(os.environ.get('event_gateway_pool_size', '4')),
+    timeout=int(os.environ.get('event_gateway_timeout', '10'))
+)
+
+# Access tokens by UserId, refreshed token_refresh_ahead seconds before they expire
+token_cache = ApiTokenCache(refresh_ahead=int(os.environ.get('token_refresh_ahead', '300')))
+
+# Reported property values, cached for state_cache_ttl seconds and parsed capabilities for capabilities_cache_ttl
+state_store = ApiStateStore(
+    ttl=int(os.environ.get('state_cache_ttl', '5')),
+    capabilities_ttl=int(os.environ.get('capabilities_cache_ttl', '300'))
+)
+
+# Number of events of a batch that are sent to the Alexa Event Gateway at the same time
+EVENT_BATCH_CONCURRENCY = int(os.environ.get('event_batch_concurrency', '4'))
+
+# Most endpoints and serialised endpoint bytes carried by a single AddOrUpdateReport or DeleteReport
+MAX_REPORT_ENDPOINTS = 300
+MAX_REPORT_BYTES = int(os.environ.get('max_report_bytes', '240000'))
 
 
 class ApiHandlerEvent:
 
-    def create(self, request):
-        print('LOG event.create.request -----')
-        print(request)
+    def __init__(self, cache=None):
+        self.token_cache = token_cache if cache is None else cache
+
+    def create(self, json_object):
+        logger.debug('create.request: %s', LazyJson(json_object))
+
+        # A batch of events is sent as {'events': [event, ...]}
+        if 'events' in json_object:
+            return self.create_batch(json_object['events'])
 
         try:
-            json_object = json.loads(request['body'])
-
-            # Transpose the Endpoint Cloud Event into an Alexa Event Gateway Event
-
-            # Get the common information from the body of the request
-            event_type = json_object['event']['type']  # Expect AddOrUpdateReport, ChangeReport, DeleteReport
-            endpoint_id = json_object['event']['endpoint']['id']  # Expect a valid AWS IoT Thing Name
-            
-            if 'userId' in json_object['event']['endpoint']:
-                endpoint_user_id = json_object['event']['endpoint']['userId']
-            else:
-                endpoint_user_id = os.environ.get('user_id', None)
+            event = json_object['event']
+            endpoint_user_id = self.get_event_user_id(event)
+
             # Get the Access Token
             token = self.get_user_info(endpoint_user_id)
 
-            # Build a default response
-            response = AlexaResponse(name='ErrorResponse', message="No valid event type")
-
-            if event_type == 'AddOrUpdateReport':
-                # Get the additional information from the body of the request
-                endpoint_friendly_name = json_object['event']['endpoint']['friendlyName']  # Expect a valid string friendly name
-                endpoint_capabilities = json_object['event']['endpoint']['capabilities']  # Expect a valid AWS IoT Thing Name
-                endpoint_display_categories = json_object['event']['endpoint']['displayCategories']
-                endpoint_description = json_object['event']['endpoint']['description']
-                endpoint_manufacturer_name = json_object['event']['endpoint']['manufacturerName']
-
-                payload = {
-                    'endpoints': [
-                        {
-                            'endpointId': endpoint_id,
-                            'friendlyName': endpoint_friendly_name,
-                            'description': endpoint_description,
-                            'manufacturerName': endpoint_manufacturer_name,
-                            'displayCategories': endpoint_display_categories,
-                            'capabilities': endpoint_capabilities
-                        }],
-                    'scope': {
-                        'type': 'BearerToken',
-                        'token': token
-                    }
-                }
+            response = self.process_event(event, endpoint_user_id, token)
+            if isinstance(response, AlexaResponse):
+                return response.get()
 
-                # Send an event to Alexa to add/update the endpoint
-                response = self.send_event('Alexa.Discovery', 'AddOrUpdateReport', endpoint_id, token, payload)
+            result = response.read().decode('utf-8')
+            logger.debug('create.result: %s', result)
+            return result
+
+        except KeyError as key_error:
+            return "KeyError: " + str(key_error)
 
-            if event_type == 'ChangeReport':
+    def create_batch(self, events):
+        """
+        Send many events, looking up the access token once per user and sending with bounded concurrency
+        :param events: A list of Endpoint Cloud Events
+        :return: A list with one result per event, in the order of the request
+        """
+        results = [None] * len(events)
+
+        # Group the events by user
+        user_events = {}
+        for index, event in enumerate(events):
+            try:
+                user_events.setdefault(self.get_event_user_id(event), []).append(index)
+            except (KeyError, TypeError) as error:
+                results[index] = {'result': 'ERR', 'message': 'Invalid event: ' + str(error)}
+
+        with ThreadPoolExecutor(max_workers=EVENT_BATCH_CONCURRENCY) as executor:
+            futures = []
+            for endpoint_user_id, indexes in user_events.items():
+                # A failed token lookup, from DynamoDB or Login with Amazon, only fails the events of its user
                 try:
-                    state = json_object['event']['endpoint']['state']  # Expect a string, ex: powerState
-                    state_value = json_object['event']['endpoint']['value']  # Expect string or JSON
-                    namespace = json_object['event']['endpoint']['namespace']
-                    instance = json_object['event']['endpoint'].get('instance', None)
-                    if instance:
-                        state = instance+'.'+state
-                        prop = AlexaResponse.create_context_property(instance=instance, namespace=namespace, name=state, value=state_value)
-                    else:
-                        prop = AlexaResponse.create_context_property(namespace=namespace, name=state, value=state_value)
-
-                    # Update Alexa with an Event Update
-                    if endpoint_user_id == '0':
-                        print('LOG Event: Not sent for user_id of 0')
-                    else:
-                        payload = {
-                            'change': {
-                                'cause': {
-                                    'type': 'PHYSICAL_INTERACTION'
-                                },
-                                "properties": [
-                                    prop
-                                ]
-                            }
-                        }
-                        print('LOG Event: Sending event')
-                        response = self.send_event('Alexa', 'ChangeReport', endpoint_id, token, payload)
-
-                except ClientError as e:
-                    alexa_response = AlexaResponse(name='ErrorResponse', message=e, payload={'type': 'INTERNAL_ERROR', 'message': e})
-                    return alexa_response.get()
-
-            if event_type == 'DeleteReport':
-                # Send an event to Alexa to delete the endpoint
-                payload = {
-                    'endpoints': [
-                        {
-                            'endpointId': endpoint_id
+                    token = self.get_user_info(endpoint_user_id)
+                except Exception as error:
+                    message = 'Access token unavailable: {0}: {1}'.format(type(error).__name__, error)
+                    token = None
+                else:
+                    message = 'No access token for user'
+                if token is None:
+                    for index in indexes:
+                        endpoint_id = events[index]['endpoint'].get('id')
+                        results[index] = {'endpointId': endpoint_id, 'result': 'ERR', 'message': message}
+                    continue
+
+                for index in indexes:
+                    future = executor.submit(self.process_event, events[index], endpoint_user_id, token)
+                    futures.append((index, future))
+
+            for index, future in futures:
+                results[index] = self.get_batch_result(events[index], future)
+
+        logger.info('create_batch: %d events for %d users', len(events), len(user_events))
+        return results
+
+    @staticmethod
+    def get_batch_result(event, future):
+        result = {'endpointId': event['endpoint'].get('id')}
+        try:
+            response = future.result()
+        except Exception as error:
+            result['result'] = 'ERR'
+            result['message'] = '{0}: {1}'.format(type(error).__name__, error)
+            return result
+
+        if isinstance(response, AlexaResponse):
+            result['result'] = 'ERR'
+            result['response'] = response.get()
+        else:
+            result['result'] = 'OK' if response.getcode() < 300 else 'ERR'
+            result['statusCode'] = response.getcode()
+            result['response'] = response.read().decode('utf-8')
+        return result
+
+    @staticmethod
+    def get_event_user_id(event):
+        if 'userId' in event['endpoint']:
+            return event['endpoint']['userId']
+        return os.environ.get('user_id', None)
+
+    def process_event(self, event, endpoint_user_id, token):
+        """
+        Transpose an Endpoint Cloud Event into an Alexa Event Gateway Event and send it
+        :param event: The event as a dict, with a type of AddOrUpdateReport, ChangeReport or DeleteReport
+        :param endpoint_user_id: The user owning the endpoint
+        :param token: The access token of the user
+        :return: The response of the Alexa Event Gateway or an AlexaResponse if nothing was sent
+        """
+
+        # Get the common information from the body of the request
+        event_type = event['type']  # Expect AddOrUpdateReport, ChangeReport, DeleteReport
+        endpoint_id = event['endpoint']['id']  # Expect a valid AWS IoT Thing Name
+
+        # Build a default response
+        response = AlexaResponse(name='ErrorResponse', message="No valid event type")
+
+        if event_type == 'AddOrUpdateReport':
+            # Get the additional information from the body of the request
+            endpoint_friendly_name = event['endpoint']['friendlyName']  # Expect a valid string friendly name
+            endpoint_capabilities = event['endpoint']['capabilities']  # Expect a valid AWS IoT Thing Name
+            endpoint_display_categories = event['endpoint']['displayCategories']
+            endpoint_description = event['endpoint']['description']
+            endpoint_manufacturer_name = event['endpoint']['manufacturerName']
+
+            payload = {
+                'endpoints': [
+                    {
+                        'endpointId': endpoint_id,
+                        'friendlyName': endpoint_friendly_name,
+                        'description': endpoint_description,
+                        'manufacturerName': endpoint_manufacturer_name,
+                        'displayCategories': endpoint_display_categories,
+                        'capabilities': endpoint_capabilities
+                    }],
+                'scope': {
+                    'type': 'BearerToken',
+                    'token': token
+                }
+            }
+
+            # Send an event to Alexa to add/update the endpoint
+            response = self.send_event('Alexa.Discovery', 'AddOrUpdateReport', endpoint_id, token, payload)
+
+        if event_type == 'ChangeReport':
+            try:
+                state = event['endpoint']['state']  # Expect a string, ex: powerState
+                state_value = event['endpoint']['value']  # Expect string or JSON
+                namespace = event['endpoint']['namespace']
+                instance = event['endpoint'].get('instance', None)
+
+                if instance:
+                    state = instance+'.'+state
+                    prop = AlexaResponse.create_context_property(instance=instance, namespace=namespace, name=state, value=state_value)
+                else:
+                    prop = AlexaResponse.create_context_property(namespace=namespace, name=state, value=state_value)
+
+                # Update Alexa with an Event Update
+                if endpoint_user_id == '0':
+                    logger.info('process_event: Not sent for user_id of 0')
+                else:
+                    payload = {
+                        'change': {
+                            'cause': {
+                                'type': 'PHYSICAL_INTERACTION'
+                            },
+                            "properties": [
+                                prop
+                            ]
                         }
-                    ],
-                    "scope": {
-                        "type": "BearerToken",
-                        "token": token
                     }
+                    response = self.send_event('Alexa', 'ChangeReport', endpoint_id, token, payload)
+
+            except ClientError as e:
+                return AlexaResponse(name='ErrorResponse', message=e, payload={'type': 'INTERNAL_ERROR', 'message': str(e)})
+
+            # Remember the value for ReportState, a failing state table must not hold back the ChangeReport
+            try:
+                state_store.set_property(endpoint_id, namespace, event['endpoint']['state'], state_value, instance=instance)
+            except (BotoCoreError, ClientError) as error:
+                logger.error('process_event: Storing the state of %s failed: %s', endpoint_id, error)
+
+        if event_type == 'DeleteReport':
+            # Send an event to Alexa to delete the endpoint
+            payload = {
+                'endpoints': [
+                    {
+                        'endpointId': endpoint_id
+                    }
+                ],
+                "scope": {
+                    "type": "BearerToken",
+                    "token": token
                 }
-                response = self.send_event('Alexa.Discovery', 'DeleteReport', endpoint_id, token, payload)
+            }
+            response = self.send_event('Alexa.Discovery', 'DeleteReport', endpoint_id, token, payload)
 
-            result = response.read().decode('utf-8')
-            print('LOG event.create.result -----')
-            print(result)
-            return result
+        return response
 
-        except KeyError as key_error:
-            return "KeyError: " + str(key_error)
+    def send_discovery_reports(self, alexa_name, endpoint_user_id, endpoints):
+        """
+        Send the endpoints of one user in as few AddOrUpdateReport or DeleteReport events as possible
+        :param alexa_name: AddOrUpdateReport or DeleteReport
+        :param endpoint_user_id: The UserId owning the endpoints
+        :param endpoints: A list of endpoint dicts as expected in the payload of the report
+        :return: A list with one result per event sent
+        """
+        endpoint_ids = [endpoint['endpointId'] for endpoint in endpoints]
+        token = self.get_user_info(endpoint_user_id)
+        if token is None:
+            return [{'userId': endpoint_user_id, 'endpointIds': endpoint_ids, 'result': 'ERR', 'message': 'No access token for user'}]
+
+        results = []
+        for chunk in self.chunk_report_endpoints(endpoints):
+            payload = {
+                'endpoints': chunk,
+                'scope': {
+                    'type': 'BearerToken',
+                    'token': token
+                }
+            }
+            response = self.send_event('Alexa.Discovery', alexa_name, chunk[0]['endpointId'], token, payload)
+            results.append({
+                'userId': endpoint_user_id,
+                'endpointIds': [endpoint['endpointId'] for endpoint in chunk],
+                'result': 'OK' if response.getcode() < 300 else 'ERR',
+                'statusCode': response.getcode(),
+                'response': response.read().decode('utf-8')
+            })
+        return results
+
+    @staticmethod
+    def chunk_report_endpoints(endpoints):
+        """
+        Split endpoints into chunks that fit into one report by count and by serialised size
+        :param endpoints: A list of endpoint dicts
+        :return: A generator of lists of endpoint dicts
+        """
+        chunk = []
+        chunk_bytes = 0
+        for endpoint in endpoints:
+            endpoint_bytes = len(json.dumps(endpoint))
+            if chunk and (len(chunk) >= MAX_REPORT_ENDPOINTS or chunk_bytes + endpoint_bytes > MAX_REPORT_BYTES):
+                yield chunk
+                chunk = []
+                chunk_bytes = 0
+            chunk.append(endpoint)
+            chunk_bytes += endpoint_bytes
+        if chunk:
+            yield chunk
 
     # TODO Improve this with a database lookup
     @staticmethod
@@ -159,8 +330,15 @@ class ApiHandlerEvent:
         return sku_details
 
     def get_user_info(self, endpoint_user_id):
-        print('LOG event.create.get_user_info -----')
-        table = boto3.resource('dynamodb').Table('APISensorUsers')
+        """
+        The access token of a user, served from the container cache and refreshed ahead of its expiry
+        :param endpoint_user_id: The UserId as a string
+        :return: The access token as a string or None if the user is unknown
+        """
+        return self.token_cache.get(endpoint_user_id, self.load_access_token)
+
+    def load_access_token(self, endpoint_user_id):
+        table = ApiResources.get_users_table()
         result = table.get_item(
             Key={
                 'UserId': endpoint_user_id
@@ -176,93 +354,75 @@ class ApiHandlerEvent:
             ]
         )
 
-        if result['ResponseMetadata']['HTTPStatusCode'] == 200:
-            if 'Item' in result:
-                print('LOG event.create.get_user_info.APISensorUsers.get_item -----')
-                print(str(result['Item']))
-                if 'ExpirationUTC' in result['Item']:
-                    expiration_utc = result['Item']['ExpirationUTC']
-                    token_is_expired = self.is_token_expired(expiration_utc)
-                else:
-                    token_is_expired = True
-                print('LOG event.create.send_event.token_is_expired:', token_is_expired)
-                if token_is_expired:
-                    # The token has expired so get a new access token using the refresh token
-                    refresh_token = result['Item']['RefreshToken']
-                    client_id = result['Item']['ClientId']
-                    client_secret = result['Item']['ClientSecret']
-
-                    api_auth = ApiAuth()
-                    response_refresh_token = api_auth.refresh_access_token(refresh_token, client_id, client_secret)
-                    response_refresh_token_string = response_refresh_token.read().decode('utf-8')
-                    response_refresh_token_object = json.loads(response_refresh_token_string)
-
-                    # Store the new values from the refresh
-                    access_token = response_refresh_token_object['access_token']
-                    refresh_token = response_refresh_token_object['refresh_token']
-                    token_type = response_refresh_token_object['token_type']
-                    expires_in = response_refresh_token_object['expires_in']
-
-                    # Calculate expiration
-                    expiration_utc = datetime.utcnow() + timedelta(seconds=(int(expires_in) - 5))
-
-                    print('access_token', access_token)
-                    print('expiration_utc', expiration_utc)
-
-                    result = table.update_item(
-                        Key={
-                            'UserId': endpoint_user_id
-                        },
-                        UpdateExpression="set AccessToken=:a, RefreshToken=:r, TokenType=:t, ExpirationUTC=:e",
-                        ExpressionAttributeValues={
-                            ':a': access_token,
-                            ':r': refresh_token,
-                            ':t': token_type,
-                            ':e': expiration_utc.strftime("%Y-%m-%dT%H:%M:%S.00Z")
-                        },
-                        ReturnValues="UPDATED_NEW"
-                    )
-                    print('LOG event.create.send_event.SampleUsers.update_item:', str(result))
-
-                    # TODO Return an error here if the token could not be refreshed
-                else:
-                    # Use the stored access token
-                    access_token = result['Item']['AccessToken']
-                    print('LOG Using stored access_token:', access_token)
+        if result['ResponseMetadata']['HTTPStatusCode'] != 200 or 'Item' not in result:
+            return None, None
 
-                return access_token
+        logger.debug('load_access_token.APISensorUsers.get_item: %s', LazyJson(result['Item']))
+        if 'ExpirationUTC' in result['Item']:
+            expires_at = self.token_cache.parse_expiration(result['Item']['ExpirationUTC'])
+        else:
+            expires_at = None
 
-    @staticmethod
-    def is_token_expired(expiration_utc):
-        now = datetime.utcnow().replace(tzinfo=None)
-        then = datetime.strptime(expiration_utc, "%Y-%m-%dT%H:%M:%S.00Z")
-        is_expired = now > then
-        if is_expired:
-            return is_expired
-        seconds = (now - then).seconds
-        is_soon = seconds < 30  # Give a 30 second buffer for expiration
-        return is_soon
+        if not self.token_cache.needs_refresh(expires_at):
+            # Use the stored access token
+            return result['Item']['AccessToken'], expires_at
+
+        # The token has expired or is about to, so get a new access token using the refresh token
+        refresh_token = result['Item']['RefreshToken']
+        client_id = result['Item']['ClientId']
+        client_secret = result['Item']['ClientSecret']
+
+        api_auth = ApiAuth()
+        response_refresh_token = api_auth.refresh_access_token(refresh_token, client_id, client_secret)
+        response_refresh_token_string = response_refresh_token.read().decode('utf-8')
+        response_refresh_token_object = json.loads(response_refresh_token_string)
+
+        # Store the new values from the refresh
+        access_token = response_refresh_token_object['access_token']
+        refresh_token = response_refresh_token_object['refresh_token']
+        token_type = response_refresh_token_object['token_type']
+        expires_in = response_refresh_token_object['expires_in']
+
+        # Calculate expiration
+        expires_at = self.token_cache.clock() + int(expires_in) - 5
+        expiration_utc = self.token_cache.format_expiration(expires_at)
+
+        logger.info('load_access_token: Refreshed access token for %s, expires %s', endpoint_user_id, expiration_utc)
+
+        result = table.update_item(
+            Key={
+                'UserId': endpoint_user_id
+            },
+            UpdateExpression="set AccessToken=:a, RefreshToken=:r, TokenType=:t, ExpirationUTC=:e",
+            ExpressionAttributeValues={
+                ':a': access_token,
+                ':r': refresh_token,
+                ':t': token_type,
+                ':e': expiration_utc
+            },
+            ReturnValues="UPDATED_NEW"
+        )
+        logger.debug('load_access_token.APISensorUsers.update_item: %s', LazyJson(result))
+
+        # TODO Return an error here if the token could not be refreshed
+        return access_token, expires_at
 
     @staticmethod
     def send_event(alexa_namespace, alexa_name, endpoint_id, token, payload):
 
-        remove_endpoint = alexa_name is not "ChangeReport"
+        remove_endpoint = alexa_name != "ChangeReport"
         alexa_response = AlexaResponse(namespace=alexa_namespace, name=alexa_name, endpoint_id=endpoint_id, token=token, remove_endpoint=remove_endpoint)
         alexa_response.set_payload(payload)
-        payload = json.dumps(alexa_response.get())
-        print('LOG api_handler_event.send_event.payload:')
-        print(payload)
-
-        # TODO Map to correct endpoint for Europe: https://api.eu.amazonalexa.com/v3/events
-        # TODO Map to correct endpoint for Far East: https://api.fe.amazonalexa.com/v3/events
-        alexa_event_gateway_uri = 'api.eu.amazonalexa.com'
-        connection = http.client.HTTPSConnection(alexa_event_gateway_uri)
+        message = alexa_response.get()
+        ApiValidator.check(message)
+        payload = json.dumps(message)
+        logger.debug('send_event.payload: %s', LazyJson(payload))
+
         headers = {
             'Authorization': "Bearer " + token,
             'Content-Type': "application/json;charset=UTF-8",
             'Cache-Control': "no-cache"
         }
-        connection.request('POST', '/v3/events', payload, headers)
-        response = connection.getresponse()
-        print('LOG api_handler_event.send_event HTTP Status code: ' + str(response.getcode()))
+        response = event_gateway_pool.request('POST', '/v3/events', payload, headers)
+        logger.info('send_event: %s.%s for %s HTTP Status code: %s', alexa_namespace, alexa_name, endpoint_id, response.getcode())
         return response
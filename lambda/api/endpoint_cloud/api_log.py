@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2018 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Amazon Software License (the "License"). You may not use this file except in
+# compliance with the License. A copy of the License is located at
+#
+#    http://aws.amazon.com/asl/
+#
+# or in the "license" file accompanying this file. This file is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific
+# language governing permissions and limitations under the License.
+
+import json
+import logging
+import os
+import random
+
+# Keys whose values are never written to the logs
+REDACTED_KEYS = frozenset([
+    'access_token', 'accesstoken', 'authorization', 'client_secret', 'clientsecret', 'code', 'grantcode',
+    'granteetoken', 'refresh_token', 'refreshtoken', 'token', 'x-api-key'
+])
+REDACTED = '***'
+
+# Fraction of requests logged in full for high volume routes, all other routes are always logged
+SAMPLE_RATES = {
+    '/events': float(os.environ.get('log_sample_rate_events', '0.01'))
+}
+
+
+class LazyJson:
+    """
+    Defer the redaction and serialisation of a value until a log record is actually formatted.
+
+    Pass an instance as a logging argument, e.g. ``logger.debug('request %s', LazyJson(request))``, and nothing is
+    serialised unless the level is enabled.
+    """
+
+    __slots__ = ('value', 'kwargs')
+
+    def __init__(self, value, **kwargs):
+        self.value = value
+        self.kwargs = kwargs
+
+    def __str__(self):
+        value = self.value
+        if isinstance(value, (str, bytes)):
+            # A serialised body, decode it so the secrets inside can be redacted
+            try:
+                value = json.loads(value)
+            except ValueError:
+                return str(value)
+        return json.dumps(ApiLog.redact(value), default=str, **self.kwargs)
+
+
+class ApiLog:
+
+    _configured = False
+
+    @classmethod
+    def get_logger(cls, name):
+        """
+        A logger under the endpoint_cloud hierarchy, the level is read once from the log_level environment variable
+        :param name: The dotted name of the logger as a string
+        :return: logging.Logger
+        """
+        if not cls._configured:
+            root = logging.getLogger()
+            # The Lambda runtime installs its own handler, only add one when running elsewhere
+            if not root.handlers:
+                logging.basicConfig(format='%(levelname)s %(name)s %(message)s')
+            root.setLevel(os.environ.get('log_level', 'INFO').upper())
+            cls._configured = True
+        return logging.getLogger(name)
+
+    @staticmethod
+    def is_sampled(resource):
+        """
+        Whether a request to the resource should be logged in full
+        :param resource: The request path as a string
+        :return: bool
+        """
+        rate = SAMPLE_RATES.get(resource, 1.0)
+        return rate >= 1.0 or random.random() < rate
+
+    @classmethod
+    def redact(cls, value):
+        """
+        A copy of a JSON like value with the secrets replaced
+        :param value: dict, list or scalar
+        :return: The redacted copy
+        """
+        if isinstance(value, dict):
+            return {
+                k: REDACTED if isinstance(k, str) and k.lower() in REDACTED_KEYS else cls.redact(v)
+                for k, v in value.items()
+            }
+        if isinstance(value, (list, tuple)):
+            return [cls.redact(v) for v in value]
+        return value
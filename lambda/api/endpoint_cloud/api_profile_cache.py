@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2018 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Amazon Software License (the "License"). You may not use this file except in
+# compliance with the License. A copy of the License is located at
+#
+#    http://aws.amazon.com/asl/
+#
+# or in the "license" file accompanying this file. This file is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific
+# language governing permissions and limitations under the License.
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+
+class ApiProfileCache:
+    """
+    Bounded per container LRU cache of Login with Amazon profiles keyed by a hash of the access token.
+
+    Alexa sends the same bearer token with every directive until it expires, so the profile (and with it the user_id)
+    only has to be fetched once per token. Profiles are kept for ttl seconds, error responses for negative_ttl
+    seconds. Tokens are hashed so the cache never holds them in clear. The clock returns epoch seconds and can be
+    replaced to test the expiry handling.
+    """
+
+    def __init__(self, max_size=1024, ttl=3000, negative_ttl=60, clock=time.time):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.clock = clock
+
+        self.hits = 0
+        self.misses = 0
+
+        # Token hash -> (expires_at, profile)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def get_key(access_token):
+        return hashlib.sha256(access_token.encode('utf-8')).hexdigest()
+
+    def get(self, access_token, loader):
+        """
+        The cached profile of an access token, calling the loader on a miss
+        :param access_token: The access token as a string
+        :param loader: A callable taking the access token and returning (profile, cacheable)
+        :return: The profile as a dict, with an 'error' key if Login with Amazon rejected the token
+        """
+        key = self.get_key(access_token)
+        now = self.clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if now < entry[0]:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+                del self._entries[key]
+            self.misses += 1
+
+        profile, cacheable = loader(access_token)
+        if cacheable:
+            ttl = self.negative_ttl if 'error' in profile else self.ttl
+            with self._lock:
+                self._entries[key] = (self.clock() + ttl, profile)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_size:
+                    self._entries.popitem(last=False)
+        return profile
+
+    def invalidate(self, access_token):
+        with self._lock:
+            self._entries.pop(self.get_key(access_token), None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
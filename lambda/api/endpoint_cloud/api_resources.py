@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2018 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Amazon Software License (the "License"). You may not use this file except in
+# compliance with the License. A copy of the License is located at
+#
+#    http://aws.amazon.com/asl/
+#
+# or in the "license" file accompanying this file. This file is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific
+# language governing permissions and limitations under the License.
+
+import os
+import threading
+import time
+
+import boto3
+
+ENDPOINT_DETAILS_TABLE = 'APISensorEndpointDetails'
+USERS_TABLE = 'APISensorUsers'
+ENDPOINT_STATE_TABLE = 'APISensorEndpointState'
+
+# Global secondary index of APISensorEndpointDetails with UserId as partition key and all attributes projected
+USER_ID_INDEX = os.environ.get('user_id_index', 'UserId-index')
+
+# BatchWriteItem accepts at most 25 requests per call
+BATCH_WRITE_SIZE = 25
+BATCH_WRITE_RETRIES = 5
+
+
+class ApiResources:
+    """
+    Lazily created AWS resources that are kept alive for the lifetime of the Lambda container.
+
+    Module state survives between warm invocations, so the DynamoDB client, resource and table handles are only
+    built on the first request that needs them. The client is thread-safe and shared, but boto3 resources are not,
+    so every thread, like the workers of a batch, gets its own resource and table handles made from one session.
+    """
+
+    _lock = threading.Lock()
+    _session = None
+    _dynamodb_client = None
+    _local = threading.local()
+
+    @classmethod
+    def get_session(cls):
+        """
+        The boto3 session the resources are made from, only to be used while holding the lock
+        :return: boto3 Session
+        """
+        if cls._session is None:
+            cls._session = boto3.session.Session()
+        return cls._session
+
+    @classmethod
+    def get_dynamodb_client(cls):
+        """
+        The low level DynamoDB client
+        :return: botocore client
+        """
+        if cls._dynamodb_client is None:
+            with cls._lock:
+                if cls._dynamodb_client is None:
+                    cls._dynamodb_client = cls.get_session().client('dynamodb')
+        return cls._dynamodb_client
+
+    @classmethod
+    def get_dynamodb_resource(cls):
+        """
+        The DynamoDB service resource of the calling thread
+        :return: boto3 ServiceResource
+        """
+        resource = getattr(cls._local, 'dynamodb_resource', None)
+        if resource is None:
+            with cls._lock:
+                resource = cls.get_session().resource('dynamodb')
+            cls._local.dynamodb_resource = resource
+        return resource
+
+    @classmethod
+    def get_table(cls, table_name):
+        """
+        A DynamoDB Table resource of the calling thread
+        :param table_name: The name of the table as a string
+        :return: boto3 Table
+        """
+        tables = getattr(cls._local, 'tables', None)
+        if tables is None:
+            tables = cls._local.tables = {}
+        table = tables.get(table_name)
+        if table is None:
+            table = tables[table_name] = cls.get_dynamodb_resource().Table(table_name)
+        return table
+
+    @classmethod
+    def get_endpoint_details_table(cls):
+        return cls.get_table(ENDPOINT_DETAILS_TABLE)
+
+    @classmethod
+    def get_users_table(cls):
+        return cls.get_table(USERS_TABLE)
+
+    @classmethod
+    def get_endpoint_state_table(cls):
+        return cls.get_table(ENDPOINT_STATE_TABLE)
+
+    @classmethod
+    def batch_write(cls, table_name, requests):
+        """
+        Write with BatchWriteItem in chunks of 25, retrying unprocessed items with exponential backoff
+        :param table_name: The name of the table as a string
+        :param requests: A list of PutRequest or DeleteRequest dicts
+        :return: The list of requests that were still unprocessed after all retries
+        """
+        resource = cls.get_dynamodb_resource()
+        failed = []
+        for start in range(0, len(requests), BATCH_WRITE_SIZE):
+            pending = requests[start:start + BATCH_WRITE_SIZE]
+            for attempt in range(BATCH_WRITE_RETRIES + 1):
+                if attempt > 0:
+                    time.sleep(0.05 * 2 ** (attempt - 1))
+                result = resource.batch_write_item(RequestItems={table_name: pending})
+                pending = result.get('UnprocessedItems', {}).get(table_name, [])
+                if not pending:
+                    break
+            failed.extend(pending)
+        return failed
+
+    @classmethod
+    def reset(cls):
+        """
+        Drop all cached resources, the next access will create them again
+        """
+        with cls._lock:
+            cls._session = None
+            cls._dynamodb_client = None
+            cls._local = threading.local()
@@ -20,7 +20,7 @@ class ApiResponse:
         self.isBase64Encoded = kwargs.get('isBase64Encoded', False)
         self.statusCode = kwargs.get('statusCode', 200)
         self.headers = {}
-        self.body = ApiResponseBody()
+        self.body = kwargs.get('body', ApiResponseBody())
         self.response = {}
 
     def __repr__(self):
@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2018 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Amazon Software License (the "License"). You may not use this file except in
+# compliance with the License. A copy of the License is located at
+#
+#    http://aws.amazon.com/asl/
+#
+# or in the "license" file accompanying this file. This file is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific
+# language governing permissions and limitations under the License.
+
+import json
+import logging
+import time
+
+from .api_log import ApiLog, LazyJson
+from .api_response import ApiResponse
+from .api_response_body import ApiResponseBody
+
+logger = ApiLog.get_logger('endpoint_cloud.api_router')
+
+
+class ApiRouter:
+    """
+    Dispatch API Gateway requests through a route table keyed on (http method, path).
+
+    A middleware is a callable taking the request and the next handler in the chain and returning an ApiResponse.
+    The chain of every route is composed once when the route is added, so a dispatch is a single dictionary lookup.
+    """
+
+    def __init__(self, middleware=()):
+        self.middleware = list(middleware)
+        self.routes = {}
+        self.not_found = self.chain(self.handle_not_found, ())
+
+    def add_route(self, http_method, resource, handler, middleware=()):
+        self.routes[(http_method, resource)] = self.chain(handler, middleware)
+
+    def route(self, http_method, resource, middleware=()):
+        def decorator(handler):
+            self.add_route(http_method, resource, handler, middleware)
+            return handler
+        return decorator
+
+    def chain(self, handler, middleware):
+        # The global middleware wraps the route middleware, which wraps the handler
+        for layer in reversed(self.middleware + list(middleware)):
+            handler = self.wrap(layer, handler)
+        return handler
+
+    @staticmethod
+    def wrap(layer, next_handler):
+        def wrapped(request):
+            return layer(request, next_handler)
+        return wrapped
+
+    def dispatch(self, request):
+        handler = self.routes.get((request['httpMethod'], request['path']), self.not_found)
+        return handler(request)
+
+    @staticmethod
+    def handle_not_found(request):
+        logger.info('dispatch: no route for %s %s', request['httpMethod'], request['path'])
+        return ApiResponse(statusCode=400, body=ApiResponseBody(result="ERR", message='Path and http method do not match'))
+
+
+def cors_preflight(request, next_handler):
+    # CORS Preflight request, answered for every path
+    if request['httpMethod'] != 'OPTIONS':
+        return next_handler(request)
+
+    api_response = ApiResponse(statusCode=204)
+    api_response.headers['Access-Control-Allow-Origin'] = '*'
+    api_response.headers['Access-Control-Allow-Methods'] = 'POST, GET, DELETE, PUT'
+    api_response.headers['Access-Control-Allow-Headers'] = 'x-api-key, Content-Type'
+    api_response.headers['Allow'] = 'CONVERT'
+    return api_response
+
+
+def json_body(request, next_handler):
+    # Decode the body exactly once, handlers read the result from request['json_body']
+    body = request.get('body')
+    request['json_body'] = json.loads(body) if body else None
+    return next_handler(request)
+
+
+def error_mapping(request, next_handler):
+    try:
+        return next_handler(request)
+
+    except KeyError as key_error:
+        # For a key Error, return an error message and HTTP Status of 400 Bad Request
+        message_string = "KeyError: " + str(key_error)
+
+        # Log the traceback to help in debugging
+        logger.warning('error_mapping: %s', message_string, exc_info=True)
+
+        return ApiResponse(statusCode=400, body=ApiResponseBody(result="ERR", message=message_string))
+
+    except ValueError as value_error:
+        # Raised by json.loads for a body that is not valid JSON
+        return ApiResponse(statusCode=400, body=ApiResponseBody(result="ERR", message="ValueError: " + str(value_error)))
+
+
+def timing(request, next_handler):
+    start = time.perf_counter()
+    try:
+        return next_handler(request)
+    finally:
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        logger.info('timing: %s %s %.1fms', request['httpMethod'], request['path'], elapsed_ms)
+
+
+def request_logging(request, next_handler):
+    # Full payloads are only serialised when debug logging is on and the route is sampled
+    if not logger.isEnabledFor(logging.DEBUG) or not ApiLog.is_sampled(request['path']):
+        return next_handler(request)
+
+    logged_request = dict(request)
+    logged_request['body'] = logged_request.pop('json_body', None)
+    logger.debug('request: %s', LazyJson(logged_request))
+    api_response = next_handler(request)
+    logger.debug('response: %s %s', api_response.statusCode, LazyJson(str(api_response.body)))
+    return api_response
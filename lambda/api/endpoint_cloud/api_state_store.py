@@ -0,0 +1,186 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2018 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Amazon Software License (the "License"). You may not use this file except in
+# compliance with the License. A copy of the License is located at
+#
+#    http://aws.amazon.com/asl/
+#
+# or in the "license" file accompanying this file. This file is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific
+# language governing permissions and limitations under the License.
+
+import json
+import threading
+import time
+
+from alexa.skills.smarthome import get_utc_timestamp
+from .api_log import ApiLog, LazyJson
+from .api_resources import ApiResources
+
+logger = ApiLog.get_logger('endpoint_cloud.api_state_store')
+
+
+class ApiStateStore:
+    """
+    The last reported value of every property of an endpoint, persisted in APISensorEndpointState.
+
+    Each property is a top level attribute of the endpoint's item, so a ChangeReport is a single update_item that
+    leaves the other properties alone. Reads go through a per container cache: states for ttl seconds and the
+    retrievable properties parsed from the endpoint's capabilities for capabilities_ttl seconds. The clock returns
+    epoch seconds and can be replaced to test the expiry handling.
+    """
+
+    def __init__(self, ttl=5, capabilities_ttl=300, clock=time.time):
+        self.ttl = ttl
+        self.capabilities_ttl = capabilities_ttl
+        self.clock = clock
+
+        # EndpointId -> (expires_at, value)
+        self._states = {}
+        self._properties = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def get_property_key(namespace, name, instance=None):
+        """
+        The attribute name a property is stored under
+        :param namespace: The interface, ex: Alexa.ContactSensor
+        :param name: The property name, ex: detectionState
+        :param instance: The instance of a multi instance interface or None
+        :return: A string
+        """
+        if instance:
+            return '{0}:{1}.{2}'.format(namespace, instance, name)
+        return '{0}.{1}'.format(namespace, name)
+
+    def get_state(self, endpoint_id):
+        """
+        The stored properties of an endpoint
+        :param endpoint_id: The EndpointId as a string
+        :return: A dict of property key to a dict with namespace, name, instance, value and timeOfSample
+        """
+        state = self._get_cached(self._states, endpoint_id)
+        if state is not None:
+            return state
+
+        result = ApiResources.get_endpoint_state_table().get_item(Key={'EndpointId': endpoint_id})
+        state = {}
+        for key, attribute in result.get('Item', {}).items():
+            if key == 'EndpointId':
+                continue
+            state[key] = {
+                'namespace': attribute['Namespace'],
+                'name': attribute['Name'],
+                'instance': attribute.get('Instance'),
+                'value': json.loads(attribute['Value']),
+                'timeOfSample': attribute['TimeOfSample']
+            }
+
+        self._set_cached(self._states, endpoint_id, state, self.ttl)
+        return state
+
+    def set_property(self, endpoint_id, namespace, name, value, instance=None, time_of_sample=None):
+        """
+        Store the value of a property, the other properties of the endpoint are kept
+        :param endpoint_id: The EndpointId as a string
+        :param namespace: The interface, ex: Alexa.ContactSensor
+        :param name: The property name, ex: detectionState
+        :param value: The value as reported to Alexa, a string or JSON like value
+        :param instance: The instance of a multi instance interface or None
+        :param time_of_sample: The UTC timestamp of the sample, defaults to now
+        :return: The response of update_item
+        """
+        key = self.get_property_key(namespace, name, instance)
+        prop = {
+            'namespace': namespace,
+            'name': name,
+            'instance': instance,
+            'value': value,
+            'timeOfSample': time_of_sample or get_utc_timestamp()
+        }
+        attribute = {
+            'Namespace': namespace,
+            'Name': name,
+            # Stored as JSON, DynamoDB does not accept floats
+            'Value': json.dumps(value),
+            'TimeOfSample': prop['timeOfSample']
+        }
+        if instance:
+            attribute['Instance'] = instance
+
+        response = ApiResources.get_endpoint_state_table().update_item(
+            Key={'EndpointId': endpoint_id},
+            UpdateExpression='SET #property = :property',
+            ExpressionAttributeNames={'#property': key},
+            ExpressionAttributeValues={':property': attribute}
+        )
+        logger.debug('set_property: %s on %s: %s', key, endpoint_id, LazyJson(value))
+
+        # Keep a cached state of this container current
+        with self._lock:
+            entry = self._states.get(endpoint_id)
+            if entry is not None:
+                entry[1][key] = prop
+
+        return response
+
+    def get_retrievable_properties(self, endpoint_id):
+        """
+        The properties Alexa may ask for in a ReportState, parsed once from the endpoint's capabilities
+        :param endpoint_id: The EndpointId as a string
+        :return: A list of dicts with namespace, name and instance, None if the endpoint does not exist
+        """
+        properties = self._get_cached(self._properties, endpoint_id)
+        if properties is not None:
+            return properties
+
+        result = ApiResources.get_endpoint_details_table().get_item(
+            Key={'EndpointId': endpoint_id},
+            ProjectionExpression='Capabilities'
+        )
+        if 'Item' not in result:
+            return None
+
+        properties = []
+        for capability in json.loads(result['Item']['Capabilities']):
+            if not capability.get('properties', {}).get('retrievable', False):
+                continue
+            for supported in capability['properties'].get('supported', []):
+                properties.append({
+                    'namespace': capability['interface'],
+                    'name': supported['name'],
+                    'instance': capability.get('instance')
+                })
+
+        self._set_cached(self._properties, endpoint_id, properties, self.capabilities_ttl)
+        return properties
+
+    def delete(self, endpoint_id):
+        ApiResources.get_endpoint_state_table().delete_item(Key={'EndpointId': endpoint_id})
+        self.invalidate(endpoint_id)
+
+    def invalidate(self, endpoint_id=None):
+        """
+        Forget the cached state and capabilities of an endpoint, or of all endpoints
+        :param endpoint_id: The EndpointId as a string, None for all
+        """
+        with self._lock:
+            if endpoint_id is None:
+                self._states.clear()
+                self._properties.clear()
+            else:
+                self._states.pop(endpoint_id, None)
+                self._properties.pop(endpoint_id, None)
+
+    def _get_cached(self, cache, endpoint_id):
+        entry = cache.get(endpoint_id)
+        if entry is None or self.clock() >= entry[0]:
+            return None
+        return entry[1]
+
+    def _set_cached(self, cache, endpoint_id, value, ttl):
+        if ttl > 0:
+            with self._lock:
+                cache[endpoint_id] = (self.clock() + ttl, value)
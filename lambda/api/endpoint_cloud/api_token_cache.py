@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2018 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Amazon Software License (the "License"). You may not use this file except in
+# compliance with the License. A copy of the License is located at
+#
+#    http://aws.amazon.com/asl/
+#
+# or in the "license" file accompanying this file. This file is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific
+# language governing permissions and limitations under the License.
+
+import calendar
+import threading
+import time
+
+EXPIRATION_FORMAT = "%Y-%m-%dT%H:%M:%S.00Z"
+
+
+class ApiTokenCache:
+    """
+    Per container cache of access tokens keyed by UserId.
+
+    A token is handed out until refresh_ahead seconds before it expires. Loading is single flight: concurrent callers
+    for the same user wait for one load instead of each reading DynamoDB and refreshing with Login with Amazon.
+    Users share a fixed set of striped load locks, so the locks do not grow with the users the container has seen.
+    The clock returns epoch seconds and can be replaced to test the expiry handling.
+    """
+
+    def __init__(self, refresh_ahead=300, clock=time.time, lock_stripes=64):
+        self.refresh_ahead = refresh_ahead
+        self.clock = clock
+
+        # UserId -> (access_token, expires_at)
+        self._entries = {}
+        self._user_locks = [threading.Lock() for _ in range(lock_stripes)]
+
+    def get(self, user_id, loader):
+        """
+        The cached access token of a user, calling the loader when there is no fresh token
+        :param user_id: The UserId as a string
+        :param loader: A callable taking the user_id and returning (access_token, expires_at) or (None, None)
+        :return: The access token as a string or None
+        """
+        entry = self._entries.get(user_id)
+        if entry is not None and not self.needs_refresh(entry[1]):
+            return entry[0]
+
+        with self._get_user_lock(user_id):
+            # Another caller may have loaded the token while this one waited
+            entry = self._entries.get(user_id)
+            if entry is not None and not self.needs_refresh(entry[1]):
+                return entry[0]
+
+            access_token, expires_at = loader(user_id)
+            if access_token is None:
+                self._entries.pop(user_id, None)
+            else:
+                self._entries[user_id] = (access_token, expires_at)
+            return access_token
+
+    def invalidate(self, user_id):
+        self._entries.pop(user_id, None)
+
+    def needs_refresh(self, expires_at):
+        """
+        Whether a token expiring at the given time should be refreshed now
+        :param expires_at: The expiration in epoch seconds, None if unknown
+        :return: bool
+        """
+        if expires_at is None:
+            return True
+        return self.clock() >= expires_at - self.refresh_ahead
+
+    def _get_user_lock(self, user_id):
+        return self._user_locks[hash(user_id) % len(self._user_locks)]
+
+    @staticmethod
+    def parse_expiration(expiration_utc):
+        """
+        The epoch seconds of an ExpirationUTC string as stored in APISensorUsers
+        :param expiration_utc: A string formatted as YYYY-MM-DDThh:mm:ss.00Z
+        :return: float
+        """
+        return float(calendar.timegm(time.strptime(expiration_utc, EXPIRATION_FORMAT)))
+
+    @staticmethod
+    def format_expiration(expires_at):
+        """
+        The ExpirationUTC string of epoch seconds
+        :param expires_at: The expiration in epoch seconds
+        :return: A string formatted as YYYY-MM-DDThh:mm:ss.00Z
+        """
+        return time.strftime(EXPIRATION_FORMAT, time.gmtime(expires_at))
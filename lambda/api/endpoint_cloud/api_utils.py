@@ -11,24 +11,51 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific
 # language governing permissions and limitations under the License.
 
+import base64
 import datetime
+import json
 import random
 import string
 
+from .api_log import ApiLog
+
+logger = ApiLog.get_logger('endpoint_cloud.api_utils')
+
 
 class ApiUtils:
 
     @staticmethod
     def check_response(response):
         if response is None:
-            print('ERR ApiUtils.check_response is None')
+            logger.error('check_response is None')
             return False
         if response['ResponseMetadata']['HTTPStatusCode'] != 200:
-            print('ERR ApiUtils.check_response.HTTPStatusCode', response)
+            logger.error('check_response.HTTPStatusCode: %s', response['ResponseMetadata'])
             return False
         else:
             return True
 
+    @staticmethod
+    def encode_cursor(last_evaluated_key):
+        """
+        An opaque cursor for a DynamoDB LastEvaluatedKey
+        :param last_evaluated_key: The LastEvaluatedKey of a query or scan as a dict
+        :return: string cursor
+        """
+        return base64.urlsafe_b64encode(json.dumps(last_evaluated_key).encode('utf-8')).decode('ascii')
+
+    @staticmethod
+    def decode_cursor(cursor):
+        """
+        The DynamoDB ExclusiveStartKey of a cursor, raises a ValueError for an invalid cursor
+        :param cursor: A cursor as returned by encode_cursor
+        :return: dict
+        """
+        last_evaluated_key = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8'))
+        if not isinstance(last_evaluated_key, dict):
+            raise ValueError('Invalid cursor')
+        return last_evaluated_key
+
     @staticmethod
     def get_time_utc():
         """
@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2018 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Amazon Software License (the "License"). You may not use this file except in
+# compliance with the License. A copy of the License is located at
+#
+#    http://aws.amazon.com/asl/
+#
+# or in the "license" file accompanying this file. This file is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific
+# language governing permissions and limitations under the License.
+
+import json
+import os
+import random
+import threading
+
+from jsonschema import FormatChecker, RefResolver, compile_validator, validators
+from jsonschema.exceptions import best_match
+from .api_log import ApiLog
+
+logger = ApiLog.get_logger('endpoint_cloud.api_validator')
+
+SCHEMA_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'alexa_smart_home_message_schema.json')
+
+VALIDATION_MODES = ('always', 'sampled', 'off')
+
+# Whether messages sent to Alexa are checked against the schema: always, sampled or off
+VALIDATION_MODE = os.environ.get('validation_mode', 'off').lower()
+VALIDATION_SAMPLE_RATE = float(os.environ.get('validation_sample_rate', '0.01'))
+
+# Comma separated formats (e.g. date-time,uri) that are checked; formats are not checked by default
+VALIDATION_FORMATS = [name.strip() for name in os.environ.get('validation_formats', '').split(',') if name.strip()]
+FORMAT_CACHE_SIZE = int(os.environ.get('format_cache_size', '1024'))
+
+
+class ApiValidator:
+    """
+    Validation of Alexa smart home messages against alexa_smart_home_message_schema.json.
+
+    The schema is loaded, checked and compiled once per process. The compiled validator answers whether a message is
+    valid and is shared by all threads. Only invalid messages go through the interpreting validator for the error
+    report; its RefResolver keeps a stack of resolution scopes, so every thread gets its own.
+
+    Only the formats listed in validation_formats are checked. Their results are cached per string, and the time spent
+    in each is available from get_format_timings.
+    """
+
+    _lock = threading.Lock()
+    _schema = None
+    _validator_class = None
+    _format_checker = None
+    _compiled = None
+    _local = threading.local()
+
+    @classmethod
+    def get_schema(cls):
+        if cls._schema is None:
+            with cls._lock:
+                if cls._schema is None:
+                    with open(SCHEMA_PATH, 'r') as schema_file:
+                        schema = json.load(schema_file)
+                    validator_class = validators.validator_for(schema)
+                    validator_class.check_schema(schema)
+                    format_checker = cls.create_format_checker()
+                    cls._compiled = compile_validator(schema, cls=validator_class, format_checker=format_checker)
+                    cls._validator_class = validator_class
+                    cls._format_checker = format_checker
+                    cls._schema = schema
+        return cls._schema
+
+    @staticmethod
+    def create_format_checker(formats=None):
+        """
+        A format checker for the allowed formats that have a checker installed
+        :param formats: The format names, defaults to the validation_formats environment variable
+        :return: A caching, timed FormatChecker, or None if no format is checked
+        """
+        formats = VALIDATION_FORMATS if formats is None else formats
+        missing = [name for name in formats if name not in FormatChecker.checkers]
+        if missing:
+            logger.warning('create_format_checker: No checker installed for %s', ', '.join(missing))
+        available = [name for name in formats if name in FormatChecker.checkers]
+        if not available:
+            return None
+        return FormatChecker(formats=available, cache_size=FORMAT_CACHE_SIZE, timed=True)
+
+    @classmethod
+    def get_format_timings(cls):
+        """
+        :return: dict of format name to the checks asked for, the calls made to its checker and the seconds spent
+        """
+        checker = cls._format_checker
+        if checker is None:
+            return {}
+        with checker.timings_lock:
+            return dict((name, dict(timing)) for name, timing in checker.timings.items())
+
+    @classmethod
+    def get_validator(cls):
+        """
+        The interpreting validator of the calling thread, built on its first use
+        :return: A jsonschema validator for the Alexa smart home message schema
+        """
+        validator = getattr(cls._local, 'validator', None)
+        if validator is None:
+            schema = cls.get_schema()
+            resolver = RefResolver.from_schema(schema)
+            validator = cls._local.validator = cls._validator_class(
+                schema, resolver=resolver, format_checker=cls._format_checker)
+        return validator
+
+    @classmethod
+    def validate(cls, message):
+        """
+        Validate a message and log what is wrong with it
+        :param message: The message as a dict
+        :return: True if the message is valid
+        """
+        cls.get_schema()
+        if cls._compiled.is_valid(message):
+            return True
+
+        error = best_match(cls.get_validator().iter_errors(message))
+        if error is not None:
+            logger.warning('validate: Invalid Content: %s', error.message)
+            return False
+        return True
+
+    @staticmethod
+    def is_enabled(mode=None):
+        """
+        Whether the current message should be validated
+        :param mode: always, sampled or off, defaults to the validation_mode environment variable
+        :return: bool
+        """
+        mode = mode or VALIDATION_MODE
+        if mode == 'always':
+            return True
+        if mode == 'sampled':
+            return random.random() < VALIDATION_SAMPLE_RATE
+        return False
+
+    @classmethod
+    def check(cls, message, mode=None):
+        """
+        Validate a message if the validation mode asks for it
+        :param message: The message as a dict
+        :param mode: always, sampled or off, defaults to the validation_mode environment variable
+        :return: False if the message was validated and found invalid, True otherwise
+        """
+        if not cls.is_enabled(mode):
+            return True
+        return cls.validate(message)
+
+    @classmethod
+    def reset(cls):
+        with cls._lock:
+            cls._schema = None
+            cls._validator_class = None
+            cls._format_checker = None
+            cls._compiled = None
+            cls._local = threading.local()
+
+
+if VALIDATION_MODE not in VALIDATION_MODES:
+    logger.warning('Unknown validation_mode %s, expected one of %s', VALIDATION_MODE, ', '.join(VALIDATION_MODES))
@@ -0,0 +1,12 @@
+"""
+A clock for the caches of the endpoint cloud that only moves when a test moves it.
+"""
+
+
+class FakeClock:
+
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
@@ -0,0 +1,161 @@
+"""
+An in-memory stand-in for the boto3 DynamoDB Table resource, covering the calls the endpoint cloud makes.
+"""
+
+import copy
+import threading
+
+
+def matches(condition, item):
+    """
+    Evaluate a boto3.dynamodb.conditions condition against an item
+    """
+    expression = condition.get_expression()
+    operator = expression['operator']
+    values = expression['values']
+    if operator == 'AND':
+        return all(matches(value, item) for value in values)
+
+    attribute, value = values
+    actual = item.get(attribute.name)
+    if operator == '=':
+        return actual == value
+    if operator == 'contains':
+        return actual is not None and value in actual
+    raise NotImplementedError(operator)
+
+
+class Table:
+    """
+    A table keyed by hash_key, with global secondary indexes keyed by an attribute and returning all attributes.
+
+    Like DynamoDB, a query or scan reads at most page_size items (or Limit if smaller) before the filter is applied
+    and returns a LastEvaluatedKey when items are left, so callers have to follow the pages.
+    """
+
+    def __init__(self, hash_key, indexes=None, page_size=100):
+        self.hash_key = hash_key
+        self.indexes = indexes or {}
+        self.page_size = page_size
+        self.items = {}
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def _record(self, name, kwargs):
+        with self.lock:
+            self.calls.append((name, copy.deepcopy(kwargs)))
+
+    def get_item(self, Key, **kwargs):
+        self._record('get_item', dict(kwargs, Key=Key))
+        response = {'ResponseMetadata': {'HTTPStatusCode': 200}}
+        item = self.items.get(Key[self.hash_key])
+        if item is not None:
+            response['Item'] = copy.deepcopy(item)
+        return response
+
+    def put_item(self, Item, **kwargs):
+        self._record('put_item', dict(kwargs, Item=Item))
+        self.items[Item[self.hash_key]] = copy.deepcopy(Item)
+        return {'ResponseMetadata': {'HTTPStatusCode': 200}}
+
+    def delete_item(self, Key, **kwargs):
+        self._record('delete_item', dict(kwargs, Key=Key))
+        self.items.pop(Key[self.hash_key], None)
+        return {'ResponseMetadata': {'HTTPStatusCode': 200}}
+
+    def update_item(self, Key, UpdateExpression, ExpressionAttributeNames=None, ExpressionAttributeValues=None,
+                    **kwargs):
+        """
+        Supports SET of whole attributes only, ex: SET #a = :a, B = :b
+        """
+        self._record('update_item', dict(kwargs, Key=Key, UpdateExpression=UpdateExpression))
+        names = ExpressionAttributeNames or {}
+        values = ExpressionAttributeValues or {}
+        action, assignments = UpdateExpression.split(None, 1)
+        if action.upper() != 'SET':
+            raise NotImplementedError(UpdateExpression)
+
+        with self.lock:
+            item = self.items.setdefault(Key[self.hash_key], dict(Key))
+            for assignment in assignments.split(','):
+                name, value = (part.strip() for part in assignment.split('='))
+                item[names.get(name, name)] = copy.deepcopy(values[value])
+        return {'ResponseMetadata': {'HTTPStatusCode': 200}}
+
+    def _key(self, item, index_name):
+        key = {self.hash_key: item[self.hash_key]}
+        if index_name is not None:
+            attribute = self.indexes[index_name]
+            key[attribute] = item[attribute]
+        return key
+
+    def _read(self, candidates, index_name, Limit=None, ExclusiveStartKey=None, FilterExpression=None,
+              ProjectionExpression=None, ExpressionAttributeNames=None):
+        candidates = sorted(candidates, key=lambda item: item[self.hash_key])
+        if ExclusiveStartKey is not None:
+            start = ExclusiveStartKey[self.hash_key]
+            candidates = [item for item in candidates if item[self.hash_key] > start]
+
+        read = candidates[:min(Limit or self.page_size, self.page_size)]
+        items = [item for item in read if FilterExpression is None or matches(FilterExpression, item)]
+        if ProjectionExpression is not None:
+            names = ExpressionAttributeNames or {}
+            attributes = [names.get(name.strip(), name.strip()) for name in ProjectionExpression.split(',')]
+            items = [{name: item[name] for name in attributes if name in item} for item in items]
+
+        result = {'Items': copy.deepcopy(items), 'Count': len(items), 'ScannedCount': len(read)}
+        if len(read) < len(candidates):
+            result['LastEvaluatedKey'] = self._key(read[-1], index_name)
+        return result
+
+    def query(self, KeyConditionExpression, IndexName=None, **kwargs):
+        self._record('query', dict(kwargs, IndexName=IndexName))
+        with self.lock:
+            candidates = [item for item in self.items.values() if matches(KeyConditionExpression, item)]
+        return self._read(candidates, IndexName, **kwargs)
+
+    def scan(self, **kwargs):
+        self._record('scan', kwargs)
+        with self.lock:
+            candidates = list(self.items.values())
+        return self._read(candidates, None, **kwargs)
+
+
+class Resource:
+    """
+    The DynamoDB service resource over Tables by name, for BatchWriteItem.
+
+    While unprocessed is above zero, every call to batch_write_item leaves the last request of each table unprocessed
+    and counts unprocessed down by one.
+    """
+
+    def __init__(self, tables):
+        self.tables = tables
+        self.unprocessed = 0
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def Table(self, name):
+        return self.tables[name]
+
+    def batch_write_item(self, RequestItems, **kwargs):
+        with self.lock:
+            self.calls.append(('batch_write_item', copy.deepcopy(dict(kwargs, RequestItems=RequestItems))))
+            unprocessed = self.unprocessed > 0
+            self.unprocessed = max(self.unprocessed - 1, 0)
+
+        response = {'UnprocessedItems': {}, 'ResponseMetadata': {'HTTPStatusCode': 200}}
+        for name, requests in RequestItems.items():
+            if len(requests) > 25:
+                raise ValueError('Too many items requested for the BatchWriteItem call')
+            table = self.tables[name]
+            if unprocessed:
+                requests, response['UnprocessedItems'][name] = requests[:-1], requests[-1:]
+            with table.lock:
+                for request in requests:
+                    if 'PutRequest' in request:
+                        item = request['PutRequest']['Item']
+                        table.items[item[table.hash_key]] = copy.deepcopy(item)
+                    else:
+                        table.items.pop(request['DeleteRequest']['Key'][table.hash_key], None)
+        return response
@@ -0,0 +1,162 @@
+import hashlib
+import http.client
+import http.server
+import json
+import threading
+import unittest
+from unittest import mock
+from urllib.parse import parse_qs, urlparse
+
+from endpoint_cloud import api_auth
+from endpoint_cloud.api_auth import ApiAuth
+from endpoint_cloud.api_profile_cache import ApiProfileCache
+from endpoint_cloud.tests.clock import FakeClock
+
+
+class TestApiProfileCache(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.cache = ApiProfileCache(max_size=2, ttl=100, negative_ttl=10, clock=self.clock)
+        self.loader = mock.Mock(side_effect=lambda token: ({'user_id': 'user-' + token}, True))
+
+    def test_profiles_are_cached(self):
+        self.assertEqual(self.cache.get('a', self.loader), {'user_id': 'user-a'})
+        self.assertEqual(self.cache.get('a', self.loader), {'user_id': 'user-a'})
+        self.loader.assert_called_once_with('a')
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+
+    def test_least_recently_used_profiles_are_evicted(self):
+        self.cache.get('a', self.loader)
+        self.cache.get('b', self.loader)
+        self.cache.get('a', self.loader)
+        self.cache.get('c', self.loader)
+
+        self.loader.reset_mock()
+        self.cache.get('a', self.loader)
+        self.cache.get('c', self.loader)
+        self.assertFalse(self.loader.called)
+        self.cache.get('b', self.loader)
+        self.loader.assert_called_once_with('b')
+
+    def test_profiles_expire_after_the_ttl(self):
+        self.cache.get('a', self.loader)
+        self.clock.now += 99
+        self.cache.get('a', self.loader)
+        self.assertEqual(self.loader.call_count, 1)
+
+        self.clock.now += 1
+        self.cache.get('a', self.loader)
+        self.assertEqual(self.loader.call_count, 2)
+
+    def test_errors_expire_after_the_negative_ttl(self):
+        loader = mock.Mock(return_value=({'error': 'invalid_token', 'error_description': 'bad'}, True))
+        self.cache.get('a', loader)
+        self.clock.now += 9
+        self.assertEqual(self.cache.get('a', loader)['error'], 'invalid_token')
+        self.assertEqual(loader.call_count, 1)
+
+        self.clock.now += 1
+        self.cache.get('a', loader)
+        self.assertEqual(loader.call_count, 2)
+
+    def test_uncacheable_responses_are_not_kept(self):
+        loader = mock.Mock(return_value=({'error': 'server_error', 'error_description': 'down'}, False))
+        self.cache.get('a', loader)
+        self.cache.get('a', loader)
+        self.assertEqual(loader.call_count, 2)
+
+    def test_tokens_are_kept_as_sha256_hashes(self):
+        self.cache.get('secret-token', self.loader)
+        key = hashlib.sha256(b'secret-token').hexdigest()
+        self.assertEqual(ApiProfileCache.get_key('secret-token'), key)
+        self.assertEqual(list(self.cache._entries), [key])
+
+    def test_invalidate(self):
+        self.cache.get('a', self.loader)
+        self.cache.invalidate('a')
+        self.cache.get('a', self.loader)
+        self.assertEqual(self.loader.call_count, 2)
+
+
+class LoginWithAmazonHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def reply(self, status, body):
+        with self.server.lock:
+            self.server.requests.append((self.command, urlparse(self.path).path))
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        token = parse_qs(urlparse(self.path).query)['access_token'][0]
+        if token == 'rejected':
+            self.reply(400, {'error': 'invalid_token', 'error_description': 'The token is invalid'})
+        else:
+            self.reply(200, {'user_id': 'amzn1.account.' + token})
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers['Content-Length']))
+        self.reply(200, {'access_token': 'new', 'refresh_token': 'refresh', 'token_type': 'bearer', 'expires_in': 3600})
+
+    def log_message(self, format, *args):
+        pass
+
+
+class LoginWithAmazon(http.server.ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), LoginWithAmazonHandler)
+        self.lock = threading.Lock()
+        self.connections = 0
+        self.requests = []
+
+
+class TestApiAuth(unittest.TestCase):
+
+    def setUp(self):
+        self.server = LoginWithAmazon()
+        thread = threading.Thread(target=self.server.serve_forever, args=(0.01,), daemon=True)
+        thread.start()
+        self.addCleanup(thread.join)
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+        # Point the module's pool at the stand-in, without the connections it may already hold
+        pool = api_auth.lwa_pool
+        pool.close()
+        self.addCleanup(pool.close)
+        host = '127.0.0.1:{0}'.format(self.server.server_address[1])
+        for name, value in (('host', host), ('connection_class', http.client.HTTPConnection)):
+            patch = mock.patch.object(pool, name, value)
+            patch.start()
+            self.addCleanup(patch.stop)
+
+        api_auth.profile_cache.clear()
+        self.addCleanup(api_auth.profile_cache.clear)
+
+    def test_requests_share_one_pooled_connection(self):
+        for token in ('a', 'b', 'c'):
+            self.assertEqual(ApiAuth.get_user_profile(token), {'user_id': 'amzn1.account.' + token})
+        response = ApiAuth().refresh_access_token('refresh', 'client', 'secret')
+        self.assertEqual(json.loads(response.read().decode('utf-8'))['access_token'], 'new')
+
+        self.assertEqual(len(self.server.requests), 4)
+        self.assertEqual(self.server.connections, 1)
+
+    def test_profiles_are_fetched_once_per_token(self):
+        for _ in range(3):
+            ApiAuth.get_user_profile('a')
+            ApiAuth.get_user_profile('rejected')
+        self.assertEqual(self.server.requests, [('GET', '/user/profile')] * 2)
+        self.assertEqual(ApiAuth.get_user_profile('rejected')['error'], 'invalid_token')
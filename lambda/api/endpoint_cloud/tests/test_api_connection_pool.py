@@ -0,0 +1,107 @@
+import http.client
+import http.server
+import threading
+import unittest
+
+from endpoint_cloud.api_connection_pool import ApiConnectionPool
+
+
+class Handler(http.server.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def respond(self):
+        if 'Content-Length' in self.headers:
+            self.rfile.read(int(self.headers['Content-Length']))
+        with self.server.lock:
+            self.server.requests.append(self.command)
+            behaviour = self.server.behaviours.pop(0) if self.server.behaviours else 'respond'
+
+        if behaviour == 'drop':
+            # Take the request but break the connection before answering
+            self.close_connection = True
+            return
+        self.send_response(200)
+        self.send_header('Content-Length', '2')
+        self.end_headers()
+        self.wfile.write(b'ok')
+        if behaviour == 'close':
+            # Close after answering without announcing it, as a server timing out an idle connection does
+            self.close_connection = True
+
+    do_GET = do_POST = respond
+
+    def log_message(self, format, *args):
+        pass
+
+
+class Server(http.server.ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), Handler)
+        self.lock = threading.Lock()
+        self.requests = []
+        self.behaviours = []
+        self.closed = threading.Event()
+
+    def process_request_thread(self, request, client_address):
+        try:
+            super().process_request_thread(request, client_address)
+        finally:
+            self.closed.set()
+
+
+class TestApiConnectionPool(unittest.TestCase):
+
+    def setUp(self):
+        self.server = Server()
+        thread = threading.Thread(target=self.server.serve_forever, args=(0.01,), daemon=True)
+        thread.start()
+        self.addCleanup(thread.join)
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+        host = '127.0.0.1:{0}'.format(self.server.server_address[1])
+        self.pool = ApiConnectionPool(host, connection_class=http.client.HTTPConnection)
+        self.addCleanup(self.pool.close)
+
+    def request(self, method, **kwargs):
+        return self.pool.request(method, '/', 'body', **kwargs)
+
+    def test_connections_are_reused(self):
+        for _ in range(3):
+            self.assertEqual(self.request('POST').read(), b'ok')
+        self.assertEqual(self.pool.connections_created, 1)
+
+    def test_connections_closed_while_idle_are_replaced_before_sending(self):
+        self.server.behaviours = ['close']
+        self.request('POST')
+        self.assertTrue(self.server.closed.wait(5))
+        self.assertEqual(self.request('POST').read(), b'ok')
+        self.assertEqual(self.server.requests, ['POST', 'POST'])
+        self.assertEqual(self.pool.connections_created, 2)
+
+    def test_post_is_not_sent_again_when_the_response_is_lost(self):
+        self.request('POST')
+        self.server.behaviours = ['drop']
+        with self.assertRaises(http.client.RemoteDisconnected):
+            self.request('POST')
+        self.assertEqual(self.server.requests, ['POST', 'POST'])
+
+    def test_post_is_sent_again_when_the_caller_allows_it(self):
+        self.request('POST')
+        self.server.behaviours = ['drop']
+        self.assertEqual(self.request('POST', retry=True).read(), b'ok')
+        self.assertEqual(self.server.requests, ['POST', 'POST', 'POST'])
+
+    def test_get_is_sent_again_when_the_response_is_lost(self):
+        self.request('GET')
+        self.server.behaviours = ['drop']
+        self.assertEqual(self.request('GET').read(), b'ok')
+        self.assertEqual(self.server.requests, ['GET', 'GET', 'GET'])
+
+    def test_new_connections_are_not_retried(self):
+        self.server.behaviours = ['drop']
+        with self.assertRaises(http.client.RemoteDisconnected):
+            self.request('GET')
+        self.assertEqual(self.server.requests, ['GET'])
@@ -0,0 +1,336 @@
+import json
+import unittest
+from unittest import mock
+
+from botocore.exceptions import ClientError
+
+from endpoint_cloud import api_handler_endpoint
+from endpoint_cloud.api_handler_directive import ApiHandlerDirective
+from endpoint_cloud.api_handler_endpoint import ApiHandlerEndpoint, DEFAULT_CAPABILITIES, MAX_PAGE_SIZE
+from endpoint_cloud.api_handler_event import ApiHandlerEvent
+from endpoint_cloud.api_resources import (
+    ApiResources, BATCH_WRITE_RETRIES, ENDPOINT_DETAILS_TABLE, ENDPOINT_STATE_TABLE, USER_ID_INDEX
+)
+from endpoint_cloud.api_utils import ApiUtils
+from endpoint_cloud.tests.dynamodb import Resource, Table
+
+USERS = 40
+ENDPOINTS_PER_USER = 75
+
+
+def endpoint_item(user_id, index, category):
+    return {
+        'EndpointId': 'endpoint-{0}-{1:03d}'.format(user_id, index),
+        'Capabilities': json.dumps(DEFAULT_CAPABILITIES),
+        'Description': 'Sample Description',
+        'DisplayCategories': json.dumps([category]),
+        'FriendlyName': 'Sensor {0}'.format(index),
+        'ManufacturerName': 'Lukas Patzke',
+        'UserId': user_id
+    }
+
+
+def throttled(operation_name):
+    return ClientError(
+        {'Error': {'Code': 'ProvisionedThroughputExceededException', 'Message': 'Rate exceeded'}}, operation_name
+    )
+
+
+def sent_reports(alexa_name, user_id, endpoints):
+    return [{'userId': user_id, 'endpointIds': [endpoint['endpointId'] for endpoint in endpoints], 'result': 'OK'}]
+
+
+class TestReadEndpoints(unittest.TestCase):
+
+    def setUp(self):
+        # 3000 endpoints, so every read needs many pages of 100
+        self.table = Table('EndpointId', indexes={USER_ID_INDEX: 'UserId'}, page_size=100)
+        for user in range(USERS):
+            for index in range(ENDPOINTS_PER_USER):
+                category = 'CONTACT_SENSOR' if index % 3 else 'SWITCH'
+                item = endpoint_item(str(user), index, category)
+                self.table.items[item['EndpointId']] = item
+
+        patch = mock.patch.object(ApiResources, 'get_endpoint_details_table', return_value=self.table)
+        patch.start()
+        self.addCleanup(patch.stop)
+        self.handler = ApiHandlerEndpoint()
+
+    def ids(self, items):
+        return sorted(item['EndpointId'] for item in items)
+
+    def expected_ids(self, user_id=None, category=None):
+        return sorted(
+            item['EndpointId'] for item in self.table.items.values()
+            if (user_id is None or item['UserId'] == user_id) and
+            (category is None or category in json.loads(item['DisplayCategories']))
+        )
+
+    def test_query_user_endpoints_follows_every_page(self):
+        self.table.page_size = 20
+        endpoints = list(ApiHandlerEndpoint.query_user_endpoints('7'))
+        self.assertEqual(self.ids(endpoints), self.expected_ids(user_id='7'))
+
+        queries = [kwargs for name, kwargs in self.table.calls if name == 'query']
+        self.assertTrue(all(query['IndexName'] == USER_ID_INDEX for query in queries))
+        self.assertEqual(len(queries), 4)
+        self.assertNotIn('ExclusiveStartKey', queries[0])
+        self.assertIn('ExclusiveStartKey', queries[-1])
+        self.assertFalse(any(name == 'scan' for name, _ in self.table.calls))
+
+    def test_read_without_limit_returns_all_endpoints(self):
+        self.assertEqual(self.ids(self.handler.read()), self.expected_ids())
+        self.assertEqual(len(self.table.calls), USERS * ENDPOINTS_PER_USER // 100)
+
+    def test_read_pages_through_cursors(self):
+        endpoints = []
+        params = {'limit': '250'}
+        pages = 0
+        while True:
+            page = self.handler.read(params)
+            self.assertLessEqual(len(page['endpoints']), 250)
+            endpoints.extend(page['endpoints'])
+            pages += 1
+            if 'cursor' not in page:
+                break
+            params = {'limit': '250', 'cursor': page['cursor']}
+
+        self.assertGreater(pages, 1)
+        self.assertEqual(self.ids(endpoints), self.expected_ids())
+
+    def test_cursor_round_trip(self):
+        page = self.handler.read({'limit': '10'})
+        last_evaluated_key = ApiUtils.decode_cursor(page['cursor'])
+        self.assertEqual(last_evaluated_key, {'EndpointId': page['endpoints'][-1]['EndpointId']})
+        self.assertEqual(ApiUtils.encode_cursor(last_evaluated_key), page['cursor'])
+
+    def test_limit_is_capped(self):
+        self.table.page_size = 10000
+        page = self.handler.read({'limit': '100000'})
+        self.assertEqual(len(page['endpoints']), MAX_PAGE_SIZE)
+
+    def test_read_by_user(self):
+        endpoints = []
+        params = {'userId': '3', 'limit': '20'}
+        while True:
+            page = self.handler.read(params)
+            endpoints.extend(page['endpoints'])
+            if 'cursor' not in page:
+                break
+            params = dict(params, cursor=page['cursor'])
+        self.assertEqual(self.ids(endpoints), self.expected_ids(user_id='3'))
+        self.assertTrue(all(name == 'query' for name, _ in self.table.calls))
+
+    def test_read_by_display_category(self):
+        endpoints = self.handler.read({'displayCategory': 'SWITCH'})
+        self.assertEqual(self.ids(endpoints), self.expected_ids(category='SWITCH'))
+
+    def test_read_by_user_and_display_category(self):
+        endpoints = self.handler.read({'userId': '3', 'displayCategory': 'SWITCH'})
+        self.assertEqual(self.ids(endpoints), self.expected_ids(user_id='3', category='SWITCH'))
+
+    def test_read_projects_attributes(self):
+        page = self.handler.read({'limit': '5', 'attributes': 'EndpointId, FriendlyName'})
+        for endpoint in page['endpoints']:
+            self.assertEqual(sorted(endpoint), ['EndpointId', 'FriendlyName'])
+
+
+class TestDiscovery(unittest.TestCase):
+
+    def setUp(self):
+        self.table = Table('EndpointId', indexes={USER_ID_INDEX: 'UserId'}, page_size=100)
+        for user in ('0', '1', '2'):
+            for index in range(450):
+                item = endpoint_item(user, index, 'CONTACT_SENSOR')
+                self.table.items[item['EndpointId']] = item
+
+        patch = mock.patch.object(ApiResources, 'get_endpoint_details_table', return_value=self.table)
+        patch.start()
+        self.addCleanup(patch.stop)
+
+    def test_discovery_returns_every_endpoint_of_the_user(self):
+        directive = {
+            'directive': {
+                'header': {
+                    'namespace': 'Alexa.Discovery',
+                    'name': 'Discover',
+                    'payloadVersion': '3',
+                    'messageId': 'message'
+                },
+                'payload': {
+                    'scope': {'type': 'BearerToken', 'token': 'access-token-from-skill'}
+                }
+            }
+        }
+        response = ApiHandlerDirective().process(directive, 'client', 'secret')
+
+        endpoints = response['event']['payload']['endpoints']
+        self.assertEqual(
+            sorted(endpoint['endpointId'] for endpoint in endpoints),
+            sorted(key for key, item in self.table.items.items() if item['UserId'] == '0')
+        )
+        self.assertFalse(any(name == 'scan' for name, _ in self.table.calls))
+
+
+class TestCreateBatch(unittest.TestCase):
+
+    def setUp(self):
+        self.details = Table('EndpointId', indexes={USER_ID_INDEX: 'UserId'})
+        self.resource = Resource({ENDPOINT_DETAILS_TABLE: self.details})
+        patches = [
+            mock.patch.object(ApiResources, 'get_dynamodb_resource', return_value=self.resource),
+            mock.patch('endpoint_cloud.api_resources.time.sleep'),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+        patch = mock.patch.object(ApiHandlerEvent, 'send_discovery_reports', side_effect=sent_reports)
+        self.send_discovery_reports = patch.start()
+        self.addCleanup(patch.stop)
+
+    def endpoints(self, count, users=3):
+        return [
+            {'endpointId': 'sensor-{0:03d}'.format(index), 'userId': str(index % users),
+             'friendlyName': 'Sensor {0}'.format(index)}
+            for index in range(count)
+        ]
+
+    def reported_ids(self):
+        return [endpoint['endpointId'] for call in self.send_discovery_reports.call_args_list for endpoint in call[0][2]]
+
+    def test_endpoints_are_stored_and_reported_per_user(self):
+        endpoints = self.endpoints(60)
+        results = ApiHandlerEndpoint().create({'endpoints': endpoints})
+
+        self.assertEqual([result['endpointId'] for result in results], [e['endpointId'] for e in endpoints])
+        self.assertEqual({result['result'] for result in results}, {'OK'})
+        self.assertEqual(sorted(self.details.items), [e['endpointId'] for e in endpoints])
+        self.assertEqual(len(self.resource.calls), 3)
+
+        reports = {call[0][1]: call[0][2] for call in self.send_discovery_reports.call_args_list}
+        self.assertEqual(sorted(reports), ['0', '1', '2'])
+        for user_id, report_endpoints in reports.items():
+            self.assertEqual(
+                [endpoint['endpointId'] for endpoint in report_endpoints],
+                [e['endpointId'] for e in endpoints if e['userId'] == user_id]
+            )
+
+    def test_a_later_endpoint_with_the_same_id_wins(self):
+        endpoints = self.endpoints(3)
+        endpoints.append(dict(endpoints[0], friendlyName='Renamed'))
+        results = ApiHandlerEndpoint().create_batch(endpoints)
+
+        self.assertEqual(results[0]['result'], 'ERR')
+        self.assertEqual(results[0]['message'], 'Replaced by a later endpoint with the same endpointId')
+        self.assertEqual([result['result'] for result in results[1:]], ['OK', 'OK', 'OK'])
+        self.assertEqual(self.details.items['sensor-000']['FriendlyName'], 'Renamed')
+
+        requests = self.resource.calls[0][1]['RequestItems'][ENDPOINT_DETAILS_TABLE]
+        self.assertEqual(len(requests), 3)
+        reported = self.reported_ids()
+        self.assertEqual(sorted(reported), ['sensor-000', 'sensor-001', 'sensor-002'])
+
+    def test_unprocessed_items_are_retried(self):
+        self.resource.unprocessed = 2
+        results = ApiHandlerEndpoint().create_batch(self.endpoints(10))
+
+        self.assertEqual({result['result'] for result in results}, {'OK'})
+        self.assertEqual(len(self.details.items), 10)
+        retried = [call[1]['RequestItems'][ENDPOINT_DETAILS_TABLE] for call in self.resource.calls]
+        self.assertEqual([len(requests) for requests in retried], [10, 1, 1])
+
+    def test_items_unprocessed_after_every_retry_are_not_reported(self):
+        self.resource.unprocessed = BATCH_WRITE_RETRIES + 1
+        results = ApiHandlerEndpoint().create_batch(self.endpoints(10))
+
+        self.assertEqual(
+            results[9], {'endpointId': 'sensor-009', 'result': 'ERR', 'message': 'Not stored, retry later'}
+        )
+        self.assertEqual({result['result'] for result in results[:9]}, {'OK'})
+        self.assertNotIn('sensor-009', self.details.items)
+        reported = self.reported_ids()
+        self.assertNotIn('sensor-009', reported)
+
+
+class TestDelete(unittest.TestCase):
+
+    def setUp(self):
+        # More endpoints than one BatchWriteItem call or one scan page takes
+        self.details = Table('EndpointId', indexes={USER_ID_INDEX: 'UserId'}, page_size=40)
+        self.states = Table('EndpointId')
+        for user in ('0', '1', '2'):
+            for index in range(30):
+                item = endpoint_item(user, index, 'CONTACT_SENSOR')
+                self.details.items[item['EndpointId']] = item
+                self.states.items[item['EndpointId']] = {'EndpointId': item['EndpointId'], 'State': '{}'}
+        self.resource = Resource({ENDPOINT_DETAILS_TABLE: self.details, ENDPOINT_STATE_TABLE: self.states})
+
+        patches = [
+            mock.patch.object(ApiResources, 'get_dynamodb_resource', return_value=self.resource),
+            mock.patch.object(ApiResources, 'get_endpoint_details_table', return_value=self.details),
+            mock.patch('endpoint_cloud.api_resources.time.sleep'),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+        patch = mock.patch.object(ApiHandlerEvent, 'send_discovery_reports', side_effect=sent_reports)
+        self.send_discovery_reports = patch.start()
+        self.addCleanup(patch.stop)
+        self.endpoint_ids = sorted(self.details.items)
+
+    def reported_ids(self, response):
+        return sorted(endpoint_id for report in response['reports'] for endpoint_id in report['endpointIds'])
+
+    def test_delete_all(self):
+        response = ApiHandlerEndpoint().delete(['*'])
+
+        self.assertEqual(self.details.items, {})
+        self.assertEqual(self.states.items, {})
+        self.assertEqual((response['deleted'], response['unprocessed'], response['users']), (90, [], 3))
+        self.assertEqual(self.reported_ids(response), self.endpoint_ids)
+        self.assertEqual(
+            sorted(call[0][:2] for call in self.send_discovery_reports.call_args_list),
+            [('DeleteReport', '0'), ('DeleteReport', '1'), ('DeleteReport', '2')]
+        )
+
+    def test_delete_all_reports_only_deleted_endpoints(self):
+        # The last request of the first chunk stays unprocessed through every retry
+        self.resource.unprocessed = BATCH_WRITE_RETRIES + 1
+        unprocessed_id = self.endpoint_ids[24]
+
+        response = ApiHandlerEndpoint().delete_all()
+
+        self.assertEqual(list(self.details.items), [unprocessed_id])
+        self.assertEqual((response['deleted'], response['unprocessed']), (89, [unprocessed_id]))
+        self.assertEqual(self.reported_ids(response), [i for i in self.endpoint_ids if i != unprocessed_id])
+
+    def test_delete_all_survives_state_table_errors(self):
+        batch_write = ApiResources.batch_write
+
+        def fail_states(table_name, requests):
+            if table_name == ENDPOINT_STATE_TABLE:
+                raise throttled('BatchWriteItem')
+            return batch_write(table_name, requests)
+
+        with mock.patch.object(ApiResources, 'batch_write', side_effect=fail_states), \
+                self.assertLogs(api_handler_endpoint.logger, 'ERROR') as logs:
+            response = ApiHandlerEndpoint().delete_all()
+
+        self.assertEqual(self.details.items, {})
+        self.assertEqual(len(self.states.items), 90)
+        self.assertEqual(response['deleted'], 90)
+        self.assertEqual(self.reported_ids(response), self.endpoint_ids)
+        self.assertIn('Deleting the endpoint states failed', logs.output[0])
+
+    def test_delete_endpoint_survives_state_table_errors(self):
+        client = mock.Mock()
+        client.delete_item.return_value = {'ResponseMetadata': {'HTTPStatusCode': 200}}
+        with mock.patch.object(ApiResources, 'get_dynamodb_client', return_value=client), \
+                mock.patch.object(ApiHandlerEvent, 'create') as create, \
+                mock.patch.object(api_handler_endpoint.state_store, 'delete', side_effect=throttled('DeleteItem')), \
+                self.assertLogs(api_handler_endpoint.logger, 'ERROR') as logs:
+            response = ApiHandlerEndpoint.delete_endpoint(self.endpoint_ids[0])
+
+        self.assertEqual(response, client.delete_item.return_value)
+        create.assert_called_once_with({'event': {'type': 'DeleteReport', 'endpoint': {'id': self.endpoint_ids[0]}}})
+        self.assertIn('Deleting the state of ' + self.endpoint_ids[0], logs.output[0])
@@ -0,0 +1,89 @@
+import http.client
+import unittest
+from unittest import mock
+
+from botocore.exceptions import EndpointConnectionError
+
+from endpoint_cloud.api_handler_event import ApiHandlerEvent
+
+
+def change_report(endpoint_id, user_id):
+    return {'type': 'ChangeReport', 'endpoint': {'id': endpoint_id, 'userId': user_id}}
+
+
+class Response:
+
+    def __init__(self, code):
+        self.code = code
+
+    def getcode(self):
+        return self.code
+
+    def read(self):
+        return b''
+
+
+class TestCreateBatch(unittest.TestCase):
+
+    def setUp(self):
+        self.tokens = {'0': 'token-0', '1': 'token-1', '2': 'token-2'}
+
+        def get_user_info(user_id):
+            token = self.tokens[user_id]
+            if isinstance(token, Exception):
+                raise token
+            return token
+
+        patch = mock.patch.object(ApiHandlerEvent, 'get_user_info', side_effect=get_user_info)
+        self.get_user_info = patch.start()
+        self.addCleanup(patch.stop)
+        patch = mock.patch.object(ApiHandlerEvent, 'process_event', return_value=Response(202))
+        self.process_event = patch.start()
+        self.addCleanup(patch.stop)
+
+    def test_tokens_are_looked_up_once_per_user(self):
+        events = [change_report('sensor-{0}'.format(index), str(index % 3)) for index in range(9)]
+        results = ApiHandlerEvent().create_batch(events)
+
+        self.assertEqual([result['endpointId'] for result in results], ['sensor-{0}'.format(i) for i in range(9)])
+        self.assertEqual({result['result'] for result in results}, {'OK'})
+        self.assertEqual(sorted(call[0][0] for call in self.get_user_info.call_args_list), ['0', '1', '2'])
+        self.assertEqual(
+            sorted((call[0][0]['endpoint']['id'], call[0][2]) for call in self.process_event.call_args_list),
+            sorted(('sensor-{0}'.format(i), 'token-{0}'.format(i % 3)) for i in range(9))
+        )
+
+    def test_token_errors_only_fail_the_events_of_their_user(self):
+        self.tokens['1'] = EndpointConnectionError(endpoint_url='https://dynamodb.eu-west-1.amazonaws.com')
+        self.tokens['2'] = http.client.RemoteDisconnected('Remote end closed connection without response')
+        events = [change_report('sensor-{0}'.format(index), str(index)) for index in range(3)]
+        results = ApiHandlerEvent().create_batch(events)
+
+        self.assertEqual(results[0]['result'], 'OK')
+        self.assertEqual(results[1]['result'], 'ERR')
+        self.assertTrue(results[1]['message'].startswith('Access token unavailable: EndpointConnectionError: '))
+        self.assertEqual(results[2]['result'], 'ERR')
+        self.assertTrue(results[2]['message'].startswith('Access token unavailable: RemoteDisconnected: '))
+        self.process_event.assert_called_once_with(events[0], '0', 'token-0')
+
+    def test_users_without_token_are_not_sent(self):
+        self.tokens['1'] = None
+        events = [change_report('sensor-0', '0'), change_report('sensor-1', '1'), change_report('sensor-2', '1')]
+        results = ApiHandlerEvent().create_batch(events)
+
+        self.assertEqual(results[0]['result'], 'OK')
+        self.assertEqual(
+            results[1:],
+            [
+                {'endpointId': 'sensor-1', 'result': 'ERR', 'message': 'No access token for user'},
+                {'endpointId': 'sensor-2', 'result': 'ERR', 'message': 'No access token for user'}
+            ]
+        )
+        self.process_event.assert_called_once_with(events[0], '0', 'token-0')
+
+    def test_invalid_events(self):
+        results = ApiHandlerEvent().create_batch([{'type': 'ChangeReport'}, change_report('sensor-0', '0')])
+
+        self.assertEqual(results[0]['result'], 'ERR')
+        self.assertTrue(results[0]['message'].startswith('Invalid event: '))
+        self.assertEqual(results[1]['result'], 'OK')
@@ -0,0 +1,40 @@
+import threading
+import unittest
+from unittest import mock
+
+from endpoint_cloud.api_resources import ApiResources, USERS_TABLE
+
+
+class TestApiResources(unittest.TestCase):
+
+    def setUp(self):
+        ApiResources.reset()
+        self.addCleanup(ApiResources.reset)
+        session = mock.Mock()
+        session.resource.side_effect = lambda name: mock.Mock(name=name)
+        patch = mock.patch('boto3.session.Session', return_value=session)
+        self.session_class = patch.start()
+        self.addCleanup(patch.stop)
+
+    def in_thread(self, function):
+        result = []
+        thread = threading.Thread(target=lambda: result.append(function()))
+        thread.start()
+        thread.join()
+        return result[0]
+
+    def test_resources_and_tables_are_kept_per_thread(self):
+        resource = ApiResources.get_dynamodb_resource()
+        table = ApiResources.get_users_table()
+        self.assertIs(ApiResources.get_dynamodb_resource(), resource)
+        self.assertIs(ApiResources.get_users_table(), table)
+        resource.Table.assert_called_once_with(USERS_TABLE)
+
+        self.assertIsNot(self.in_thread(ApiResources.get_dynamodb_resource), resource)
+        self.assertIsNot(self.in_thread(ApiResources.get_users_table), table)
+
+    def test_the_client_and_session_are_shared(self):
+        client = ApiResources.get_dynamodb_client()
+        self.assertIs(self.in_thread(ApiResources.get_dynamodb_client), client)
+        self.in_thread(ApiResources.get_dynamodb_resource)
+        self.session_class.assert_called_once_with()
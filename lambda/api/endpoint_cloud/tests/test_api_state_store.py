@@ -0,0 +1,157 @@
+import json
+import unittest
+from unittest import mock
+
+from botocore.exceptions import ClientError
+
+from endpoint_cloud import api_handler_event
+from endpoint_cloud.api_connection_pool import ApiPooledResponse
+from endpoint_cloud.api_handler_endpoint import DEFAULT_CAPABILITIES
+from endpoint_cloud.api_handler_event import ApiHandlerEvent
+from endpoint_cloud.api_resources import ApiResources
+from endpoint_cloud.api_state_store import ApiStateStore
+from endpoint_cloud.tests.clock import FakeClock
+from endpoint_cloud.tests.dynamodb import Table
+
+
+class TestApiStateStore(unittest.TestCase):
+
+    def setUp(self):
+        self.states = Table('EndpointId')
+        self.details = Table('EndpointId')
+        self.details.items['sensor'] = {'EndpointId': 'sensor', 'Capabilities': json.dumps(DEFAULT_CAPABILITIES)}
+
+        for name, table in (('get_endpoint_state_table', self.states), ('get_endpoint_details_table', self.details)):
+            patch = mock.patch.object(ApiResources, name, return_value=table)
+            patch.start()
+            self.addCleanup(patch.stop)
+
+        self.clock = FakeClock()
+        self.store = ApiStateStore(ttl=5, capabilities_ttl=300, clock=self.clock)
+
+    def reads(self, table):
+        return sum(1 for name, _ in table.calls if name == 'get_item')
+
+    def test_set_property_keeps_the_other_properties(self):
+        self.store.set_property('sensor', 'Alexa.ContactSensor', 'detectionState', 'DETECTED', time_of_sample='t1')
+        self.store.set_property('sensor', 'Alexa.EndpointHealth', 'connectivity', {'value': 'OK'}, time_of_sample='t2')
+        self.store.set_property('sensor', 'Alexa.ContactSensor', 'detectionState', 'NOT_DETECTED', time_of_sample='t3')
+
+        state = self.store.get_state('sensor')
+        self.assertEqual(sorted(state), ['Alexa.ContactSensor.detectionState', 'Alexa.EndpointHealth.connectivity'])
+        self.assertEqual(state['Alexa.ContactSensor.detectionState']['value'], 'NOT_DETECTED')
+        self.assertEqual(state['Alexa.ContactSensor.detectionState']['timeOfSample'], 't3')
+        self.assertEqual(state['Alexa.EndpointHealth.connectivity']['value'], {'value': 'OK'})
+
+    def test_instances_are_stored_apart(self):
+        self.store.set_property('sensor', 'Alexa.ModeController', 'mode', 'A', instance='Door')
+        self.store.set_property('sensor', 'Alexa.ModeController', 'mode', 'B', instance='Window')
+
+        state = self.store.get_state('sensor')
+        self.assertEqual(state['Alexa.ModeController:Door.mode']['value'], 'A')
+        self.assertEqual(state['Alexa.ModeController:Window.mode']['instance'], 'Window')
+
+    def test_states_are_cached_until_the_ttl_expires(self):
+        self.store.get_state('sensor')
+        self.clock.now += 4.9
+        self.store.get_state('sensor')
+        self.assertEqual(self.reads(self.states), 1)
+
+        self.clock.now += 0.1
+        self.store.get_state('sensor')
+        self.assertEqual(self.reads(self.states), 2)
+
+    def test_set_property_updates_the_cached_state(self):
+        self.store.get_state('sensor')
+        self.store.set_property('sensor', 'Alexa.ContactSensor', 'detectionState', 'DETECTED')
+
+        state = self.store.get_state('sensor')
+        self.assertEqual(state['Alexa.ContactSensor.detectionState']['value'], 'DETECTED')
+        self.assertEqual(self.reads(self.states), 1)
+
+    def test_no_caching_with_a_ttl_of_zero(self):
+        store = ApiStateStore(ttl=0, clock=self.clock)
+        store.get_state('sensor')
+        store.get_state('sensor')
+        self.assertEqual(self.reads(self.states), 2)
+
+    def test_retrievable_properties_are_parsed_once(self):
+        expected = [
+            {'namespace': 'Alexa.ContactSensor', 'name': 'detectionState', 'instance': None},
+            {'namespace': 'Alexa.EndpointHealth', 'name': 'connectivity', 'instance': None}
+        ]
+        self.assertEqual(self.store.get_retrievable_properties('sensor'), expected)
+        self.clock.now += 299
+        self.assertEqual(self.store.get_retrievable_properties('sensor'), expected)
+        self.assertEqual(self.reads(self.details), 1)
+
+        self.clock.now += 1
+        self.store.get_retrievable_properties('sensor')
+        self.assertEqual(self.reads(self.details), 2)
+
+    def test_unknown_endpoints_have_no_properties(self):
+        self.assertIsNone(self.store.get_retrievable_properties('missing'))
+
+    def test_invalidate_one_endpoint(self):
+        self.store.get_state('sensor')
+        self.store.get_state('other')
+        self.store.get_retrievable_properties('sensor')
+
+        self.store.invalidate('sensor')
+        self.store.get_state('sensor')
+        self.store.get_state('other')
+        self.store.get_retrievable_properties('sensor')
+        self.assertEqual(self.reads(self.states), 3)
+        self.assertEqual(self.reads(self.details), 2)
+
+    def test_invalidate_all_endpoints(self):
+        self.store.get_state('sensor')
+        self.store.get_state('other')
+
+        self.store.invalidate()
+        self.store.get_state('sensor')
+        self.store.get_state('other')
+        self.assertEqual(self.reads(self.states), 4)
+
+    def test_delete(self):
+        self.store.set_property('sensor', 'Alexa.ContactSensor', 'detectionState', 'DETECTED')
+        self.store.get_state('sensor')
+        self.store.delete('sensor')
+        self.assertEqual(self.store.get_state('sensor'), {})
+
+
+class TestChangeReport(unittest.TestCase):
+
+    event = {
+        'type': 'ChangeReport',
+        'endpoint': {
+            'id': 'sensor',
+            'state': 'detectionState',
+            'value': 'DETECTED',
+            'namespace': 'Alexa.ContactSensor'
+        }
+    }
+
+    def setUp(self):
+        self.request = mock.Mock(return_value=ApiPooledResponse(202, 'Accepted', [], b''))
+        patch = mock.patch.object(api_handler_event.event_gateway_pool, 'request', self.request)
+        patch.start()
+        self.addCleanup(patch.stop)
+
+    def test_change_report_is_sent_when_the_state_table_fails(self):
+        error = ClientError({'Error': {'Code': 'ResourceNotFoundException', 'Message': 'missing'}}, 'UpdateItem')
+        with mock.patch.object(api_handler_event.state_store, 'set_property', side_effect=error):
+            response = ApiHandlerEvent().process_event(self.event, 'user', 'token')
+
+        self.assertEqual(response.getcode(), 202)
+        self.request.assert_called_once()
+
+    def test_change_report_is_sent_before_the_state_is_stored(self):
+        calls = []
+        self.request.side_effect = lambda *args, **kwargs: calls.append('send') or ApiPooledResponse(202, '', [], b'')
+        with mock.patch.object(api_handler_event.state_store, 'set_property',
+                               side_effect=lambda *args, **kwargs: calls.append('store')) as set_property:
+            ApiHandlerEvent().process_event(self.event, 'user', 'token')
+
+        self.assertEqual(calls, ['send', 'store'])
+        set_property.assert_called_once_with('sensor', 'Alexa.ContactSensor', 'detectionState', 'DETECTED', instance=None)
@@ -0,0 +1,92 @@
+import threading
+import unittest
+from unittest import mock
+
+from endpoint_cloud.api_token_cache import ApiTokenCache
+from endpoint_cloud.tests.clock import FakeClock
+
+
+class TestApiTokenCache(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.cache = ApiTokenCache(refresh_ahead=300, clock=self.clock)
+
+    def test_fresh_tokens_are_cached(self):
+        loader = mock.Mock(return_value=('token', self.clock.now + 3600))
+        self.assertEqual(self.cache.get('user', loader), 'token')
+        self.assertEqual(self.cache.get('user', loader), 'token')
+        loader.assert_called_once_with('user')
+
+    def test_tokens_are_refreshed_ahead_of_expiry(self):
+        loader = mock.Mock(side_effect=[('old', self.clock.now + 3600), ('new', self.clock.now + 7200)])
+        self.cache.get('user', loader)
+
+        self.clock.now += 3600 - 301
+        self.assertEqual(self.cache.get('user', loader), 'old')
+        self.clock.now += 1
+        self.assertEqual(self.cache.get('user', loader), 'new')
+        self.assertEqual(loader.call_count, 2)
+
+    def test_expired_tokens_are_loaded_again(self):
+        loader = mock.Mock(side_effect=[('old', self.clock.now + 3600), ('new', self.clock.now + 7200)])
+        self.cache.get('user', loader)
+
+        self.clock.now += 4000
+        self.assertEqual(self.cache.get('user', loader), 'new')
+
+    def test_tokens_without_expiry_are_not_cached(self):
+        loader = mock.Mock(return_value=('token', None))
+        self.cache.get('user', loader)
+        self.cache.get('user', loader)
+        self.assertEqual(loader.call_count, 2)
+
+    def test_unknown_users_are_not_cached(self):
+        loader = mock.Mock(return_value=(None, None))
+        self.assertIsNone(self.cache.get('user', loader))
+        self.assertIsNone(self.cache.get('user', loader))
+        self.assertEqual(loader.call_count, 2)
+
+    def test_invalidate(self):
+        loader = mock.Mock(return_value=('token', self.clock.now + 3600))
+        self.cache.get('user', loader)
+        self.cache.invalidate('user')
+        self.cache.get('user', loader)
+        self.assertEqual(loader.call_count, 2)
+
+    def test_concurrent_callers_share_one_load(self):
+        started = threading.Event()
+        release = threading.Event()
+
+        def load(user_id):
+            started.set()
+            release.wait(5)
+            return 'token', self.clock.now + 3600
+
+        loader = mock.Mock(side_effect=load)
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(self.cache.get('user', loader)))
+            for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        self.assertTrue(started.wait(5))
+        release.set()
+        for thread in threads:
+            thread.join()
+
+        loader.assert_called_once_with('user')
+        self.assertEqual(results, ['token'] * 8)
+
+    def test_locks_do_not_grow_with_users(self):
+        cache = ApiTokenCache(clock=self.clock, lock_stripes=4)
+        for index in range(100):
+            cache.get('user-{0}'.format(index), mock.Mock(return_value=('token', self.clock.now + 3600)))
+        self.assertEqual(len(cache._user_locks), 4)
+
+    def test_expiration_round_trip(self):
+        expiration_utc = '2020-01-02T03:04:05.00Z'
+        expires_at = ApiTokenCache.parse_expiration(expiration_utc)
+        self.assertEqual(expires_at, 1577934245.0)
+        self.assertEqual(ApiTokenCache.format_expiration(expires_at), expiration_utc)
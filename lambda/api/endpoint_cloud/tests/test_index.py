@@ -0,0 +1,78 @@
+import json
+import os
+import unittest
+from unittest import mock
+
+import index
+from endpoint_cloud import api_handler_directive
+from endpoint_cloud.api_resources import ApiResources
+from endpoint_cloud.tests.dynamodb import Table
+
+
+def directive_request(directive):
+    return {
+        'path': '/directives',
+        'httpMethod': 'POST',
+        'headers': {},
+        'queryStringParameters': None,
+        'body': json.dumps(directive)
+    }
+
+
+def report_state(endpoint_id):
+    return {
+        'directive': {
+            'header': {
+                'namespace': 'Alexa',
+                'name': 'ReportState',
+                'payloadVersion': '3',
+                'messageId': 'message',
+                'correlationToken': 'correlation'
+            },
+            'endpoint': {
+                'scope': {'type': 'BearerToken', 'token': 'token'},
+                'endpointId': endpoint_id
+            },
+            'payload': {}
+        }
+    }
+
+
+class TestPostDirectives(unittest.TestCase):
+
+    def setUp(self):
+        patch = mock.patch.dict(os.environ, {'client_id': 'client', 'client_secret': 'secret'})
+        patch.start()
+        self.addCleanup(patch.stop)
+
+        self.table = Table('EndpointId')
+        patch = mock.patch.object(ApiResources, 'get_endpoint_details_table', return_value=self.table)
+        patch.start()
+        self.addCleanup(patch.stop)
+
+        api_handler_directive.state_store.invalidate()
+        self.addCleanup(api_handler_directive.state_store.invalidate)
+
+    def test_report_state_of_an_unknown_endpoint_is_a_bad_request(self):
+        response = index.handler(directive_request(report_state('missing')), None)
+        self.assertEqual(response['statusCode'], '400')
+        self.assertEqual(json.loads(response['body']), {'result': 'ERR', 'message': 'Unknown endpoint'})
+
+    def test_string_error_messages_are_returned(self):
+        request = directive_request({'directive': {'header': {'namespace': 'Alexa.Unknown', 'name': 'Unknown'}}})
+        response = index.handler(request, None)
+        self.assertEqual(response['statusCode'], '500')
+        self.assertEqual(json.loads(response['body'])['message'],
+                         'Empty Response: No response processed. Unhandled Directive.')
+
+    def test_login_with_amazon_errors_are_returned(self):
+        error = {
+            'event': {
+                'header': {'name': 'ErrorResponse'},
+                'payload': {'type': 'INTERNAL_ERROR', 'message': {'error': 'invalid', 'error_description': 'Bad token'}}
+            }
+        }
+        with mock.patch.object(api_handler_directive.ApiHandlerDirective, 'process', return_value=error):
+            response = index.handler(directive_request(report_state('sensor')), None)
+        self.assertEqual(response['statusCode'], '500')
+        self.assertEqual(json.loads(response['body'])['message'], 'Bad token')
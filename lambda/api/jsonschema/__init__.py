@@ -18,6 +18,7 @@ from jsonschema._format import (
 from jsonschema.validators import (
     Draft3Validator, Draft4Validator, RefResolver, validate
 )
+from jsonschema.compiler import CompiledValidator, compile_validator
 
 from jsonschema._version import __version__
 
@@ -0,0 +1,320 @@
+"""
+Boolean counterparts of the keyword functions in :mod:`jsonschema._validators`.
+
+Each check takes the same arguments as its keyword function but only answers
+whether the instance is valid, so :meth:`IValidator.is_valid` never builds a
+:exc:`ValidationError`, formats a message or fills an error path.
+
+"""
+
+from jsonschema import _utils, _validators
+from jsonschema.exceptions import FormatError
+from jsonschema.compat import iteritems
+
+
+def patternProperties(validator, patternProperties, instance, schema):
+    if not validator.is_type(instance, "object"):
+        return True
+
+    for pattern, subschema in iteritems(patternProperties):
+        for k, v in iteritems(instance):
+            if (
+                validator.regex_cache(pattern).search(k) and
+                not validator.is_valid(v, subschema)
+            ):
+                return False
+    return True
+
+
+def additionalProperties(validator, aP, instance, schema):
+    if not validator.is_type(instance, "object"):
+        return True
+
+    extras = _utils.find_additional_properties(
+        instance, schema, validator.regex_cache,
+    )
+
+    if validator.is_type(aP, "object"):
+        for extra in extras:
+            if not validator.is_valid(instance[extra], aP):
+                return False
+    elif not aP and any(True for _ in extras):
+        return False
+    return True
+
+
+def items(validator, items, instance, schema):
+    if not validator.is_type(instance, "array"):
+        return True
+
+    if validator.is_type(items, "object"):
+        for item in instance:
+            if not validator.is_valid(item, items):
+                return False
+    else:
+        for item, subschema in zip(instance, items):
+            if not validator.is_valid(item, subschema):
+                return False
+    return True
+
+
+def additionalItems(validator, aI, instance, schema):
+    if (
+        not validator.is_type(instance, "array") or
+        validator.is_type(schema.get("items", {}), "object")
+    ):
+        return True
+
+    len_items = len(schema.get("items", []))
+    if validator.is_type(aI, "object"):
+        for item in instance[len_items:]:
+            if not validator.is_valid(item, aI):
+                return False
+    elif not aI and len(instance) > len_items:
+        return False
+    return True
+
+
+def minimum(validator, minimum, instance, schema):
+    if not validator.is_type(instance, "number"):
+        return True
+
+    if schema.get("exclusiveMinimum", False):
+        return not instance <= minimum
+    return not instance < minimum
+
+
+def maximum(validator, maximum, instance, schema):
+    if not validator.is_type(instance, "number"):
+        return True
+
+    if schema.get("exclusiveMaximum", False):
+        return not instance >= maximum
+    return not instance > maximum
+
+
+def multipleOf(validator, dB, instance, schema):
+    if not validator.is_type(instance, "number"):
+        return True
+
+    if isinstance(dB, float):
+        quotient = instance / dB
+        return int(quotient) == quotient
+    return not instance % dB
+
+
+def minItems(validator, mI, instance, schema):
+    return not (validator.is_type(instance, "array") and len(instance) < mI)
+
+
+def maxItems(validator, mI, instance, schema):
+    return not (validator.is_type(instance, "array") and len(instance) > mI)
+
+
+def uniqueItems(validator, uI, instance, schema):
+    return not (
+        uI and
+        validator.is_type(instance, "array") and
+        not _utils.uniq(instance)
+    )
+
+
+def pattern(validator, patrn, instance, schema):
+    return not (
+        validator.is_type(instance, "string") and
+        not validator.regex_cache(patrn).search(instance)
+    )
+
+
+def format(validator, format, instance, schema):
+    if validator.format_checker is not None:
+        try:
+            validator.format_checker.check(instance, format)
+        except FormatError:
+            return False
+    return True
+
+
+def minLength(validator, mL, instance, schema):
+    return not (validator.is_type(instance, "string") and len(instance) < mL)
+
+
+def maxLength(validator, mL, instance, schema):
+    return not (validator.is_type(instance, "string") and len(instance) > mL)
+
+
+def dependencies(validator, dependencies, instance, schema):
+    if not validator.is_type(instance, "object"):
+        return True
+
+    for property, dependency in iteritems(dependencies):
+        if property not in instance:
+            continue
+
+        if validator.is_type(dependency, "object"):
+            if not validator.is_valid(instance, dependency):
+                return False
+        else:
+            for each in _utils.ensure_list(dependency):
+                if each not in instance:
+                    return False
+    return True
+
+
+def enum(validator, enums, instance, schema):
+    return _utils.in_enum(instance, enums)
+
+
+def ref(validator, ref, instance, schema):
+    resolve = getattr(validator.resolver, "resolve", None)
+    if resolve is None:
+        with validator.resolver.resolving(ref) as resolved:
+            return validator.is_valid(instance, resolved)
+
+    scope, resolved = validator.resolver.resolve(ref)
+    validator.resolver.push_scope(scope)
+
+    try:
+        return validator.is_valid(instance, resolved)
+    finally:
+        validator.resolver.pop_scope()
+
+
+def type_draft3(validator, types, instance, schema):
+    for type in _utils.ensure_list(types):
+        if type == "any":
+            return True
+        if validator.is_type(type, "object"):
+            if validator.is_valid(instance, type):
+                return True
+        elif validator.is_type(instance, type):
+            return True
+    return False
+
+
+def properties_draft3(validator, properties, instance, schema):
+    if not validator.is_type(instance, "object"):
+        return True
+
+    for property, subschema in iteritems(properties):
+        if property in instance:
+            if not validator.is_valid(instance[property], subschema):
+                return False
+        elif subschema.get("required", False):
+            return False
+    return True
+
+
+def disallow_draft3(validator, disallow, instance, schema):
+    for disallowed in _utils.ensure_list(disallow):
+        if validator.is_valid(instance, {"type": [disallowed]}):
+            return False
+    return True
+
+
+def extends_draft3(validator, extends, instance, schema):
+    if validator.is_type(extends, "object"):
+        return validator.is_valid(instance, extends)
+    for subschema in extends:
+        if not validator.is_valid(instance, subschema):
+            return False
+    return True
+
+
+def type_draft4(validator, types, instance, schema):
+    for type in _utils.ensure_list(types):
+        if validator.is_type(instance, type):
+            return True
+    return False
+
+
+def properties_draft4(validator, properties, instance, schema):
+    if not validator.is_type(instance, "object"):
+        return True
+
+    for property, subschema in iteritems(properties):
+        if (
+            property in instance and
+            not validator.is_valid(instance[property], subschema)
+        ):
+            return False
+    return True
+
+
+def required_draft4(validator, required, instance, schema):
+    if not validator.is_type(instance, "object"):
+        return True
+    for property in required:
+        if property not in instance:
+            return False
+    return True
+
+
+def minProperties_draft4(validator, mP, instance, schema):
+    return not (validator.is_type(instance, "object") and len(instance) < mP)
+
+
+def maxProperties_draft4(validator, mP, instance, schema):
+    return not (validator.is_type(instance, "object") and len(instance) > mP)
+
+
+def allOf_draft4(validator, allOf, instance, schema):
+    for subschema in allOf:
+        if not validator.is_valid(instance, subschema):
+            return False
+    return True
+
+
+def oneOf_draft4(validator, oneOf, instance, schema):
+    valid = 0
+    for subschema in oneOf:
+        if validator.is_valid(instance, subschema):
+            valid += 1
+            if valid > 1:
+                return False
+    return valid == 1
+
+
+def anyOf_draft4(validator, anyOf, instance, schema):
+    for subschema in anyOf:
+        if validator.is_valid(instance, subschema):
+            return True
+    return False
+
+
+def not_draft4(validator, not_schema, instance, schema):
+    return not validator.is_valid(instance, not_schema)
+
+
+CHECKS = {
+    _validators.patternProperties: patternProperties,
+    _validators.additionalProperties: additionalProperties,
+    _validators.items: items,
+    _validators.additionalItems: additionalItems,
+    _validators.minimum: minimum,
+    _validators.maximum: maximum,
+    _validators.multipleOf: multipleOf,
+    _validators.minItems: minItems,
+    _validators.maxItems: maxItems,
+    _validators.uniqueItems: uniqueItems,
+    _validators.pattern: pattern,
+    _validators.format: format,
+    _validators.minLength: minLength,
+    _validators.maxLength: maxLength,
+    _validators.dependencies: dependencies,
+    _validators.enum: enum,
+    _validators.ref: ref,
+    _validators.type_draft3: type_draft3,
+    _validators.properties_draft3: properties_draft3,
+    _validators.disallow_draft3: disallow_draft3,
+    _validators.extends_draft3: extends_draft3,
+    _validators.type_draft4: type_draft4,
+    _validators.properties_draft4: properties_draft4,
+    _validators.required_draft4: required_draft4,
+    _validators.minProperties_draft4: minProperties_draft4,
+    _validators.maxProperties_draft4: maxProperties_draft4,
+    _validators.allOf_draft4: allOf_draft4,
+    _validators.oneOf_draft4: oneOf_draft4,
+    _validators.anyOf_draft4: anyOf_draft4,
+    _validators.not_draft4: not_draft4,
+}
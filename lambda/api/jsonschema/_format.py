@@ -1,8 +1,11 @@
 import datetime
 import re
 import socket
+import threading
+import time
 
-from jsonschema.compat import str_types
+from jsonschema import _utils
+from jsonschema.compat import lru_cache, str_types
 from jsonschema.exceptions import FormatError
 
 
@@ -26,18 +29,41 @@ class FormatChecker(object):
         formats (iterable):
 
             The known formats to validate. This argument can be used to
-            limit which formats will be used during validation.
+            limit which formats will be used during validation, e.g. to
+            leave expensive formats out of a validator on a hot path.
+
+        cache_size (int):
+
+            If given, the results for this many string instances are
+            remembered, so checking the same string against the same format
+            again does not run its checker. Only use this with checkers
+            whose answer depends on nothing but the instance.
+
+        timed (bool):
+
+            Whether to keep :attr:`timings`, which maps each format to the
+            number of ``checks`` asked for, the number of ``calls`` made to
+            its checker and the ``seconds`` those calls took. The checker
+            may be shared between threads, so they are only updated while
+            holding :attr:`timings_lock`, which readers should hold too.
 
     """
 
     checkers = {}
 
-    def __init__(self, formats=None):
+    def __init__(self, formats=None, cache_size=0, timed=False):
         if formats is None:
             self.checkers = self.checkers.copy()
         else:
             self.checkers = dict((k, self.checkers[k]) for k in formats)
 
+        self.timings = {} if timed else None
+        self.timings_lock = threading.Lock()
+        if cache_size:
+            self._cached_result = lru_cache(cache_size)(self._result)
+        else:
+            self._cached_result = None
+
     def checks(self, format, raises=()):
         """
         Register a decorated function as validating a new format.
@@ -61,6 +87,9 @@ class FormatChecker(object):
 
         def _checks(func):
             self.checkers[format] = (func, raises)
+            cached_result = getattr(self, "_cached_result", None)
+            if cached_result is not None:
+                cached_result.cache_clear()
             return func
         return _checks
 
@@ -90,16 +119,42 @@ class FormatChecker(object):
         if format not in self.checkers:
             return
 
+        if self.timings is not None:
+            with self.timings_lock:
+                timing = self.timings.get(format)
+                if timing is None:
+                    timing = self.timings[format] = {
+                        "checks": 0, "calls": 0, "seconds": 0.0,
+                    }
+                timing["checks"] += 1
+
+        if self._cached_result is not None and isinstance(
+            instance, str_types,
+        ):
+            result, cause = self._cached_result(instance, format)
+        else:
+            result, cause = self._result(instance, format)
+        if not result:
+            raise FormatError(
+                "%r is not a %r" % (instance, format), cause=cause,
+            )
+
+    def _result(self, instance, format):
         func, raises = self.checkers[format]
         result, cause = None, None
+        start = time.time()
         try:
             result = func(instance)
         except raises as e:
             cause = e
-        if not result:
-            raise FormatError(
-                "%r is not a %r" % (instance, format), cause=cause,
-            )
+        finally:
+            if self.timings is not None:
+                seconds = time.time() - start
+                with self.timings_lock:
+                    timing = self.timings[format]
+                    timing["calls"] += 1
+                    timing["seconds"] += seconds
+        return bool(result), cause
 
     def conforms(self, instance, format):
         """
@@ -227,7 +282,7 @@ else:
 def is_regex(instance):
     if not isinstance(instance, str_types):
         return True
-    return re.compile(instance)
+    return _utils.compile_regex(instance)
 
 
 @_checks_drafts(draft3="date", raises=ValueError)
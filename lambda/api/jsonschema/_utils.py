@@ -3,13 +3,42 @@ import json
 import pkgutil
 import re
 
-from jsonschema.compat import str_types, MutableMapping, urlsplit
+from jsonschema.compat import (
+    str_types, int_types, MutableMapping, iteritems, lru_cache, urlsplit,
+)
+
+
+#: How many compiled patterns a regex cache keeps.
+REGEX_CACHE_SIZE = 1024
+
+
+def new_regex_cache():
+    """
+    ``re.compile`` behind a new bounded cache.
+
+    Each validator owns one for its ``pattern`` and ``patternProperties``
+    keywords, so that each pattern is compiled once instead of looked up in
+    :mod:`re`'s own cache.
+
+    """
+
+    return lru_cache(REGEX_CACHE_SIZE)(re.compile)
+
+
+#: The cache of the ``regex`` format, which has no validator to ask, and of
+#: :func:`find_additional_properties` when it is not given one.
+compile_regex = new_regex_cache()
 
 
 class URIDict(MutableMapping):
     """
     Dictionary which uses normalized URIs as keys.
 
+    :attr:`changes` counts the documents replaced or deleted since it was
+    created, so that caches built from its documents can tell they are stale.
+    Adding a document under a new URI is not counted, as nothing built
+    before can depend on it.
+
     """
 
     def normalize(self, uri):
@@ -18,15 +47,20 @@ class URIDict(MutableMapping):
     def __init__(self, *args, **kwargs):
         self.store = dict()
         self.store.update(*args, **kwargs)
+        self.changes = 0
 
     def __getitem__(self, uri):
         return self.store[self.normalize(uri)]
 
     def __setitem__(self, uri, value):
-        self.store[self.normalize(uri)] = value
+        uri = self.normalize(uri)
+        if uri in self.store:
+            self.changes += 1
+        self.store[uri] = value
 
     def __delitem__(self, uri):
         del self.store[self.normalize(uri)]
+        self.changes += 1
 
     def __iter__(self):
         return iter(self.store)
@@ -86,7 +120,7 @@ def format_as_index(indices):
     return "[%s]" % "][".join(repr(index) for index in indices)
 
 
-def find_additional_properties(instance, schema):
+def find_additional_properties(instance, schema, regex_cache=compile_regex):
     """
     Return the set of additional properties for the given ``instance``.
 
@@ -99,9 +133,11 @@ def find_additional_properties(instance, schema):
 
     properties = schema.get("properties", {})
     patterns = "|".join(schema.get("patternProperties", {}))
+    if patterns:
+        patterns = regex_cache(patterns)
     for property in instance:
         if property not in properties:
-            if patterns and re.search(patterns, property):
+            if patterns and patterns.search(property):
                 continue
             yield property
 
@@ -188,18 +224,85 @@ def unbool(element, true=object(), false=object()):
     return element
 
 
+_TRUE, _FALSE, _ARRAY, _OBJECT = object(), object(), object(), object()
+_SCALARS = frozenset(
+    [type(u""), type(""), float, type(None)] + list(int_types),
+)
+
+
+def freeze(value):
+    """
+    Return a hashable form of the JSON ``value``, equal to the frozen form of
+    another value exactly when JSON Schema considers the two equal.
+
+    Arrays and objects become tuples and frozensets. Booleans are set apart
+    from numbers (``True == 1`` in Python, but not in JSON Schema) however
+    deeply they are nested. Raises :exc:`TypeError` for values that are not
+    JSON and not hashable.
+
+    """
+
+    if value.__class__ in _SCALARS:
+        return value
+    elif value is True:
+        return _TRUE
+    elif value is False:
+        return _FALSE
+    elif isinstance(value, dict):
+        return _OBJECT, frozenset(
+            [(key, freeze(each)) for key, each in iteritems(value)]
+        )
+    elif isinstance(value, (list, tuple)):
+        return _ARRAY, tuple([freeze(each) for each in value])
+    hash(value)
+    return value
+
+
+_enum_sets = {}
+
+
+def in_enum(instance, enums):
+    """
+    Check whether ``instance`` is one of ``enums``, telling booleans from
+    numbers.
+
+    The frozen set of each ``enums`` is built once and kept while it is in
+    use, so each check is a hash lookup.
+
+    """
+
+    if isinstance(enums, (list, tuple)):
+        entry = _enum_sets.get(id(enums))
+        if entry is None or entry[0] is not enums:
+            try:
+                frozen = frozenset(freeze(each) for each in enums)
+            except TypeError:
+                frozen = None
+            if len(_enum_sets) >= 1024:
+                _enum_sets.clear()
+            # Holding on to enums keeps its id from being reused
+            entry = _enum_sets[id(enums)] = enums, frozen
+
+        if entry[1] is not None:
+            try:
+                return freeze(instance) in entry[1]
+            except TypeError:
+                pass
+    return instance in enums
+
+
 def uniq(container):
     """
     Check if all of a container's elements are unique.
 
-    Successively tries first to rely that the elements are hashable, then
-    falls back on them being sortable, and finally falls back on brute
-    force.
+    Successively tries first to rely on the elements being JSON (or
+    otherwise hashable), then falls back on them being sortable, and
+    finally falls back on brute force.
 
     """
 
     try:
-        return len(set(unbool(i) for i in container)) == len(container)
+        return len(set(freeze(i) for i in container)) == len(container)
     except TypeError:
         try:
             sort = sorted(unbool(i) for i in container)
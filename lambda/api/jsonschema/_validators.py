@@ -1,5 +1,3 @@
-import re
-
 from jsonschema import _utils
 from jsonschema.exceptions import FormatError, ValidationError
 from jsonschema.compat import iteritems
@@ -11,7 +9,7 @@ def patternProperties(validator, patternProperties, instance, schema):
 
     for pattern, subschema in iteritems(patternProperties):
         for k, v in iteritems(instance):
-            if re.search(pattern, k):
+            if validator.regex_cache(pattern).search(k):
                 for error in validator.descend(
                     v, subschema, path=k, schema_path=pattern,
                 ):
@@ -22,7 +20,11 @@ def additionalProperties(validator, aP, instance, schema):
     if not validator.is_type(instance, "object"):
         return
 
-    extras = set(_utils.find_additional_properties(instance, schema))
+    extras = set(
+        _utils.find_additional_properties(
+            instance, schema, validator.regex_cache,
+        ),
+    )
 
     if validator.is_type(aP, "object"):
         for extra in extras:
@@ -152,7 +154,7 @@ def uniqueItems(validator, uI, instance, schema):
 def pattern(validator, patrn, instance, schema):
     if (
         validator.is_type(instance, "string") and
-        not re.search(patrn, instance)
+        not validator.regex_cache(patrn).search(instance)
     ):
         yield ValidationError("%r does not match %r" % (instance, patrn))
 
@@ -198,7 +200,7 @@ def dependencies(validator, dependencies, instance, schema):
 
 
 def enum(validator, enums, instance, schema):
-    if instance not in enums:
+    if not _utils.in_enum(instance, enums):
         yield ValidationError("%r is not one of %r" % (instance, enums))
 
 
@@ -0,0 +1,109 @@
+"""
+Time building an :class:`ErrorTree` and finding the :func:`best_match` for
+the errors of a malformed Discover.Response-like message, against the time
+it took to find those errors.
+
+Each endpoint misses a required property and has a mistyped capability, and
+the message is matched against a ``oneOf`` of two message shapes, so errors
+are both deep and nested in ``context``::
+
+    python -m jsonschema.benchmarks.errors [--endpoints 300]
+
+"""
+
+import argparse
+import timeit
+
+from jsonschema import Draft4Validator
+from jsonschema.exceptions import ErrorTree, best_match
+
+
+ENDPOINT = {
+    "type": "object",
+    "properties": {
+        "endpointId": {"type": "string", "pattern": "^[A-Za-z0-9_-]+$"},
+        "friendlyName": {"type": "string", "maxLength": 128},
+        "capabilities": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "interface": {"type": "string"},
+                    "version": {"enum": ["3"]},
+                },
+                "required": ["interface", "version"],
+            },
+        },
+    },
+    "required": ["endpointId", "friendlyName", "capabilities"],
+}
+
+SCHEMA = {
+    "oneOf": [
+        {
+            "type": "object",
+            "properties": {
+                "payload": {
+                    "type": "object",
+                    "properties": {
+                        "endpoints": {"type": "array", "items": ENDPOINT},
+                    },
+                },
+            },
+        },
+        {"type": "object", "required": ["error"]},
+    ],
+}
+
+
+def message(endpoints):
+    return {
+        "payload": {
+            "endpoints": [
+                {
+                    "endpointId": "sensor-%d" % (index,),
+                    "capabilities": [
+                        {"interface": "Alexa.ContactSensor", "version": 3},
+                    ],
+                }
+                for index in range(endpoints)
+            ],
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__.strip().splitlines()[0],
+    )
+    parser.add_argument("--endpoints", type=int, default=300)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--number", type=int, default=20)
+    arguments = parser.parse_args()
+
+    validator = Draft4Validator(SCHEMA)
+    instance = message(arguments.endpoints)
+    errors = list(validator.iter_errors(instance))
+    deep = list(errors[0].context)
+
+    def lookup():
+        tree = ErrorTree(deep)
+        return tree["payload"]["endpoints"][0].errors
+
+    for name, function in (
+        ("iter_errors", lambda: list(validator.iter_errors(instance))),
+        ("best_match", lambda: best_match(errors)),
+        ("ErrorTree", lambda: ErrorTree(deep)),
+        ("ErrorTree, one lookup", lookup),
+        ("ErrorTree, total_errors", lambda: ErrorTree(deep).total_errors),
+    ):
+        seconds = min(
+            timeit.repeat(
+                function, repeat=arguments.repeat, number=arguments.number,
+            )
+        ) / arguments.number
+        print("%-24s %10.1f us" % (name, seconds * 1e6))
+
+
+if __name__ == "__main__":
+    main()
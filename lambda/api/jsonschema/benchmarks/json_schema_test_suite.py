@@ -0,0 +1,98 @@
+"""
+Compare the two ways of asking whether an instance is valid, over every case
+of the draft 3 and draft 4 JSON-Schema-Test-Suite.
+
+``errors`` takes the first error of :meth:`iter_errors`, which is what
+:meth:`is_valid` used to do. ``is_valid`` is the boolean-only path that never
+builds a :exc:`ValidationError`.
+
+Run with the suite checked out next to the package, or pointed to by the
+``JSON_SCHEMA_TEST_SUITE`` environment variable::
+
+    python -m jsonschema.benchmarks.json_schema_test_suite [--repeat 5]
+
+"""
+
+import argparse
+import glob
+import json
+import os
+import timeit
+
+from jsonschema import Draft3Validator, Draft4Validator
+import jsonschema
+
+
+REPO_ROOT = os.path.join(os.path.dirname(jsonschema.__file__), os.path.pardir)
+SUITE = os.getenv("JSON_SCHEMA_TEST_SUITE", os.path.join(REPO_ROOT, "json"))
+
+
+def load_cases(draft, validator_class):
+    """
+    Load the validators and instances of one draft, skipping remote refs.
+
+    """
+
+    cases = []
+    pattern = os.path.join(SUITE, "tests", draft, "*.json")
+    for filename in sorted(glob.glob(pattern)):
+        if os.path.basename(filename) == "refRemote.json":
+            continue
+        with open(filename) as test_file:
+            for case in json.load(test_file):
+                validator = validator_class(case["schema"])
+                for test in case["tests"]:
+                    cases.append((validator, test["data"]))
+    return cases
+
+
+def errors(cases):
+    for validator, instance in cases:
+        next(validator.iter_errors(instance), None) is None
+
+
+def is_valid(cases):
+    for validator, instance in cases:
+        validator.is_valid(instance)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__.strip().splitlines()[0],
+    )
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--number", type=int, default=20)
+    arguments = parser.parse_args()
+
+    if not os.path.isdir(SUITE):
+        parser.error(
+            "Can't find the JSON-Schema-Test-Suite directory. Set the "
+            "'JSON_SCHEMA_TEST_SUITE' environment variable."
+        )
+
+    for draft, validator_class in (
+        ("draft3", Draft3Validator), ("draft4", Draft4Validator),
+    ):
+        cases = load_cases(draft, validator_class)
+        timings = {}
+        for function in errors, is_valid:
+            timings[function.__name__] = min(
+                timeit.repeat(
+                    lambda: function(cases),
+                    repeat=arguments.repeat,
+                    number=arguments.number,
+                )
+            ) / (arguments.number * len(cases))
+        print(
+            "%s: %d instances, errors %.2f us, is_valid %.2f us (%.2fx)" % (
+                draft,
+                len(cases),
+                timings["errors"] * 1e6,
+                timings["is_valid"] * 1e6,
+                timings["errors"] / timings["is_valid"],
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Compare compiling ``pattern`` and ``patternProperties`` once through the
+validator's regex cache with looking them up in :mod:`re`'s own cache on every
+match, as the keywords used to.
+
+By default the whole draft 4 JSON-Schema-Test-Suite is validated. Give a
+schema and instances to measure those instead::
+
+    python -m jsonschema.benchmarks.patterns [--schema S --instance I ...]
+
+"""
+
+import argparse
+import json
+import os
+import re
+import timeit
+
+from jsonschema import Draft4Validator
+from jsonschema.benchmarks.json_schema_test_suite import SUITE, load_cases
+
+
+class SearchEachTime(object):
+    """
+    A regex cache that leaves the lookup to :func:`re.search`.
+
+    """
+
+    def __init__(self, pattern):
+        self.pattern = pattern
+
+    def search(self, string):
+        return re.search(self.pattern, string)
+
+
+def validate(cases):
+    for validator, instance in cases:
+        for _ in validator.iter_errors(instance):
+            pass
+        validator.is_valid(instance)
+
+
+def with_regex_cache(cases, regex_cache):
+    return [
+        (
+            validator.__class__(
+                validator.schema,
+                resolver=validator.resolver,
+                regex_cache=regex_cache,
+            ),
+            instance,
+        )
+        for validator, instance in cases
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__.strip().splitlines()[0],
+    )
+    parser.add_argument("--schema")
+    parser.add_argument("--instance", action="append", default=[])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--number", type=int, default=20)
+    arguments = parser.parse_args()
+
+    if arguments.schema is not None:
+        with open(arguments.schema) as schema_file:
+            validator = Draft4Validator(json.load(schema_file))
+        cases = []
+        for path in arguments.instance:
+            with open(path) as instance_file:
+                cases.append((validator, json.load(instance_file)))
+        name = arguments.schema
+    elif os.path.isdir(SUITE):
+        cases, name = load_cases("draft4", Draft4Validator), "draft4"
+    else:
+        parser.error(
+            "Can't find the JSON-Schema-Test-Suite directory. Set the "
+            "'JSON_SCHEMA_TEST_SUITE' environment variable."
+        )
+
+    timings = {}
+    for label, regex_cache in (
+        ("re.search", SearchEachTime), ("regex_cache", None),
+    ):
+        each = with_regex_cache(cases, regex_cache)
+        timings[label] = min(
+            timeit.repeat(
+                lambda: validate(each),
+                repeat=arguments.repeat,
+                number=arguments.number,
+            )
+        ) / (arguments.number * len(cases))
+    print(
+        "%s: %d instances, re.search %.2f us, regex_cache %.2f us (%.2fx)" % (
+            name,
+            len(cases),
+            timings["re.search"] * 1e6,
+            timings["regex_cache"] * 1e6,
+            timings["re.search"] / timings["regex_cache"],
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Time :meth:`is_type` against working out each answer from the validator's
+types, as it used to, and validate a boolean-heavy capability payload::
+
+    python -m jsonschema.benchmarks.types [--capabilities 50]
+
+"""
+
+import argparse
+import timeit
+
+from jsonschema import Draft4Validator
+from jsonschema.validators import _is_type
+
+
+CHECKS = [
+    (True, u"integer"),
+    (True, u"boolean"),
+    (False, u"number"),
+    (3, u"integer"),
+    (2.5, u"number"),
+    (u"foo", u"string"),
+    ({}, u"object"),
+    ([], u"array"),
+    (None, u"null"),
+]
+
+CAPABILITY = {
+    u"type": u"object",
+    u"properties": {
+        u"interface": {u"type": u"string"},
+        u"version": {u"type": u"string"},
+        u"properties": {
+            u"type": u"object",
+            u"properties": {
+                u"supported": {
+                    u"type": u"array",
+                    u"items": {
+                        u"type": u"object",
+                        u"properties": {u"name": {u"type": u"string"}},
+                    },
+                },
+                u"proactivelyReported": {u"type": u"boolean"},
+                u"retrievable": {u"type": u"boolean"},
+                u"nonControllable": {u"type": [u"boolean", u"null"]},
+            },
+        },
+    },
+}
+
+
+def payload(capabilities):
+    return [
+        {
+            u"interface": u"Alexa.ContactSensor",
+            u"version": u"3",
+            u"properties": {
+                u"supported": [{u"name": u"detectionState"}],
+                u"proactivelyReported": True,
+                u"retrievable": True,
+                u"nonControllable": False,
+            },
+        }
+        for _ in range(capabilities)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__.strip().splitlines()[0],
+    )
+    parser.add_argument("--capabilities", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--number", type=int, default=2000)
+    arguments = parser.parse_args()
+
+    validator = Draft4Validator({u"type": u"array", u"items": CAPABILITY})
+    instance = payload(arguments.capabilities)
+    types = validator._types
+
+    def is_type():
+        for instance, type in CHECKS:
+            validator.is_type(instance, type)
+
+    def uncached():
+        for instance, type in CHECKS:
+            _is_type(instance, types[type])
+
+    def validate():
+        validator.is_valid(instance)
+
+    for name, function, number in (
+        ("is_type", is_type, arguments.number),
+        ("uncached", uncached, arguments.number),
+        ("is_valid(payload)", validate, max(arguments.number // 100, 1)),
+    ):
+        seconds = min(
+            timeit.repeat(function, repeat=arguments.repeat, number=number),
+        ) / number
+        print("%-20s %10.2f us" % (name, seconds * 1e6))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Time ``uniqueItems`` and ``enum`` over 1,000-element arrays of the objects a
+Discover.Response holds, and of strings::
+
+    python -m jsonschema.benchmarks.unique_items [--items 1000]
+
+"""
+
+import argparse
+import timeit
+
+from jsonschema import Draft4Validator
+
+
+def endpoints(count):
+    return [
+        {
+            u"endpointId": u"sensor-%d" % (index,),
+            u"capabilities": [
+                {
+                    u"interface": u"Alexa.ContactSensor",
+                    u"properties": {u"retrievable": True},
+                },
+            ],
+        }
+        for index in range(count)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__.strip().splitlines()[0],
+    )
+    parser.add_argument("--items", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--number", type=int, default=10)
+    arguments = parser.parse_args()
+
+    objects = endpoints(arguments.items)
+    strings = [u"value-%d" % (index,) for index in range(arguments.items)]
+    unique = Draft4Validator({u"uniqueItems": True})
+    enum = Draft4Validator({u"items": {u"enum": strings}})
+    objects_enum = Draft4Validator({u"items": {u"enum": objects}})
+
+    for name, function in (
+        ("uniqueItems, objects", lambda: unique.is_valid(objects)),
+        ("uniqueItems, strings", lambda: unique.is_valid(strings)),
+        ("enum, strings", lambda: enum.is_valid(strings)),
+        ("enum of objects", lambda: objects_enum.is_valid(objects[-10:])),
+    ):
+        seconds = min(
+            timeit.repeat(
+                function, repeat=arguments.repeat, number=arguments.number,
+            ),
+        ) / arguments.number
+        print("%-24s %10.1f us" % (name, seconds * 1e6))
+
+
+if __name__ == "__main__":
+    main()
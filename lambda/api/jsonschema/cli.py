@@ -1,10 +1,26 @@
 from __future__ import absolute_import
+from collections import Counter, deque
 import argparse
+import gzip
+import io
+import itertools
 import json
+import multiprocessing
+import os
 import sys
+import time
 
 from jsonschema._reflect import namedAny
-from jsonschema.validators import validator_for
+from jsonschema.compiler import compile_validator
+from jsonschema.exceptions import best_match
+from jsonschema.validators import meta_schemas, validator_for
+
+
+#: How many instances a worker validates per task in batch mode
+BATCH_CHUNK_SIZE = 200
+
+#: How batch files hold their instances
+RECORD_FORMATS = "json-lines", "cloudwatch"
 
 
 def _namedAnyWithDefault(name):
@@ -31,6 +47,51 @@ parser.add_argument(
         "to validate (may be specified multiple times)"
     ),
 )
+parser.add_argument(
+    "-b", "--batch",
+    action="append",
+    dest="batches",
+    help=(
+        "a directory of JSON instances, or a JSON-lines file with one "
+        "instance per line, to validate in parallel and summarize as JSON "
+        "on stdout (may be specified multiple times)"
+    ),
+)
+parser.add_argument(
+    "--record-format",
+    choices=RECORD_FORMATS,
+    default="json-lines",
+    help=(
+        "how batch files hold their instances: one JSON document per line, "
+        "or CloudWatch Logs lines (as exported to S3, optionally gzipped) "
+        "whose message contains a JSON object"
+    ),
+)
+parser.add_argument(
+    "--max-errors",
+    type=int,
+    default=10,
+    help=(
+        "the number of invalid instances reported per batch file, each "
+        "with its best matching error (0 reports all of them)"
+    ),
+)
+parser.add_argument(
+    "-w", "--workers",
+    type=int,
+    help=(
+        "the number of processes validating batches (defaults to the "
+        "number of CPUs)"
+    ),
+)
+parser.add_argument(
+    "--start-method",
+    choices=multiprocessing.get_all_start_methods(),
+    help=(
+        "how the worker processes are started (defaults to the platform's "
+        "default, see multiprocessing)"
+    ),
+)
 parser.add_argument(
     "-F", "--error-format",
     default="{error.instance}: {error.message}\n",
@@ -78,4 +139,274 @@ def run(arguments, stdout=sys.stdout, stderr=sys.stderr):
         for error in validator.iter_errors(instance):
             stderr.write(error_format.format(error=error))
             errored = True
+
+    if arguments.get("batches"):
+        errored = run_batch(arguments, stdout=stdout, stderr=stderr) or errored
     return errored
+
+
+def run_batch(arguments, stdout=sys.stdout, stderr=sys.stderr):
+    """
+    Validate every instance of ``arguments["batches"]`` across processes.
+
+    Files are read line by line and handed to the workers in chunks, with a
+    bounded number of chunks in flight, so memory does not grow with the
+    size of the files. Each worker compiles the schema once.
+
+    For each file, the best matching error of its first ``max_errors``
+    invalid instances is written to ``stderr``, prefixed with the path and
+    line number. A summary is written to ``stdout`` as one JSON object,
+    including the number of errors found under each schema path.
+
+    """
+
+    workers = arguments.get("workers") or multiprocessing.cpu_count()
+    record_format = arguments.get("record_format") or "json-lines"
+    max_errors = arguments.get("max_errors", 10)
+    initargs = (
+        _validator_reference(arguments["validator"]),
+        arguments["schema"],
+        arguments["error_format"],
+        record_format,
+    )
+    chunks = _chunks(
+        _batch_records(arguments["batches"], record_format),
+        BATCH_CHUNK_SIZE,
+    )
+
+    summary = {
+        "instances": 0,
+        "valid": 0,
+        "invalid": 0,
+        "malformed": 0,
+        "files": {},
+        "schema_paths": Counter(),
+    }
+    start = time.time()
+    if workers == 1:
+        _init_worker(*initargs)
+        results = (_validate_chunk(chunk) for chunk in chunks)
+        _summarize(results, summary, max_errors, stderr)
+    else:
+        start_method = arguments.get("start_method")
+        context = multiprocessing.get_context(start_method)
+        pool = context.Pool(workers, _init_worker, initargs)
+        try:
+            _summarize(
+                _imap_bounded(pool, _validate_chunk, chunks, 2 * workers),
+                summary,
+                max_errors,
+                stderr,
+            )
+        finally:
+            pool.terminate()
+            pool.join()
+    seconds = time.time() - start
+
+    summary["workers"] = workers
+    summary["seconds"] = round(seconds, 3)
+    summary["instances_per_second"] = round(
+        summary["instances"] / max(seconds, 1e-6), 1,
+    )
+    stdout.write(json.dumps(summary, sort_keys=True) + "\n")
+    return bool(summary["invalid"] or summary["malformed"])
+
+
+def _summarize(results, summary, max_errors, stderr):
+    files = summary["files"]
+    for count, failures, schema_paths in results:
+        summary["instances"] += count
+        summary["schema_paths"].update(schema_paths)
+        for path, number, malformed, message in failures:
+            kind = "malformed" if malformed else "invalid"
+            summary[kind] += 1
+
+            counts = files.setdefault(path, {"invalid": 0, "malformed": 0})
+            counts[kind] += 1
+            if not max_errors or sum(counts.values()) <= max_errors:
+                stderr.write("%s: %s" % (_source(path, number), message))
+
+    for path, counts in sorted(files.items()):
+        unreported = sum(counts.values()) - max_errors
+        if max_errors and unreported > 0:
+            stderr.write(
+                "%s: %d more failing instances not reported\n" % (
+                    path, unreported,
+                ),
+            )
+    summary["valid"] = (
+        summary["instances"] - summary["invalid"] - summary["malformed"]
+    )
+
+
+def _source(path, number):
+    if number is None:
+        return path
+    return "%s:%d" % (path, number)
+
+
+def _imap_bounded(pool, function, iterable, in_flight):
+    """
+    Like :meth:`multiprocessing.Pool.imap`, without reading ``iterable``
+    further ahead than ``in_flight`` tasks.
+
+    """
+
+    pending = deque()
+    for item in iterable:
+        pending.append(pool.apply_async(function, (item,)))
+        if len(pending) >= in_flight:
+            yield pending.popleft().get()
+    while pending:
+        yield pending.popleft().get()
+
+
+def _chunks(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _batch_records(paths, record_format):
+    """
+    Yield ``(path, line number, text)`` for each record found in ``paths``.
+
+    Directories are walked for ``.json`` files, each holding one instance
+    (with no line number), and for ``.jsonl`` files. CloudWatch exports are
+    read from every file. Any file given directly is read line by line.
+
+    """
+
+    if record_format == "cloudwatch":
+        suffixes = ("",)
+    else:
+        suffixes = (".json", ".jsonl", ".jsonl.gz")
+
+    for path in paths:
+        if not os.path.isdir(path):
+            for record in _file_records(path, record_format):
+                yield record
+            continue
+
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for name in sorted(files):
+                if name.endswith(suffixes) and not name.startswith("."):
+                    file_path = os.path.join(root, name)
+                    for record in _file_records(file_path, record_format):
+                        yield record
+
+
+def _file_records(path, record_format):
+    if record_format == "json-lines" and path.endswith(".json"):
+        with open(path) as file:
+            yield path, None, file.read()
+        return
+
+    if path.endswith(".gz"):
+        file = io.TextIOWrapper(gzip.open(path), encoding="utf-8")
+    else:
+        file = open(path)
+    with file:
+        for number, line in enumerate(file, 1):
+            if line.strip():
+                yield path, number, line
+
+
+def _validator_reference(validator):
+    """
+    Refer to ``validator`` in a way that survives pickling.
+
+    Workers that are spawned rather than forked get their arguments pickled,
+    and the validators made by :func:`jsonschema.validators.create` are local
+    classes, which pickle cannot find by name. Registered validators are
+    referred to by the id of their meta schema instead, any other validator
+    has to be importable under its own name.
+
+    """
+
+    id = validator.META_SCHEMA.get(u"id")
+    if id is not None and meta_schemas.get(id) is validator:
+        return id
+    return validator
+
+
+_worker = {}
+
+
+def _init_worker(validator, schema, error_format, record_format="json-lines"):
+    if not isinstance(validator, type):
+        validator = meta_schemas[validator]
+    _worker["validator"] = compile_validator(schema, cls=validator)
+    _worker["error_format"] = error_format
+    _worker["record_format"] = record_format
+
+
+def _parse_record(text, record_format):
+    """
+    Parse the instance of a record, or return ``None`` for a CloudWatch line
+    whose message holds no JSON object.
+
+    """
+
+    if record_format == "json-lines":
+        return json.loads(text)
+
+    # <timestamp> <message>, where the message may prefix the JSON object
+    start = text.find("{")
+    if start == -1:
+        return None
+    instance, _ = _decoder.raw_decode(text, start)
+    return instance
+
+
+_decoder = json.JSONDecoder()
+
+
+def _validate_chunk(records):
+    """
+    Validate a chunk of records in a worker.
+
+    Returns the number of instances, a ``(path, line number, malformed,
+    message)`` tuple for each record that is not valid JSON or not a valid
+    instance, and the number of errors found under each schema path.
+
+    """
+
+    validator = _worker["validator"]
+    error_format = _worker["error_format"]
+    record_format = _worker["record_format"]
+
+    count = 0
+    failures = []
+    schema_paths = Counter()
+    for path, number, text in records:
+        try:
+            instance = _parse_record(text, record_format)
+        except ValueError as error:
+            count += 1
+            failures.append((path, number, True, "%s\n" % (error,)))
+            continue
+        if instance is None:
+            continue
+
+        count += 1
+        if validator.is_valid(instance):
+            continue
+
+        errors = list(validator.iter_errors(instance))
+        # Count each error where best_match would point, so that errors
+        # below oneOf and anyOf are told apart
+        schema_paths.update(
+            "/".join(
+                "%s" % (part,)
+                for part in best_match([error]).absolute_schema_path
+            )
+            for error in errors
+        )
+        message = error_format.format(error=best_match(errors))
+        failures.append((path, number, False, message))
+    return count, failures, schema_paths
@@ -0,0 +1,645 @@
+"""
+Compile a schema into plain Python code answering :meth:`is_valid`.
+
+The validators in :mod:`jsonschema.validators` interpret the schema on every
+call, dispatching each keyword through ``VALIDATORS``, maintaining the
+resolver's scope stack and yielding errors from nested generators.
+
+:func:`compile_validator` walks the schema once instead, resolving every
+``$ref`` up front, and generates one small function per subschema that
+returns ``True`` or ``False`` without building any error. Detailed reports
+are still produced by the interpreting validator it wraps.
+
+Keywords whose validator function is not one of the known draft 3 / draft 4
+functions (e.g. added with :func:`jsonschema.validators.extend`) are not
+compiled; the generated code calls the original function for them.
+
+"""
+
+import numbers
+import re
+
+from jsonschema import _utils, _validators
+from jsonschema.compat import iteritems, str_types, int_types, urljoin
+from jsonschema.exceptions import FormatError, RefResolutionError, UnknownType
+from jsonschema.validators import validator_for
+
+
+_KEYWORDS = {}
+
+
+def _compiles(*functions):
+    def _register(method):
+        for function in functions:
+            _KEYWORDS[function] = method
+        return method
+    return _register
+
+
+def _raiser(error):
+    def raise_error(instance):
+        raise error
+    return raise_error
+
+
+class _SchemaCompiler(object):
+    """
+    Generate the source of the functions for one validator's schema.
+
+    """
+
+    def __init__(self, validator):
+        self.validator = validator
+        self.resolver = validator.resolver
+        self.namespace = {
+            "FormatError": FormatError,
+            "UnknownType": UnknownType,
+            "_uniq": _utils.uniq,
+            "_freeze": _utils.freeze,
+            "iteritems": iteritems,
+            "_unknown_type": self.unknown_type,
+        }
+        self.lines = []
+        self.postlude = []
+        self.functions = {}
+        self.pending = []
+        self.constants = {}
+        self.type_checks = {}
+
+    def compile(self):
+        root_scope = self.resolver.resolution_scope
+        name = self.function(self.validator.schema, root_scope)
+        while self.pending:
+            node, scope, function_name = self.pending.pop()
+            self.emit_function(function_name, node, scope)
+
+        source = "\n".join(self.lines + self.postlude) + "\n"
+        exec(compile(source, "<jsonschema compiled>", "exec"), self.namespace)
+        return source, self.namespace[name]
+
+    def constant(self, value):
+        """
+        The name of a global holding ``value`` in the generated module.
+
+        """
+
+        key = id(value)
+        entry = self.constants.get(key)
+        if entry is None:
+            entry = self.constants[key] = ("_c%d" % len(self.constants), value)
+            self.namespace[entry[0]] = value
+        return entry[0]
+
+    def literal(self, value):
+        if isinstance(value, str_types) or (
+            isinstance(value, int_types) and not isinstance(value, bool)
+        ):
+            return repr(value)
+        return self.constant(value)
+
+    def function(self, node, scope):
+        """
+        The name of the function validating ``node`` within ``scope``.
+
+        A node that is only a ``$ref`` is replaced by the function of its
+        target, so chains of references cost no extra calls.
+
+        """
+
+        seen = set()
+        while isinstance(node, dict) and self.is_plain_ref(node):
+            key = (id(node), scope)
+            if key in seen:
+                break
+            seen.add(key)
+            try:
+                node, scope = self.resolve(node, scope)
+            except RefResolutionError as error:
+                name = self.constant(_raiser(error))
+                return name
+
+        key = (id(node), scope)
+        name = self.functions.get(key)
+        if name is None:
+            name = self.functions[key] = "_v%d" % len(self.functions)
+            # Keep the node alive, its id is part of the key
+            self.constant(node)
+            self.pending.append((node, scope, name))
+        return name
+
+    def is_plain_ref(self, node):
+        return (
+            node.get(u"$ref") is not None and
+            not node.get(u"id") and
+            self.validator.VALIDATORS.get(u"$ref") is _validators.ref
+        )
+
+    def resolve(self, node, scope):
+        with self.resolver.in_scope(scope):
+            url, resolved = self.resolver.resolve(node[u"$ref"])
+        return resolved, url
+
+    def type_check(self, type, variable="x"):
+        """
+        An expression that is true if ``variable`` is of the JSON ``type``.
+
+        """
+
+        if type not in self.validator._types:
+            return "_unknown_type(%s, %r)" % (variable, type)
+
+        names = self.type_checks.get(type)
+        if names is None:
+            pytypes = _utils.flatten(self.validator._types[type])
+            is_number = any(
+                issubclass(pytype, numbers.Number) for pytype in pytypes
+            )
+            names = self.type_checks[type] = (
+                self.constant(pytypes), is_number and bool not in pytypes,
+            )
+
+        pytypes, excludes_bool = names
+        if excludes_bool:
+            return "(isinstance(%s, %s) and %s.__class__ is not bool)" % (
+                variable, pytypes, variable,
+            )
+        return "isinstance(%s, %s)" % (variable, pytypes)
+
+    def emit_function(self, name, node, scope):
+        body = []
+        if not isinstance(node, dict):
+            # Let the interpreter fail the way it does for a broken schema
+            body.append(
+                "if not %s(x, %s):" % (
+                    self.constant(self.validator.is_valid),
+                    self.constant(node),
+                ),
+            )
+            body.append("    return False")
+        else:
+            if node.get(u"id"):
+                scope = urljoin(scope, node[u"id"])
+
+            ref = node.get(u"$ref")
+            if ref is not None:
+                keywords = [(u"$ref", ref)]
+            else:
+                keywords = iteritems(node)
+
+            for keyword, value in keywords:
+                function = self.validator.VALIDATORS.get(keyword)
+                if function is None:
+                    continue
+                method = _KEYWORDS.get(function)
+                lines = None
+                if method is not None:
+                    lines = method(self, value, node, scope)
+                if lines is None:
+                    lines = self.fallback(function, value, node, scope)
+                body.extend(lines)
+
+        self.lines.append("def %s(x):" % (name,))
+        self.lines.extend("    " + line for line in body)
+        self.lines.append("    return True")
+        self.lines.append("")
+
+    def fallback(self, function, value, node, scope):
+        """
+        Call the interpreting keyword ``function`` from the compiled code.
+
+        """
+
+        validator, resolver = self.validator, self.resolver
+
+        def keyword(instance):
+            resolver.push_scope(scope)
+            try:
+                errors = function(validator, value, instance, node) or ()
+                return next(iter(errors), None) is None
+            finally:
+                resolver.pop_scope()
+
+        return ["if not %s(x):" % self.constant(keyword), "    return False"]
+
+    @_compiles(_validators.ref)
+    def compile_ref(self, ref, node, scope):
+        try:
+            resolved, url = self.resolve(node, scope)
+        except RefResolutionError as error:
+            return ["%s(x)" % self.constant(_raiser(error))]
+        return [
+            "if not %s(x):" % self.function(resolved, url),
+            "    return False",
+        ]
+
+    @_compiles(_validators.type_draft4)
+    def compile_type(self, types, node, scope):
+        types = _utils.ensure_list(types)
+        if not all(isinstance(type, str_types) for type in types):
+            return None
+        checks = " or ".join(self.type_check(type) for type in types)
+        return ["if not (%s):" % (checks or "False"), "    return False"]
+
+    def unknown_type(self, instance, type):
+        raise UnknownType(type, instance, self.validator.schema)
+
+    @_compiles(_validators.enum)
+    def compile_enum(self, enums, node, scope):
+        if not isinstance(enums, (list, tuple)):
+            return None
+        try:
+            frozen = frozenset(_utils.freeze(each) for each in enums)
+        except TypeError:
+            return None
+
+        enum_set = self.constant(frozen)
+        lines = [
+            "try:",
+            "    if _freeze(x) not in %s:" % enum_set,
+            "        return False",
+            "except TypeError:",
+            "    if x not in %s:" % self.constant(enums),
+            "        return False",
+        ]
+        if all(isinstance(each, str_types) for each in enums):
+            # Strings freeze to themselves, so skip freezing them
+            lines = [
+                "if x.__class__ is str:",
+                "    if x not in %s:" % enum_set,
+                "        return False",
+                "else:",
+            ] + ["    " + line for line in lines]
+        return lines
+
+    @_compiles(_validators.minimum)
+    def compile_minimum(self, minimum, node, scope):
+        operator = "<=" if node.get("exclusiveMinimum", False) else "<"
+        return [
+            "if %s and x %s %s:" % (
+                self.type_check("number"), operator, self.literal(minimum),
+            ),
+            "    return False",
+        ]
+
+    @_compiles(_validators.maximum)
+    def compile_maximum(self, maximum, node, scope):
+        operator = ">=" if node.get("exclusiveMaximum", False) else ">"
+        return [
+            "if %s and x %s %s:" % (
+                self.type_check("number"), operator, self.literal(maximum),
+            ),
+            "    return False",
+        ]
+
+    @_compiles(_validators.multipleOf)
+    def compile_multiple_of(self, dB, node, scope):
+        if isinstance(dB, float):
+            return [
+                "if %s:" % self.type_check("number"),
+                "    quotient = x / %s" % self.literal(dB),
+                "    if int(quotient) != quotient:",
+                "        return False",
+            ]
+        return [
+            "if %s and x %% %s:" % (
+                self.type_check("number"), self.literal(dB),
+            ),
+            "    return False",
+        ]
+
+    def compile_length(self, type, operator, limit):
+        return [
+            "if %s and len(x) %s %s:" % (
+                self.type_check(type), operator, self.literal(limit),
+            ),
+            "    return False",
+        ]
+
+    @_compiles(_validators.minLength)
+    def compile_min_length(self, mL, node, scope):
+        return self.compile_length("string", "<", mL)
+
+    @_compiles(_validators.maxLength)
+    def compile_max_length(self, mL, node, scope):
+        return self.compile_length("string", ">", mL)
+
+    @_compiles(_validators.minItems)
+    def compile_min_items(self, mI, node, scope):
+        return self.compile_length("array", "<", mI)
+
+    @_compiles(_validators.maxItems)
+    def compile_max_items(self, mI, node, scope):
+        return self.compile_length("array", ">", mI)
+
+    @_compiles(_validators.minProperties_draft4)
+    def compile_min_properties(self, mP, node, scope):
+        return self.compile_length("object", "<", mP)
+
+    @_compiles(_validators.maxProperties_draft4)
+    def compile_max_properties(self, mP, node, scope):
+        return self.compile_length("object", ">", mP)
+
+    def regex(self, pattern):
+        try:
+            return self.constant(re.compile(pattern))
+        except (re.error, TypeError):
+            return None
+
+    @_compiles(_validators.pattern)
+    def compile_pattern(self, patrn, node, scope):
+        regex = self.regex(patrn)
+        if regex is None:
+            return None
+        return [
+            "if %s and not %s.search(x):" % (self.type_check("string"), regex),
+            "    return False",
+        ]
+
+    @_compiles(_validators.format)
+    def compile_format(self, format, node, scope):
+        if self.validator.format_checker is None:
+            return []
+        return [
+            "try:",
+            "    %s(x, %s)" % (
+                self.constant(self.validator.format_checker.check),
+                self.literal(format),
+            ),
+            "except FormatError:",
+            "    return False",
+        ]
+
+    @_compiles(_validators.uniqueItems)
+    def compile_unique_items(self, uI, node, scope):
+        if not uI:
+            return []
+        return [
+            "if %s and not _uniq(x):" % self.type_check("array"),
+            "    return False",
+        ]
+
+    @_compiles(_validators.items)
+    def compile_items(self, items, node, scope):
+        if self.validator.is_type(items, "object"):
+            return [
+                "if %s:" % self.type_check("array"),
+                "    for item in x:",
+                "        if not %s(item):" % self.function(items, scope),
+                "            return False",
+            ]
+        return [
+            "if %s:" % self.type_check("array"),
+            "    for item, check in zip(x, %s):" % self.function_tuple(
+                items, scope,
+            ),
+            "        if not check(item):",
+            "            return False",
+        ]
+
+    def function_tuple(self, nodes, scope):
+        """
+        A global holding the functions of ``nodes``, set once all exist.
+
+        """
+
+        name = "_f%d" % len(self.postlude)
+        functions = [self.function(each, scope) for each in nodes]
+        self.postlude.append("%s = (%s)" % (
+            name, "".join(function + ", " for function in functions),
+        ))
+        return name
+
+    @_compiles(_validators.additionalItems)
+    def compile_additional_items(self, aI, node, scope):
+        if self.validator.is_type(node.get("items", {}), "object"):
+            return []
+
+        len_items = len(node.get("items", []))
+        if self.validator.is_type(aI, "object"):
+            return [
+                "if %s:" % self.type_check("array"),
+                "    for item in x[%d:]:" % len_items,
+                "        if not %s(item):" % self.function(aI, scope),
+                "            return False",
+            ]
+        elif not aI:
+            return self.compile_length("array", ">", len_items)
+        return []
+
+    @_compiles(_validators.required_draft4)
+    def compile_required(self, required, node, scope):
+        if not required:
+            return []
+        return [
+            "if %s:" % self.type_check("object"),
+            "    for property in %s:" % self.constant(tuple(required)),
+            "        if property not in x:",
+            "            return False",
+        ]
+
+    @_compiles(_validators.properties_draft4)
+    def compile_properties(self, properties, node, scope):
+        lines = ["if %s:" % self.type_check("object")]
+        for property, subschema in iteritems(properties):
+            property = self.literal(property)
+            lines.extend([
+                "    if %s in x and not %s(x[%s]):" % (
+                    property, self.function(subschema, scope), property,
+                ),
+                "        return False",
+            ])
+        if len(lines) == 1:
+            return []
+        return lines
+
+    @_compiles(_validators.patternProperties)
+    def compile_pattern_properties(self, patternProperties, node, scope):
+        lines = ["if %s:" % self.type_check("object")]
+        for pattern, subschema in iteritems(patternProperties):
+            regex = self.regex(pattern)
+            if regex is None:
+                return None
+            lines.extend([
+                "    for k, v in iteritems(x):",
+                "        if %s.search(k) and not %s(v):" % (
+                    regex, self.function(subschema, scope),
+                ),
+                "            return False",
+            ])
+        if len(lines) == 1:
+            return []
+        return lines
+
+    @_compiles(_validators.additionalProperties)
+    def compile_additional_properties(self, aP, node, scope):
+        properties = self.constant(node.get("properties", {}))
+        patterns = "|".join(node.get("patternProperties", {}))
+        if patterns:
+            regex = self.regex(patterns)
+            if regex is None:
+                return None
+            extra = "k not in %s and not %s.search(k)" % (properties, regex)
+        else:
+            extra = "k not in %s" % properties
+
+        if self.validator.is_type(aP, "object"):
+            return [
+                "if %s:" % self.type_check("object"),
+                "    for k in x:",
+                "        if %s and not %s(x[k]):" % (
+                    extra, self.function(aP, scope),
+                ),
+                "            return False",
+            ]
+        elif not aP:
+            return [
+                "if %s:" % self.type_check("object"),
+                "    for k in x:",
+                "        if %s:" % extra,
+                "            return False",
+            ]
+        return []
+
+    @_compiles(_validators.dependencies)
+    def compile_dependencies(self, dependencies, node, scope):
+        lines = ["if %s:" % self.type_check("object")]
+        for property, dependency in iteritems(dependencies):
+            lines.append("    if %s in x:" % self.literal(property))
+            if self.validator.is_type(dependency, "object"):
+                lines.extend([
+                    "        if not %s(x):" % self.function(dependency, scope),
+                    "            return False",
+                ])
+            else:
+                lines.extend([
+                    "        for dependency in %s:" % self.constant(
+                        _utils.ensure_list(dependency),
+                    ),
+                    "            if dependency not in x:",
+                    "                return False",
+                ])
+        if len(lines) == 1:
+            return []
+        return lines
+
+    @_compiles(_validators.allOf_draft4)
+    def compile_all_of(self, allOf, node, scope):
+        lines = []
+        for subschema in allOf:
+            lines.extend([
+                "if not %s(x):" % self.function(subschema, scope),
+                "    return False",
+            ])
+        return lines
+
+    @_compiles(_validators.anyOf_draft4)
+    def compile_any_of(self, anyOf, node, scope):
+        checks = " or ".join(
+            "%s(x)" % self.function(subschema, scope) for subschema in anyOf
+        )
+        return ["if not (%s):" % (checks or "False"), "    return False"]
+
+    @_compiles(_validators.oneOf_draft4)
+    def compile_one_of(self, oneOf, node, scope):
+        return [
+            "valid = 0",
+            "for check in %s:" % self.function_tuple(oneOf, scope),
+            "    if check(x):",
+            "        valid += 1",
+            "        if valid > 1:",
+            "            return False",
+            "if valid != 1:",
+            "    return False",
+        ]
+
+    @_compiles(_validators.not_draft4)
+    def compile_not(self, not_schema, node, scope):
+        return [
+            "if %s(x):" % self.function(not_schema, scope),
+            "    return False",
+        ]
+
+
+def compile_schema(validator):
+    """
+    Generate a function answering ``validator.is_valid`` for its schema.
+
+    Arguments:
+
+        validator:
+
+            An instance of a validator class made by
+            :func:`jsonschema.validators.create`
+
+    Returns:
+
+        tuple: the generated source and the compiled ``is_valid`` function
+
+    """
+
+    return _SchemaCompiler(validator).compile()
+
+
+class CompiledValidator(object):
+    """
+    A validator answering :meth:`is_valid` with compiled code.
+
+    Everything producing errors (:meth:`iter_errors`, :meth:`validate` of an
+    invalid instance, ...) is delegated to the interpreting validator it
+    wraps, so error reports are exactly those of the interpreter.
+
+    Arguments:
+
+        validator:
+
+            The interpreting validator to compile
+
+    """
+
+    def __init__(self, validator):
+        self.validator = validator
+        self.source, self._is_valid = compile_schema(validator)
+
+    def __getattr__(self, name):
+        return getattr(self.validator, name)
+
+    def __repr__(self):
+        return "<CompiledValidator for %r>" % (self.validator,)
+
+    def is_valid(self, instance, _schema=None):
+        if _schema is not None and _schema is not self.validator.schema:
+            return self.validator.is_valid(instance, _schema)
+        return self._is_valid(instance)
+
+    def iter_errors(self, instance, _schema=None):
+        return self.validator.iter_errors(instance, _schema)
+
+    def validate(self, instance, _schema=None):
+        if _schema is None and self._is_valid(instance):
+            return
+        self.validator.validate(instance, _schema)
+
+
+def compile_validator(schema, cls=None, *args, **kwargs):
+    """
+    Compile a schema into a :class:`CompiledValidator`.
+
+    Arguments:
+
+        schema:
+
+            The schema to compile
+
+        cls (:class:`IValidator`):
+
+            The validator class to compile for, by default the one given by
+            the schema's :validator:`$schema`, as in :func:`validate`
+
+    Any other provided positional and keyword arguments will be passed on
+    when instantiating the ``cls``.
+
+    """
+
+    if cls is None:
+        cls = validator_for(schema)
+    return CompiledValidator(cls(schema, *args, **kwargs))
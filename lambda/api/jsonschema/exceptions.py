@@ -177,25 +177,76 @@ class FormatError(Exception):
             return self.message.encode("utf-8")
 
 
+class _PendingErrors(list):
+    """
+    Errors set aside for a child :class:`ErrorTree` that was not built yet.
+
+    """
+
+    def total_errors(self, depth):
+        """
+        Count the errors of the child at ``depth`` without building it.
+
+        Each error ends up in the errors dict of the subtree at the rest of
+        its path, keyed by validator.
+
+        """
+
+        return len(
+            set(
+                (tuple(itertools.islice(error.path, depth, None)),
+                 error.validator)
+                for error in self
+            ),
+        )
+
+
 class ErrorTree(object):
     """
     ErrorTrees make it easier to check which validations failed.
 
+    Child trees are built the first time they are accessed, so a tree over
+    many errors costs one pass over their paths' first elements.
+
     """
 
     _instance = _unset
+    _depth = 0
 
     def __init__(self, errors=()):
         self.errors = {}
         self._contents = defaultdict(self.__class__)
+        self._file(errors)
 
-        for error in errors:
-            container = self
-            for element in error.path:
-                container = container[element]
-            container.errors[error.validator] = error
+    def _file(self, errors):
+        """
+        File ``errors``, whose paths lead to this tree, here or below it.
 
-            container._instance = error.instance
+        Only called on a new tree, so every child is still pending.
+
+        """
+
+        depth, contents = self._depth, self._contents
+        for error in errors:
+            path = error.path
+            if len(path) == depth:
+                self.errors[error.validator] = error
+                self._instance = error.instance
+                continue
+
+            pending = contents.get(path[depth])
+            if pending is None:
+                pending = contents[path[depth]] = _PendingErrors()
+            pending.append(error)
+
+    def _child(self, index):
+        child = self._contents[index]
+        if isinstance(child, _PendingErrors):
+            pending, child = child, self.__class__()
+            child._depth = self._depth + 1
+            child._file(pending)
+            self._contents[index] = child
+        return child
 
     def __contains__(self, index):
         """
@@ -218,7 +269,7 @@ class ErrorTree(object):
 
         if self._instance is not _unset and index not in self:
             self._instance[index]
-        return self._contents[index]
+        return self._child(index)
 
     def __setitem__(self, index, value):
         self._contents[index] = value
@@ -249,8 +300,13 @@ class ErrorTree(object):
 
         """
 
-        child_errors = sum(len(tree) for _, tree in iteritems(self._contents))
-        return len(self.errors) + child_errors
+        total = len(self.errors)
+        for _, child in iteritems(self._contents):
+            if isinstance(child, _PendingErrors):
+                total += child.total_errors(self._depth + 1)
+            else:
+                total += child.total_errors
+        return total
 
 
 def by_relevance(weak=WEAK_MATCHES, strong=STRONG_MATCHES):
@@ -1,3 +1,8 @@
+import json
+import os
+import shutil
+import tempfile
+
 from jsonschema import Draft4Validator, ValidationError, cli
 from jsonschema.compat import StringIO
 from jsonschema.exceptions import SchemaError
@@ -133,3 +138,126 @@ class TestCLI(unittest.TestCase):
         self.assertFalse(stdout.getvalue())
         self.assertEqual(stderr.getvalue(), "1 - 9\t1 - 8\t2 - 7\t")
         self.assertEqual(exit_code, 1)
+
+
+class TestBatch(unittest.TestCase):
+    schema = {u"properties": {u"a": {u"type": u"integer"}}}
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def write(self, name, contents):
+        path = os.path.join(self.directory, name)
+        with open(path, "w") as file:
+            file.write(contents)
+        return path
+
+    def run_batch(self, batches, workers=1, **arguments):
+        arguments.update(
+            validator=Draft4Validator,
+            schema=self.schema,
+            instances=None,
+            batches=batches,
+            workers=workers,
+            error_format="{error.message}\n",
+        )
+        stdout, stderr = StringIO(), StringIO()
+        exit_code = cli.run(
+            arguments,
+            stdout=stdout,
+            stderr=stderr,
+        )
+        return exit_code, json.loads(stdout.getvalue()), stderr.getvalue()
+
+    def test_json_lines(self):
+        path = self.write("instances.jsonl", '{"a": 1}\n\n{"a": "b"}\n{\n')
+        exit_code, summary, errors = self.run_batch([path])
+        self.assertEqual(exit_code, 1)
+        self.assertEqual(
+            (
+                summary["instances"],
+                summary["valid"],
+                summary["invalid"],
+                summary["malformed"],
+            ),
+            (3, 1, 1, 1),
+        )
+        lines = errors.splitlines()
+        self.assertEqual(lines[0], "%s:3: %r is not of type %r" % (
+            path, u"b", u"integer",
+        ))
+        self.assertTrue(lines[1].startswith("%s:4: " % (path,)))
+
+    def test_directories(self):
+        self.write("one.json", '{"a": 1}')
+        self.write("two.jsonl", '{"a": 2}\n{"a": 3}\n')
+        self.write("ignored.txt", '{"a": "b"}')
+        exit_code, summary, errors = self.run_batch([self.directory])
+        self.assertEqual(exit_code, 0)
+        self.assertEqual((summary["instances"], summary["valid"]), (3, 3))
+        self.assertFalse(errors)
+
+    def test_workers(self):
+        path = self.write(
+            "instances.jsonl",
+            "".join('{"a": %d}\n' % (i,) for i in range(500)) + '{"a": ""}',
+        )
+        exit_code, summary, errors = self.run_batch([path], workers=2)
+        self.assertEqual(exit_code, 1)
+        self.assertEqual(summary["workers"], 2)
+        self.assertEqual((summary["instances"], summary["invalid"]), (501, 1))
+        self.assertTrue(errors.startswith("%s:501: " % (path,)))
+
+    def test_spawned_workers(self):
+        # Spawned workers get the validator pickled, unlike forked ones
+        path = self.write("instances.jsonl", '{"a": 1}\n{"a": ""}\n')
+        exit_code, summary, errors = self.run_batch(
+            [path], workers=2, start_method="spawn",
+        )
+        self.assertEqual(exit_code, 1)
+        self.assertEqual((summary["instances"], summary["invalid"]), (2, 1))
+        self.assertTrue(errors.startswith("%s:2: " % (path,)))
+
+    def test_max_errors(self):
+        path = self.write("instances.jsonl", '{"a": ""}\n' * 5)
+        exit_code, summary, errors = self.run_batch([path], max_errors=2)
+        self.assertEqual(summary["invalid"], 5)
+        self.assertEqual(
+            summary["files"], {path: {"invalid": 5, "malformed": 0}},
+        )
+        self.assertEqual(
+            errors.splitlines()[1:],
+            [
+                "%s:2: %r is not of type %r" % (path, u"", u"integer"),
+                "%s: 3 more failing instances not reported" % (path,),
+            ],
+        )
+
+    def test_errors_are_counted_by_schema_path(self):
+        self.schema = {
+            u"properties": {u"a": {u"type": u"integer"}},
+            u"anyOf": [{u"required": [u"b"]}, {u"required": [u"c"]}],
+        }
+        path = self.write("instances.jsonl", '{"a": "", "c": 1}\n{"a": ""}\n')
+        exit_code, summary, errors = self.run_batch([path])
+        self.assertEqual(
+            summary["schema_paths"],
+            {u"properties/a/type": 2, u"anyOf/0/required": 1},
+        )
+
+    def test_cloudwatch_records(self):
+        path = self.write(
+            "000000",
+            "2020-05-01T10:00:00.000Z START RequestId: 1\n"
+            '2020-05-01T10:00:00.001Z [DEBUG]\t1\tevent: {"a": 1}\n'
+            '2020-05-01T10:00:00.002Z [DEBUG]\t1\tevent: {"a": ""} done\n',
+        )
+        exit_code, summary, errors = self.run_batch(
+            [self.directory], record_format="cloudwatch",
+        )
+        self.assertEqual(
+            (summary["instances"], summary["valid"], summary["invalid"]),
+            (2, 1, 1),
+        )
+        self.assertTrue(errors.startswith("%s:3: " % (path,)))
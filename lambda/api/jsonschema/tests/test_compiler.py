@@ -0,0 +1,111 @@
+from jsonschema import ValidationError
+from jsonschema.compiler import CompiledValidator, compile_validator
+from jsonschema.exceptions import RefResolutionError, UnknownType
+from jsonschema.tests.compat import mock, unittest
+from jsonschema.validators import Draft3Validator, Draft4Validator, extend
+
+
+class TestCompileValidator(unittest.TestCase):
+    schema = {
+        u"definitions": {u"positive": {u"type": u"integer", u"minimum": 1}},
+        u"properties": {
+            u"count": {u"$ref": u"#/definitions/positive"},
+            u"name": {u"type": u"string", u"pattern": u"^[a-z]+$"},
+        },
+        u"required": [u"count"],
+        u"additionalProperties": False,
+    }
+
+    def test_is_valid(self):
+        validator = compile_validator(self.schema)
+        self.assertTrue(validator.is_valid({u"count": 3, u"name": u"abc"}))
+        self.assertFalse(validator.is_valid({u"count": 0}))
+        self.assertFalse(validator.is_valid({u"count": True}))
+        self.assertFalse(validator.is_valid({u"count": 1, u"name": u"A"}))
+        self.assertFalse(validator.is_valid({u"count": 1, u"other": 1}))
+        self.assertFalse(validator.is_valid({}))
+
+    def test_picks_the_validator_class_of_the_schema(self):
+        schema = {u"$schema": u"http://json-schema.org/draft-03/schema#"}
+        validator = compile_validator(schema)
+        self.assertIsInstance(validator, CompiledValidator)
+        self.assertIsInstance(validator.validator, Draft3Validator)
+
+    def test_errors_come_from_the_interpreter(self):
+        validator = compile_validator(self.schema)
+        instance = {u"count": 0, u"other": 1}
+        self.assertEqual(
+            sorted(error.message for error in validator.iter_errors(instance)),
+            sorted(
+                error.message
+                for error in Draft4Validator(self.schema).iter_errors(instance)
+            ),
+        )
+        with self.assertRaises(ValidationError):
+            validator.validate(instance)
+
+    def test_valid_instances_skip_the_interpreter(self):
+        validator = compile_validator(self.schema)
+        interpreter = validator.validator
+        with mock.patch.object(interpreter, "iter_errors") as iter_errors:
+            validator.validate({u"count": 1})
+        self.assertFalse(iter_errors.called)
+
+    def test_other_schemas_are_interpreted(self):
+        validator = compile_validator(self.schema)
+        self.assertTrue(validator.is_valid(u"foo", {u"type": u"string"}))
+        self.assertFalse(validator.is_valid(12, {u"type": u"string"}))
+
+    def test_source_is_kept(self):
+        validator = compile_validator({u"type": u"string"})
+        self.assertIn(u"def ", validator.source)
+
+    def test_extended_keywords_are_called(self):
+        def even(validator, value, instance, schema):
+            if value and instance % 2:
+                yield ValidationError("%r is odd" % (instance,))
+
+        Validator = extend(Draft4Validator, {u"even": even})
+        validator = compile_validator(
+            {u"type": u"integer", u"even": True}, cls=Validator,
+        )
+        self.assertTrue(validator.is_valid(2))
+        self.assertFalse(validator.is_valid(3))
+        self.assertFalse(validator.is_valid(u"foo"))
+
+    def test_custom_types(self):
+        validator = compile_validator(
+            {u"type": u"array"}, types={u"array": (list, tuple)},
+        )
+        self.assertTrue(validator.is_valid((1, 2)))
+        self.assertFalse(validator.is_valid({}))
+
+    def test_unknown_types_fail_when_reached(self):
+        validator = compile_validator(
+            {u"anyOf": [{u"type": u"string"}, {u"type": u"carrot"}]},
+        )
+        self.assertTrue(validator.is_valid(u"foo"))
+        with self.assertRaises(UnknownType):
+            validator.is_valid(12)
+
+    def test_unresolvable_refs_fail_when_reached(self):
+        validator = compile_validator(
+            {
+                u"properties": {
+                    u"foo": {u"$ref": u"#/definitions/missing"},
+                },
+            },
+        )
+        self.assertTrue(validator.is_valid({u"bar": 1}))
+        with self.assertRaises(RefResolutionError):
+            validator.is_valid({u"foo": 1})
+
+    def test_recursive_refs(self):
+        schema = {
+            u"type": u"object",
+            u"properties": {u"child": {u"$ref": u"#"}},
+            u"additionalProperties": False,
+        }
+        validator = compile_validator(schema)
+        self.assertTrue(validator.is_valid({u"child": {u"child": {}}}))
+        self.assertFalse(validator.is_valid({u"child": {u"child": 1}}))
@@ -286,6 +286,31 @@ class TestErrorTree(unittest.TestCase):
         tree = exceptions.ErrorTree([error])
         self.assertIsInstance(tree["foo"], exceptions.ErrorTree)
 
+    def test_children_are_built_when_accessed(self):
+        errors = [
+            exceptions.ValidationError("1", validator="foo", path=["bar", 0]),
+            exceptions.ValidationError("2", validator="foo", path=["baz"]),
+        ]
+        tree = exceptions.ErrorTree(errors)
+        with mock.patch.object(exceptions.ErrorTree, "_file") as _file:
+            self.assertIn("bar", tree)
+            self.assertEqual(sorted(tree), ["bar", "baz"])
+            self.assertEqual(tree.total_errors, 2)
+        self.assertFalse(_file.called)
+        self.assertEqual(tree["bar"][0].errors, {"foo": errors[0]})
+
+    def test_total_errors_counts_each_validator_once_per_path(self):
+        errors = [
+            exceptions.ValidationError("1", validator="foo", path=["bar", 0]),
+            exceptions.ValidationError("2", validator="foo", path=["bar", 0]),
+            exceptions.ValidationError("3", validator="baz", path=["bar", 0]),
+            exceptions.ValidationError("4", validator="foo", path=["bar"]),
+        ]
+        lazy = exceptions.ErrorTree(errors)
+        built = exceptions.ErrorTree(errors)
+        built["bar"][0]
+        self.assertEqual((lazy.total_errors, built.total_errors), (3, 3))
+
 
 class TestErrorInitReprStr(unittest.TestCase):
     def make_error(self, **kwargs):
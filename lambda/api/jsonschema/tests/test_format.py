@@ -3,6 +3,8 @@ Tests for the parts of jsonschema related to the :validator:`format` property.
 
 """
 
+import threading
+
 from jsonschema.tests.compat import mock, unittest
 
 from jsonschema import FormatError, ValidationError, FormatChecker
@@ -61,3 +63,68 @@ class TestFormatChecker(unittest.TestCase):
             validator.validate("bar")
 
         self.assertIs(cm.exception.__cause__, cause)
+
+    def test_it_remembers_results_for_strings(self):
+        checker = FormatChecker(formats=(), cache_size=10)
+        checker.checks("foo")(self.fn)
+        self.fn.return_value = True
+
+        checker.check("bar", "foo")
+        checker.check("bar", "foo")
+        checker.check(12, "foo")
+        checker.check(12, "foo")
+        self.assertEqual(
+            self.fn.call_args_list,
+            [mock.call("bar"), mock.call(12), mock.call(12)],
+        )
+
+    def test_remembered_failures_keep_their_cause(self):
+        checker = FormatChecker(formats=(), cache_size=10)
+        checker.checks("foo", raises=ValueError)(self.fn)
+        cause = self.fn.side_effect = ValueError()
+
+        for _ in range(2):
+            with self.assertRaises(FormatError) as cm:
+                checker.check("bar", "foo")
+            self.assertIs(cm.exception.cause, cause)
+        self.assertEqual(self.fn.call_count, 1)
+
+    def test_registering_a_checker_forgets_results(self):
+        checker = FormatChecker(formats=(), cache_size=10)
+        checker.checks("foo")(mock.Mock(return_value=False))
+        self.assertFalse(checker.conforms("bar", "foo"))
+        checker.checks("foo")(mock.Mock(return_value=True))
+        self.assertTrue(checker.conforms("bar", "foo"))
+
+    def test_timings(self):
+        checker = FormatChecker(formats=(), cache_size=10, timed=True)
+        checker.checks("foo")(self.fn)
+
+        for _ in range(3):
+            checker.conforms("bar", "foo")
+        checker.conforms("bar", "unknown")
+
+        self.assertEqual(list(checker.timings), ["foo"])
+        timing = checker.timings["foo"]
+        self.assertEqual((timing["checks"], timing["calls"]), (3, 1))
+        self.assertGreaterEqual(timing["seconds"], 0)
+
+    def test_timings_add_up_across_threads(self):
+        checker = FormatChecker(formats=(), timed=True)
+        checker.checks("foo")(lambda instance: True)
+
+        def check():
+            for _ in range(2000):
+                checker.check("bar", "foo")
+
+        threads = [threading.Thread(target=check) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        timing = checker.timings["foo"]
+        self.assertEqual((timing["checks"], timing["calls"]), (16000, 16000))
+
+    def test_it_is_not_timed_by_default(self):
+        self.assertIsNone(FormatChecker().timings)
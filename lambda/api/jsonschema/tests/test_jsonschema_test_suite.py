@@ -28,6 +28,7 @@ from jsonschema import (
     Draft4Validator, FormatChecker, draft3_format_checker,
     draft4_format_checker, validate,
 )
+from jsonschema.compiler import compile_validator
 from jsonschema.compat import PY3
 from jsonschema.tests.compat import mock, unittest
 import jsonschema
@@ -56,8 +57,17 @@ with closing(remotes_stdout):
     REMOTES = json.load(remotes_stdout)
 
 
-def make_case(schema, data, valid, name):
-    if valid:
+def make_case(schema, data, valid, name, compiled=False):
+    if compiled:
+        def test_case(self):
+            kwargs = getattr(self, "validator_kwargs", {})
+            interpreted = self.validator_class(schema, **kwargs)
+            validator = compile_validator(
+                schema, cls=self.validator_class, **kwargs
+            )
+            self.assertEqual(validator.is_valid(data), valid)
+            self.assertEqual(interpreted.is_valid(data), valid)
+    elif valid:
         def test_case(self):
             kwargs = getattr(self, "validator_kwargs", {})
             validate(data, schema, cls=self.validator_class, **kwargs)
@@ -82,7 +92,9 @@ def maybe_skip(skip, test_case, case, test):
     return test_case
 
 
-def load_json_cases(tests_glob, ignore_glob="", basedir=TESTS_DIR, skip=None):
+def load_json_cases(
+    tests_glob, ignore_glob="", basedir=TESTS_DIR, skip=None, compiled=False,
+):
     if ignore_glob:
         ignore_glob = os.path.join(basedir, ignore_glob)
 
@@ -111,6 +123,7 @@ def load_json_cases(tests_glob, ignore_glob="", basedir=TESTS_DIR, skip=None):
                             schema=case["schema"],
                             valid=test["valid"],
                             name=name,
+                            compiled=compiled,
                         )
                         test_case = maybe_skip(skip, test_case, case, test)
                         setattr(test_class, name, test_case)
@@ -288,3 +301,53 @@ class Draft3RemoteResolution(RemoteRefResolutionMixin, unittest.TestCase):
 @load_json_cases("draft4/refRemote.json")
 class Draft4RemoteResolution(RemoteRefResolutionMixin, unittest.TestCase):
     validator_class = Draft4Validator
+
+
+@load_json_cases(
+    "draft3/*.json",
+    skip=narrow_unicode_build,
+    ignore_glob="draft3/refRemote.json",
+    compiled=True,
+)
+@load_json_cases(
+    "draft3/optional/format.json",
+    skip=missing_format(draft3_format_checker),
+    compiled=True,
+)
+@load_json_cases("draft3/optional/bignum.json", compiled=True)
+@load_json_cases("draft3/optional/zeroTerminatedFloats.json", compiled=True)
+class TestDraft3Compiled(unittest.TestCase):
+    validator_class = Draft3Validator
+    validator_kwargs = {"format_checker": draft3_format_checker}
+
+
+@load_json_cases(
+    "draft4/*.json",
+    skip=narrow_unicode_build,
+    ignore_glob="draft4/refRemote.json",
+    compiled=True,
+)
+@load_json_cases(
+    "draft4/optional/format.json",
+    skip=missing_format(draft4_format_checker),
+    compiled=True,
+)
+@load_json_cases("draft4/optional/bignum.json", compiled=True)
+@load_json_cases("draft4/optional/zeroTerminatedFloats.json", compiled=True)
+class TestDraft4Compiled(unittest.TestCase):
+    validator_class = Draft4Validator
+    validator_kwargs = {"format_checker": draft4_format_checker}
+
+
+@load_json_cases("draft3/refRemote.json", compiled=True)
+class Draft3RemoteResolutionCompiled(
+    RemoteRefResolutionMixin, unittest.TestCase,
+):
+    validator_class = Draft3Validator
+
+
+@load_json_cases("draft4/refRemote.json", compiled=True)
+class Draft4RemoteResolutionCompiled(
+    RemoteRefResolutionMixin, unittest.TestCase,
+):
+    validator_class = Draft4Validator
@@ -1,8 +1,10 @@
 from collections import deque
 from contextlib import contextmanager
 import json
+import re
 
-from jsonschema import FormatChecker, ValidationError
+from jsonschema import FormatChecker, ValidationError, _utils
+from jsonschema.compiler import compile_validator
 from jsonschema.tests.compat import mock, unittest
 from jsonschema.validators import (
     RefResolutionError, UnknownType, Draft3Validator,
@@ -640,6 +642,68 @@ class ValidatorTestMixin(object):
                 self.validator.is_valid(self.instance, self.schema)
             )
 
+    def test_is_valid_does_not_create_errors(self):
+        schema = {
+            "properties": {"foo": {"type": "integer", "minimum": 3}},
+            "additionalProperties": False,
+            "anyOf": [{"required": ["foo"]}, {"maxProperties": 0}],
+        }
+        validator = self.validator_class(schema)
+
+        with mock.patch(
+            "jsonschema._validators.ValidationError",
+        ) as ValidationError:
+            self.assertFalse(validator.is_valid({"foo": 2}))
+            self.assertFalse(validator.is_valid({"foo": 3, "bar": 3}))
+            self.assertTrue(validator.is_valid({"foo": 3}))
+            self.assertTrue(validator.is_valid({}))
+
+        self.assertFalse(ValidationError.called)
+
+    def test_is_valid_runs_keywords_without_a_check(self):
+        def even(validator, value, instance, schema):
+            if value and instance % 2:
+                yield ValidationError("%r is odd" % (instance,))
+
+        Validator = extend(self.validator_class, {u"even": even})
+        validator = Validator({u"items": {u"even": True}})
+        self.assertTrue(validator.is_valid([2, 4]))
+        self.assertFalse(validator.is_valid([2, 3]))
+
+    def test_it_compiles_patterns_with_its_regex_cache(self):
+        schema = {
+            "pattern": "^a",
+            "patternProperties": {"^b": {}},
+            "additionalProperties": False,
+        }
+        regex_cache = mock.Mock(side_effect=re.compile)
+        validator = self.validator_class(schema, regex_cache=regex_cache)
+        self.assertTrue(validator.is_valid("abc"))
+        self.assertFalse(validator.is_valid({"c": 1}))
+        self.assertEqual(
+            list(validator.iter_errors("cba"))[0].message,
+            "%r does not match %r" % ("cba", "^a"),
+        )
+        self.assertEqual(
+            set(call[0][0] for call in regex_cache.call_args_list),
+            set(["^a", "^b"]),
+        )
+
+    def test_each_validator_owns_its_regex_cache(self):
+        self.assertIsNot(
+            self.validator.regex_cache,
+            self.validator_class({}).regex_cache,
+        )
+
+    def test_the_regex_cache_is_bounded(self):
+        validator = self.validator_class({})
+        for index in range(_utils.REGEX_CACHE_SIZE + 10):
+            validator.regex_cache("^%d$" % (index,))
+        self.assertEqual(
+            validator.regex_cache.cache_info().currsize,
+            _utils.REGEX_CACHE_SIZE,
+        )
+
     def test_non_existent_properties_are_ignored(self):
         instance, my_property, my_value = mock.Mock(), mock.Mock(), mock.Mock()
         validate(instance=instance, schema={my_property: my_value})
@@ -691,6 +755,23 @@ class ValidatorTestMixin(object):
         with self.assertRaises(UnknownType):
             self.validator.is_type("foo", object())
 
+    def test_is_type_remembers_answers_per_class(self):
+        self.assertTrue(self.validator.is_type(True, "boolean"))
+        with mock.patch("jsonschema.validators._is_type") as _is_type:
+            self.assertTrue(self.validator.is_type(False, "boolean"))
+            self.assertTrue(
+                self.validator_class({}).is_type(True, "boolean"),
+            )
+        self.assertFalse(_is_type.called)
+
+        with self.assertRaises(UnknownType):
+            self.validator.is_type(True, "carrot")
+
+    def test_custom_types_do_not_share_answers(self):
+        custom = self.validator_class({}, types={"array": (list, tuple)})
+        self.assertTrue(custom.is_type((1,), "array"))
+        self.assertFalse(self.validator.is_type((1,), "array"))
+
 
 class TestDraft3Validator(ValidatorTestMixin, unittest.TestCase):
     validator_class = Draft3Validator
@@ -900,6 +981,57 @@ class TestRefResolver(unittest.TestCase):
             pass
         self.assertEqual(foo_handler.call_count, 1)
 
+    def test_resolved_fragments_are_cached(self):
+        schema = {"definitions": {"foo": {"type": "integer"}}}
+        resolver = RefResolver.from_schema(schema)
+        with mock.patch.object(
+            resolver, "resolve_fragment", wraps=resolver.resolve_fragment,
+        ) as resolve_fragment:
+            for _ in range(3):
+                with resolver.resolving("#/definitions/foo") as resolved:
+                    self.assertEqual(resolved, {"type": "integer"})
+        self.assertEqual(resolve_fragment.call_count, 1)
+        self.assertEqual((resolver.cache_hits, resolver.cache_misses), (2, 1))
+
+    def test_changing_the_store_clears_the_cache(self):
+        resolver = RefResolver("", {})
+        resolver.store[self.stored_uri] = {"foo": 1}
+        with resolver.resolving(self.stored_uri + "#/foo") as resolved:
+            self.assertEqual(resolved, 1)
+        resolver.store[self.stored_uri] = {"foo": 2}
+        with resolver.resolving(self.stored_uri + "#/foo") as resolved:
+            self.assertEqual(resolved, 2)
+        self.assertEqual((resolver.cache_hits, resolver.cache_misses), (0, 2))
+
+    def test_adding_to_the_store_keeps_the_cache(self):
+        resolver = RefResolver("", {})
+        resolver.store[self.stored_uri] = {"foo": 1}
+        with resolver.resolving(self.stored_uri + "#/foo"):
+            pass
+        resolver.store["http://example.com/other"] = {}
+        with resolver.resolving(self.stored_uri + "#/foo") as resolved:
+            self.assertEqual(resolved, 1)
+        self.assertEqual((resolver.cache_hits, resolver.cache_misses), (1, 1))
+
+    def test_deleting_from_the_store_clears_the_cache(self):
+        resolver = RefResolver("", {})
+        resolver.store[self.stored_uri] = {"foo": 1}
+        with resolver.resolving(self.stored_uri + "#/foo"):
+            pass
+        del resolver.store[self.stored_uri]
+        resolver.store[self.stored_uri] = {"foo": 2}
+        with resolver.resolving(self.stored_uri + "#/foo") as resolved:
+            self.assertEqual(resolved, 2)
+
+    def test_cached_remote_documents_stay_cached(self):
+        foo_handler = mock.Mock(return_value={"foo": 1})
+        resolver = RefResolver("", {}, handlers={"foo": foo_handler})
+        for _ in range(3):
+            with resolver.resolving("foo://bar#/foo") as resolved:
+                self.assertEqual(resolved, 1)
+        self.assertEqual(foo_handler.call_count, 1)
+        self.assertEqual((resolver.cache_hits, resolver.cache_misses), (2, 1))
+
     def test_if_you_give_it_junk_you_get_a_resolution_error(self):
         ref = "foo://bar"
         foo_handler = mock.Mock(side_effect=ValueError("Oh no! What's this?"))
@@ -943,6 +1075,53 @@ class TestDraft3UniqueTupleItems(UniqueTupleItemsMixin, unittest.TestCase):
     validator_class = Draft3Validator
 
 
+class TestBooleansAreNotNumbers(unittest.TestCase):
+    """
+    ``True == 1`` and ``False == 0`` in Python, but not in JSON Schema.
+
+    """
+
+    cases = [
+        ({u"enum": [1]}, True, False),
+        ({u"enum": [True]}, 1, False),
+        ({u"enum": [0, None]}, False, False),
+        ({u"enum": [1]}, 1.0, True),
+        ({u"enum": [[1]]}, [True], False),
+        ({u"enum": [{u"a": 1}]}, {u"a": True}, False),
+        ({u"enum": [{u"a": [1, 2]}]}, {u"a": [1.0, 2]}, True),
+        ({u"uniqueItems": True}, [1, True], True),
+        ({u"uniqueItems": True}, [0, False], True),
+        ({u"uniqueItems": True}, [[1], [True]], True),
+        ({u"uniqueItems": True}, [{u"a": 0}, {u"a": False}], True),
+        (
+            {u"uniqueItems": True},
+            [{u"a": 1, u"b": 2}, {u"b": 2, u"a": 1}],
+            False,
+        ),
+        ({u"uniqueItems": True}, [[1, [True]], [1.0, [True]]], False),
+    ]
+
+    def test_validators(self):
+        for schema, instance, valid in self.cases:
+            for validator in (
+                Draft4Validator(schema),
+                compile_validator(schema, cls=Draft4Validator),
+            ):
+                errors = list(validator.iter_errors(instance))
+                self.assertEqual(
+                    (validator.is_valid(instance), not errors),
+                    (valid, valid),
+                    msg="%r with %r" % (instance, schema),
+                )
+
+    def test_large_arrays_of_unhashable_items(self):
+        items = [{u"endpointId": u"sensor-%d" % i} for i in range(1000)]
+        validator = Draft4Validator({u"uniqueItems": True})
+        self.assertTrue(validator.is_valid(items))
+        items.append({u"endpointId": u"sensor-0"})
+        self.assertFalse(validator.is_valid(items))
+
+
 def sorted_errors(errors):
     def key(error):
         return (
@@ -9,7 +9,7 @@ try:
 except ImportError:
     requests = None
 
-from jsonschema import _utils, _validators
+from jsonschema import _checks, _utils, _validators
 from jsonschema.compat import (
     Sequence, urljoin, urlsplit, urldefrag, unquote, urlopen,
     str_types, int_types, iteritems, lru_cache,
@@ -20,6 +20,9 @@ from jsonschema.exceptions import RefResolutionError, SchemaError, UnknownType
 
 _unset = _utils.Unset()
 
+#: How many Python classes a type table remembers
+_TYPE_TABLE_SIZE = 256
+
 validators = {}
 meta_schemas = _utils.URIDict()
 
@@ -51,6 +54,18 @@ def validates(version):
     return _validates
 
 
+def _is_type(instance, pytypes):
+    # bool inherits from int, so ensure bools aren't reported as ints
+    if isinstance(instance, bool):
+        pytypes = _utils.flatten(pytypes)
+        is_number = any(
+            issubclass(pytype, numbers.Number) for pytype in pytypes
+        )
+        if is_number and bool not in pytypes:
+            return False
+    return isinstance(instance, pytypes)
+
+
 def create(meta_schema, validators=(), version=None, default_types=None):  # noqa: C901, E501
     if default_types is None:
         default_types = {
@@ -59,21 +74,37 @@ def create(meta_schema, validators=(), version=None, default_types=None):  # noq
             u"string": str_types,
         }
 
+    # Python class -> JSON type -> whether instances of the class are of it,
+    # for each Validator class using its DEFAULT_TYPES
+    type_tables = {}
+
     class Validator(object):
         VALIDATORS = dict(validators)
         META_SCHEMA = dict(meta_schema)
         DEFAULT_TYPES = dict(default_types)
 
         def __init__(
-            self, schema, types=(), resolver=None, format_checker=None,
+            self,
+            schema,
+            types=(),
+            resolver=None,
+            format_checker=None,
+            regex_cache=None,
         ):
             self._types = dict(self.DEFAULT_TYPES)
             self._types.update(types)
+            if types:
+                self._type_table = {}
+            else:
+                self._type_table = type_tables.setdefault(self.__class__, {})
 
             if resolver is None:
                 resolver = RefResolver.from_schema(schema)
+            if regex_cache is None:
+                regex_cache = _utils.new_regex_cache()
 
             self.resolver = resolver
+            self.regex_cache = regex_cache
             self.format_checker = format_checker
             self.schema = schema
 
@@ -130,23 +161,63 @@ def create(meta_schema, validators=(), version=None, default_types=None):  # noq
                 raise error
 
         def is_type(self, instance, type):
+            try:
+                return self._type_table[instance.__class__][type]
+            except KeyError:
+                pass
+
             if type not in self._types:
                 raise UnknownType(type, instance, self.schema)
-            pytypes = self._types[type]
+            result = _is_type(instance, self._types[type])
 
-            # bool inherits from int, so ensure bools aren't reported as ints
-            if isinstance(instance, bool):
-                pytypes = _utils.flatten(pytypes)
-                is_number = any(
-                    issubclass(pytype, numbers.Number) for pytype in pytypes
-                )
-                if is_number and bool not in pytypes:
-                    return False
-            return isinstance(instance, pytypes)
+            # The answer only depends on the instance's class, so remember it
+            if len(self._type_table) < _TYPE_TABLE_SIZE:
+                table = self._type_table.setdefault(instance.__class__, {})
+                table[type] = result
+            return result
 
         def is_valid(self, instance, _schema=None):
-            error = next(self.iter_errors(instance, _schema), None)
-            return error is None
+            iter_errors = self.iter_errors
+            if getattr(iter_errors, "__func__", None) is not _iter_errors:
+                # iter_errors was replaced, answer the way it does
+                return next(iter_errors(instance, _schema), None) is None
+
+            if _schema is None:
+                _schema = self.schema
+
+            scope = _schema.get(u"id")
+            if scope:
+                self.resolver.push_scope(scope)
+            try:
+                ref = _schema.get(u"$ref")
+                if ref is not None:
+                    validators = [(u"$ref", ref)]
+                else:
+                    validators = iteritems(_schema)
+
+                for k, v in validators:
+                    validator = self.VALIDATORS.get(k)
+                    if validator is None:
+                        continue
+
+                    check = _checks.CHECKS.get(validator)
+                    if check is not None:
+                        if not check(self, v, instance, _schema):
+                            return False
+                        continue
+
+                    # No boolean counterpart, stop at the first error
+                    errors = validator(self, v, instance, _schema) or ()
+                    if next(iter(errors), None) is not None:
+                        return False
+                return True
+            finally:
+                if scope:
+                    self.resolver.pop_scope()
+
+    _iter_errors = getattr(
+        Validator.iter_errors, "__func__", Validator.iter_errors,
+    )
 
     if version is not None:
         Validator = validates(version)(Validator)
@@ -264,7 +335,11 @@ class RefResolver(object):
         remote_cache (functools.lru_cache):
 
             A cache that will be used for caching the results of
-            resolved remote URLs.
+            resolved remote URLs. By default, resolved URLs are kept in
+            the resolver's own cache of ``(document URL, fragment)``
+            pairs, which is emptied whenever a document in :attr:`store`
+            is replaced or deleted.
+            :attr:`cache_hits` and :attr:`cache_misses` count its lookups.
 
     """
 
@@ -281,7 +356,7 @@ class RefResolver(object):
         if urljoin_cache is None:
             urljoin_cache = lru_cache(1024)(urljoin)
         if remote_cache is None:
-            remote_cache = lru_cache(1024)(self.resolve_from_url)
+            remote_cache = self.resolve_from_url
 
         self.referrer = referrer
         self.cache_remote = cache_remote
@@ -298,6 +373,11 @@ class RefResolver(object):
         self._urljoin_cache = urljoin_cache
         self._remote_cache = remote_cache
 
+        self._fragment_cache = {}
+        self._fragment_cache_changes = self.store.changes
+        self.cache_hits = 0
+        self.cache_misses = 0
+
     @classmethod
     def from_schema(cls, schema, *args, **kwargs):
         """
@@ -375,16 +455,44 @@ class RefResolver(object):
         return url, self._remote_cache(url)
 
     def resolve_from_url(self, url):
-        url, fragment = urldefrag(url)
+        # The full URL is the (document URL, fragment) pair, so it keys
+        # the cache without being split on every hit.
+        if self._fragment_cache_changes != self.store.changes:
+            self.clear_cache()
+        try:
+            resolved = self._fragment_cache[url]
+        except KeyError:
+            self.cache_misses += 1
+        else:
+            self.cache_hits += 1
+            return resolved
+
+        document_url, fragment = urldefrag(url)
         try:
-            document = self.store[url]
+            document = self.store[document_url]
         except KeyError:
             try:
-                document = self.resolve_remote(url)
+                document = self.resolve_remote(document_url)
             except Exception as exc:
                 raise RefResolutionError(exc)
 
-        return self.resolve_fragment(document, fragment)
+        resolved = self.resolve_fragment(document, fragment)
+        if self._fragment_cache_changes == self.store.changes:
+            self._fragment_cache[url] = resolved
+        return resolved
+
+    def clear_cache(self):
+        """
+        Forget every resolved ``(document URL, fragment)`` pair.
+
+        Called automatically when a document in :attr:`store` is replaced
+        or deleted, so it is only needed after mutating a stored document
+        in place.
+
+        """
+
+        self._fragment_cache.clear()
+        self._fragment_cache_changes = self.store.changes
 
     def resolve_fragment(self, document, fragment):
         """
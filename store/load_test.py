@@ -0,0 +1,106 @@
+"""
+Mixed GET/PATCH load against a running store, reporting throughput and lock errors.
+
+Every process creates its share of --keys entries (existing keys are left alone), then loops over GET /entry/<key>
+and PATCH /entry/<key> until --seconds have passed. Start the store first, e.g. with `uwsgi --ini store.ini`:
+
+    python load_test.py [--url http://localhost:9091] [--processes 4] [--seconds 10] [--patch-ratio 0.2]
+"""
+
+import argparse
+import json
+import multiprocessing
+import random
+import time
+import urllib.error
+import urllib.request
+
+KEY_PREFIX = 'load-test-'
+
+
+def send(url, method, data=None):
+    body = None if data is None else json.dumps(data).encode('utf-8')
+    req = urllib.request.Request(url, data=body, method=method)
+    try:
+        with urllib.request.urlopen(req, timeout=30) as response:
+            response.read()
+            return response.status, ''
+    except urllib.error.HTTPError as error:
+        return error.code, error.read().decode('utf-8', 'replace')
+    except (urllib.error.URLError, OSError) as error:
+        return None, str(error)
+
+
+def create_keys(url, keys):
+    for key in keys:
+        send('{}/entries'.format(url), 'POST', {'key': key, 'value': 0})
+
+
+def worker(args):
+    url, keys, seconds, patch_ratio, seed = args
+    rng = random.Random(seed)
+    counts = {'get': 0, 'patch': 0, 'locked': 0, 'errors': 0}
+    latencies = []
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        key = rng.choice(keys)
+        start = time.perf_counter()
+        if rng.random() < patch_ratio:
+            counts['patch'] += 1
+            status, body = send('{}/entry/{}'.format(url, key), 'PATCH', {'value': rng.randint(0, 1000)})
+        else:
+            counts['get'] += 1
+            status, body = send('{}/entry/{}'.format(url, key), 'GET')
+        latencies.append(time.perf_counter() - start)
+        if status == 503 or 'database is locked' in body:
+            counts['locked'] += 1
+        elif status != 200:
+            counts['errors'] += 1
+    return counts, latencies
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--url', default='http://localhost:9091', help='base url of the store')
+    parser.add_argument('--processes', type=int, default=4, help='client processes')
+    parser.add_argument('--seconds', type=float, default=10.0, help='duration of the load')
+    parser.add_argument('--keys', type=int, default=20, help='entries the requests are spread over')
+    parser.add_argument('--patch-ratio', type=float, default=0.2, help='share of requests that are PATCHes')
+    args = parser.parse_args()
+
+    url = args.url.rstrip('/')
+    keys = ['{}{}'.format(KEY_PREFIX, index) for index in range(args.keys)]
+    create_keys(url, keys)
+
+    jobs = [(url, keys, args.seconds, args.patch_ratio, seed) for seed in range(args.processes)]
+    start = time.perf_counter()
+    with multiprocessing.Pool(args.processes) as pool:
+        results = pool.map(worker, jobs)
+    elapsed = time.perf_counter() - start
+
+    totals = {'get': 0, 'patch': 0, 'locked': 0, 'errors': 0}
+    latencies = []
+    for counts, worker_latencies in results:
+        for name, count in counts.items():
+            totals[name] += count
+        latencies.extend(worker_latencies)
+    requests = totals['get'] + totals['patch']
+
+    print('requests:    {} ({} GET, {} PATCH) from {} processes'.format(
+        requests, totals['get'], totals['patch'], args.processes))
+    print('throughput:  {:.1f} requests/s'.format(requests / elapsed))
+    print('latency:     p50 {:.1f} ms, p99 {:.1f} ms'.format(
+        percentile(latencies, 0.5) * 1000, percentile(latencies, 0.99) * 1000))
+    print('lock errors: {}'.format(totals['locked']))
+    print('other errors: {}'.format(totals['errors']))
+
+
+if __name__ == '__main__':
+    main()
@@ -2,15 +2,58 @@ from flask import Flask
 from flask import request
 from flask import jsonify
 from datetime import datetime
+import atexit
 import json
+import os
+import sqlite3
+import threading
 from flask_sqlalchemy import SQLAlchemy
-
+from sqlalchemy import bindparam
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.pool import QueuePool
+
+
+# Seconds a connection waits for another one's write lock before failing with "database is locked"
+BUSY_TIMEOUT = float(os.environ.get('STORE_BUSY_TIMEOUT', '15'))
+# Connections kept open per uWSGI worker
+POOL_SIZE = int(os.environ.get('STORE_POOL_SIZE', '5'))
+POOL_OVERFLOW = int(os.environ.get('STORE_POOL_OVERFLOW', '10'))
+# 'exact' commits last_accessed on every GET, 'batched' buffers it and writes it behind
+ACCESS_WRITES = os.environ.get('STORE_ACCESS_WRITES', 'batched')
+if ACCESS_WRITES not in ('exact', 'batched'):
+    raise ValueError("STORE_ACCESS_WRITES must be 'exact' or 'batched', not {!r}".format(ACCESS_WRITES))
+# A batch is written after this many milliseconds or once this many keys are waiting, whichever comes first
+ACCESS_FLUSH_INTERVAL = int(os.environ.get('STORE_ACCESS_FLUSH_INTERVAL', '500'))
+ACCESS_FLUSH_SIZE = int(os.environ.get('STORE_ACCESS_FLUSH_SIZE', '100'))
 
 app = Flask(__name__)
 app.config["SQLALCHEMY_DATABASE_URI"] = 'sqlite:///store.sqlite'
+app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
+    'poolclass': QueuePool,
+    'pool_size': POOL_SIZE,
+    'max_overflow': POOL_OVERFLOW,
+    # Pooled connections are handed from thread to thread, never shared at once
+    'connect_args': {'timeout': BUSY_TIMEOUT, 'check_same_thread': False},
+}
 
 db = SQLAlchemy(app)
 
+
+@event.listens_for(Engine, 'connect')
+def configure_sqlite(dbapi_connection, connection_record):
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        return
+    cursor = dbapi_connection.cursor()
+    # Readers no longer wait for the writer, and commits no longer fsync the whole database
+    cursor.execute('PRAGMA journal_mode=WAL')
+    cursor.execute('PRAGMA synchronous=NORMAL')
+    cursor.execute('PRAGMA busy_timeout={}'.format(int(BUSY_TIMEOUT * 1000)))
+    cursor.close()
+
+
 class Entry(db.Model):
     key = db.Column(db.String(20), unique=True, nullable=False, primary_key=True)
     value = db.Column(db.Text)
@@ -48,6 +91,71 @@ class Entry(db.Model):
             self.value = new['value']
 
 
+class AccessLog:
+    def __init__(self, interval, size):
+        self.interval = interval / 1000
+        self.size = size
+        self.pending = {}
+        self.lock = threading.Lock()
+        self.wake = threading.Event()
+        self.stopped = False
+        self.thread = None
+
+    def record(self, key, accessed):
+        with self.lock:
+            self.pending[key] = max(accessed, self.pending.get(key, accessed))
+            waiting = len(self.pending)
+            if self.thread is None:
+                # Started on first use, so every uWSGI worker runs its own
+                self.thread = threading.Thread(target=self.run, name='access-log', daemon=True)
+                self.thread.start()
+        if waiting >= self.size:
+            self.wake.set()
+
+    def run(self):
+        while not self.stopped:
+            self.wake.wait(self.interval)
+            self.wake.clear()
+            try:
+                self.flush()
+            except Exception:
+                # Keep the thread alive, the batch is back in pending and goes out with the next one
+                app.logger.exception('writing last_accessed failed, retrying with the next batch')
+
+    def flush(self):
+        with self.lock:
+            pending, self.pending = self.pending, {}
+        if not pending:
+            return
+
+        # Another worker may have written a later access already, so only ever move last_accessed forward
+        statement = Entry.__table__.update().where(
+            Entry.key == bindparam('entry_key')
+        ).where(
+            (Entry.last_accessed == None) | (Entry.last_accessed < bindparam('accessed'))  # noqa: E711
+        ).values(last_accessed=bindparam('accessed'))
+        rows = [{'entry_key': key, 'accessed': accessed} for key, accessed in pending.items()]
+        try:
+            with db.engine.begin() as connection:
+                connection.execute(statement, rows)
+        except Exception:
+            with self.lock:
+                for key, accessed in pending.items():
+                    self.pending[key] = max(accessed, self.pending.get(key, accessed))
+            raise
+
+    def stop(self):
+        self.stopped = True
+        self.wake.set()
+        if self.thread is not None:
+            self.thread.join()
+        self.flush()
+
+
+access_log = AccessLog(ACCESS_FLUSH_INTERVAL, ACCESS_FLUSH_SIZE)
+atexit.register(access_log.stop)
+
+
 @app.route('/entries', methods=['POST'])
 def add_entry():
     data = request.get_json(force=True)
@@ -64,7 +172,11 @@ def add_entry():
 def get_entry(key):
     entry = Entry.query.filter_by(key=key).first()
     entry.last_accessed = datetime.now()
-    db.session.commit()
+    if ACCESS_WRITES == 'exact':
+        db.session.commit()
+    else:
+        # The session is rolled back at the end of the request, access_log writes the timestamp later
+        access_log.record(key, entry.last_accessed)
     return jsonify(entry.response())
 
 @app.route('/entries', methods=['GET'])
@@ -90,5 +202,12 @@ def update_entry(key):
 
     return jsonify(entry.response())
 
+@app.errorhandler(OperationalError)
+def database_error(error):
+    db.session.rollback()
+    if 'database is locked' in str(error):
+        return 'database is locked', 503
+    return 'database error', 500
+
 if __name__ == '__main__':
     app.run()
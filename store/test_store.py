@@ -0,0 +1,140 @@
+import os
+import random
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from datetime import datetime, timedelta
+from unittest import mock
+
+from sqlalchemy.exc import OperationalError
+
+import store
+from store import AccessLog, Entry, app, db
+
+KEYS = ['key-{}'.format(index) for index in range(20)]
+
+
+class StoreTestCase(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+
+        uri = app.config['SQLALCHEMY_DATABASE_URI']
+        app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///' + os.path.join(directory, 'store.sqlite')
+        self.addCleanup(app.config.__setitem__, 'SQLALCHEMY_DATABASE_URI', uri)
+
+        context = app.app_context()
+        context.push()
+        self.addCleanup(context.pop)
+        db.create_all()
+        for key in KEYS:
+            db.session.add(Entry(key=key, value='0', created=datetime.now()))
+        db.session.commit()
+        self.addCleanup(db.engine.dispose)
+        self.addCleanup(db.session.remove)
+
+    def last_accessed(self):
+        db.session.expire_all()
+        return {entry.key: entry.last_accessed for entry in Entry.query.all()}
+
+    def fail_writes(self, error):
+        return mock.patch.object(db, 'get_engine', side_effect=error)
+
+
+class TestAccessLog(StoreTestCase):
+
+    def test_concurrent_accesses_keep_the_newest_time(self):
+        # Two logs stand for two uWSGI workers writing to the same database
+        logs = [AccessLog(interval=5, size=7), AccessLog(interval=5, size=3)]
+        start = datetime(2026, 1, 1)
+        newest = {}
+        lock = threading.Lock()
+
+        def access(log, seed):
+            rng = random.Random(seed)
+            for _ in range(2000):
+                key = rng.choice(KEYS)
+                accessed = start + timedelta(microseconds=rng.randrange(10 ** 9))
+                log.record(key, accessed)
+                with lock:
+                    newest[key] = max(accessed, newest.get(key, accessed))
+
+        threads = [threading.Thread(target=access, args=(logs[index % 2], index)) for index in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        for log in logs:
+            log.stop()
+
+        self.assertEqual(self.last_accessed(), newest)
+
+    def test_nothing_is_lost_when_a_flush_fails(self):
+        log = AccessLog(interval=60000, size=1000)
+        first = datetime(2026, 1, 1)
+        for key in KEYS:
+            log.record(key, first)
+
+        with self.fail_writes(OperationalError('UPDATE', {}, Exception('database is locked'))):
+            with self.assertRaises(OperationalError):
+                log.flush()
+        self.assertEqual(set(self.last_accessed().values()), {None})
+
+        # Accesses made while the batch was failing are kept, older ones do not win
+        log.record(KEYS[0], first + timedelta(seconds=1))
+        log.record(KEYS[1], first - timedelta(seconds=1))
+        log.stop()
+
+        expected = dict.fromkeys(KEYS, first)
+        expected[KEYS[0]] = first + timedelta(seconds=1)
+        self.assertEqual(self.last_accessed(), expected)
+
+    def test_the_writer_survives_any_error(self):
+        log = AccessLog(interval=10, size=1000)
+        self.addCleanup(log.stop)
+        accessed = datetime(2026, 1, 1)
+        with self.fail_writes(RuntimeError('boom')), mock.patch.object(app.logger, 'exception') as logged:
+            log.record(KEYS[0], accessed)
+            deadline = time.time() + 5
+            while not logged.called and time.time() < deadline:
+                time.sleep(0.01)
+        self.assertTrue(logged.called)
+
+        deadline = time.time() + 5
+        while self.last_accessed()[KEYS[0]] is None and time.time() < deadline:
+            time.sleep(0.01)
+        self.assertTrue(log.thread.is_alive())
+        self.assertEqual(self.last_accessed()[KEYS[0]], accessed)
+
+
+class TestGetEntry(StoreTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.log = AccessLog(interval=60000, size=1000)
+        self.addCleanup(self.log.stop)
+        patch = mock.patch.object(store, 'access_log', self.log)
+        patch.start()
+        self.addCleanup(patch.stop)
+        self.client = app.test_client()
+
+    def test_batched_reads_write_behind(self):
+        response = self.client.get('/entry/' + KEYS[0])
+        self.assertNotEqual(response.get_json()['last_accessed'], '')
+        self.assertIsNone(self.last_accessed()[KEYS[0]])
+
+        self.log.flush()
+        self.assertIsNotNone(self.last_accessed()[KEYS[0]])
+
+    def test_exact_reads_write_at_once(self):
+        with mock.patch.object(store, 'ACCESS_WRITES', 'exact'):
+            self.client.get('/entry/' + KEYS[0])
+        self.assertIsNotNone(self.last_accessed()[KEYS[0]])
+        self.assertEqual(self.log.pending, {})
+
+
+if __name__ == '__main__':
+    unittest.main()